@@ -0,0 +1,19 @@
+"""
+Parametric topology generators and a suite that times the solvers across sizes.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+
+# from .<module> import *
+from .generators import *  # noqa F403
+
+import compas
+
+if not compas.IPY:
+    from .runner import *  # noqa F403
+
+
+__all__ = [name for name in dir() if not name.startswith("_")]
@@ -0,0 +1,44 @@
+"""
+Run the benchmark suite from the command line.
+
+    python -m compas_cem.benchmarks --benchmarks tree gridshell --output bench.json
+"""
+
+import argparse
+
+from compas_cem.benchmarks import BENCHMARKS
+from compas_cem.benchmarks import OPERATIONS
+from compas_cem.benchmarks import run_benchmarks
+
+
+def main(argv=None):
+    """
+    Parse the command line and run the benchmarks it asks for.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m compas_cem.benchmarks",
+        description="Time the CEM solvers on generated topologies of growing size.",
+    )
+    parser.add_argument("--benchmarks", nargs="+", choices=sorted(BENCHMARKS))
+    parser.add_argument("--sizes", nargs="+", type=int)
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--algorithm", default="LBFGS")
+    parser.add_argument("--iters", type=int, default=20)
+    parser.add_argument("--output", help="The JSON file to write the results to.")
+    args = parser.parse_args(argv)
+
+    run_benchmarks(
+        benchmarks=args.benchmarks,
+        sizes=args.sizes,
+        operations=args.operations,
+        repeat=args.repeat,
+        algorithm=args.algorithm,
+        iters=args.iters,
+        path=args.output,
+        verbose=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+from math import cos
+from math import pi
+from math import sin
+
+from compas.datastructures import Mesh
+
+from compas_cem.diagrams import TopologyDiagram
+from compas_cem.elements import DeviationEdge
+from compas_cem.elements import Node
+from compas_cem.elements import TrailEdge
+from compas_cem.loads import NodeLoad
+from compas_cem.supports import NodeSupport
+
+__all__ = ["braced_tower", "gridshell", "tree", "tensegrity_wheel", "QuadGridMesh"]
+
+# ==============================================================================
+# Braced Tower
+# ==============================================================================
+
+
+def braced_tower(storeys, width=1.0, height=1.0, brace_force=0.5, load=-1.0):
+    """
+    A planar tower of two columns, braced crosswise at every storey.
+
+    Parameters
+    ----------
+    storeys :
+        The number of storeys.
+    width :
+        The distance between the columns.
+    height :
+        The height of a storey.
+    brace_force :
+        The tension force in the diagonal braces.
+    load :
+        The vertical load at the top of each column.
+
+    Returns
+    -------
+    topology :
+        A topology diagram with `2 * (storeys + 1)` nodes. Its trails run down
+        the columns, so the braces are indirect deviation edges.
+
+    Notes
+    -----
+    The tower grows `braced_tower_2d` of the test suite by storeys. Braces much
+    stiffer than the default make tall towers diverge.
+    """
+    if storeys < 1:
+        raise ValueError("A tower needs at least one storey, got {}".format(storeys))
+
+    topology = TopologyDiagram()
+
+    for i in range(storeys + 1):
+        topology.add_node(Node(2 * i, [0.0, height * i, 0.0]))
+        topology.add_node(Node(2 * i + 1, [width, height * i, 0.0]))
+
+    for i in range(storeys):
+        a, b, c, d = 2 * i, 2 * i + 1, 2 * i + 2, 2 * i + 3
+        topology.add_edge(TrailEdge(a, c, length=-height))
+        topology.add_edge(TrailEdge(b, d, length=-height))
+        topology.add_edge(DeviationEdge(c, d, force=-1.0))
+        topology.add_edge(DeviationEdge(a, d, force=brace_force))
+        topology.add_edge(DeviationEdge(b, c, force=brace_force))
+
+    topology.add_support(NodeSupport(0))
+    topology.add_support(NodeSupport(1))
+
+    topology.add_load(NodeLoad(2 * storeys, [0.0, load, 0.0]))
+    topology.add_load(NodeLoad(2 * storeys + 1, [0.0, load, 0.0]))
+
+    return topology
+
+
+# ==============================================================================
+# Gridshell
+# ==============================================================================
+
+
+def gridshell(num_u, num_v=None, spacing=1.0, load=-1.0):
+    """
+    A gridshell spanning between two opposite edges of a grid of quads.
+
+    Parameters
+    ----------
+    num_u :
+        The number of quads along the supported edges.
+    num_v :
+        The number of quads across the span, at least `3`. If `None`, it is
+        `num_u`.
+    spacing :
+        The side length of the quads.
+    load :
+        The vertical load at every node away from the supports.
+
+    Returns
+    -------
+    topology :
+        A topology diagram with `(num_u + 1) * (num_v + 1)` nodes. Its trails
+        run across the span, from the middle to either support.
+
+    Notes
+    -----
+    The topology is made by `TopologyDiagram.from_dualquadmesh` from a flat
+    grid of quads. The edges of the grid across the span become trails, split
+    at midspan by a deviation edge, and the ones along it deviation edges.
+    """
+    if num_v is None:
+        num_v = num_u
+    if num_u < 1 or num_v < 3:
+        msg = "A gridshell needs at least 1 x 3 quads, got {} x {}"
+        raise ValueError(msg.format(num_u, num_v))
+
+    mesh = QuadGridMesh.from_meshgrid(
+        dx=spacing * num_u, nx=num_u, dy=spacing * num_v, ny=num_v
+    )
+
+    # the vertices along the two edges of the grid across the span
+    span = spacing * num_v
+    supports = []
+    for vertex in mesh.vertices():
+        y = mesh.vertex_attribute(vertex, "y")
+        if abs(y) < 1e-9 * span or abs(y - span) < 1e-9 * span:
+            supports.append(vertex)
+
+    topology = TopologyDiagram.from_dualquadmesh(mesh, supports)
+
+    support_nodes = set(supports)
+    for node in topology.nodes():
+        if node not in support_nodes:
+            topology.add_load(NodeLoad(node, [0.0, 0.0, load]))
+
+    return topology
+
+
+class QuadGridMesh(Mesh):
+    """
+    A mesh of quads that collects its polyedges by walking its edge loops.
+
+    Notes
+    -----
+    `TopologyDiagram.from_dualquadmesh` reads the polyedges of a quad mesh,
+    which a plain mesh does not collect.
+    """
+
+    def collect_polyedges(self):
+        """
+        Collect the chains of edges that run straight through the quads.
+        """
+        polyedges = []
+        visited = set()
+
+        for edge in self.edges():
+            if edge in visited:
+                continue
+
+            loop = self.edge_loop(edge)
+            for u, v in loop:
+                visited.add((u, v))
+                visited.add((v, u))
+
+            polyedges.append([loop[0][0]] + [v for _, v in loop])
+
+        self.attributes["polyedges"] = polyedges
+
+    def polyedges(self, data=False):
+        """
+        Iterate over the polyedges collected by `collect_polyedges`.
+
+        Parameters
+        ----------
+        data :
+            If `True`, yield the vertices of every polyedge with its key.
+
+        Yields
+        ------
+        polyedge :
+            The key of a polyedge, or a tuple with the key and the vertices.
+        """
+        for pkey, polyedge in enumerate(self.attributes["polyedges"]):
+            yield (pkey, polyedge) if data else pkey
+
+
+# ==============================================================================
+# Tree
+# ==============================================================================
+
+
+def tree(levels, branching=2, width=4.0, height=1.0, load=-1.0):
+    """
+    A planar tree that branches out from a trunk, level after level.
+
+    Parameters
+    ----------
+    levels :
+        The number of levels of branches above the trunk.
+    branching :
+        The number of branches every node splits into.
+    width :
+        The width of the crown.
+    height :
+        The height of the trunk and of every level of branches.
+    load :
+        The vertical load at every leaf.
+
+    Returns
+    -------
+    topology :
+        A topology diagram with the two nodes of the trunk and
+        `branching ** k` nodes at every level `k`. Build its trails with
+        `build_trails(auxiliary_trails=True)`, which adds one auxiliary trail to
+        every branch node.
+
+    Notes
+    -----
+    The branches are struts in compression, and the nodes that split from the
+    same one are tied in tension, like in the tree example.
+    """
+    if levels < 1 or branching < 1:
+        msg = "A tree needs at least one level and one branch, got {} and {}"
+        raise ValueError(msg.format(levels, branching))
+
+    topology = TopologyDiagram()
+    topology.add_node(Node(0, [0.0, 0.0, 0.0]))
+    topology.add_node(Node(1, [0.0, height, 0.0]))
+    topology.add_edge(TrailEdge(1, 0, length=-height))
+    topology.add_support(NodeSupport(0))
+
+    parents = [1]
+    key = 2
+    for level in range(1, levels + 1):
+        count = branching**level
+        nodes = []
+        for j in range(count):
+            x = width * ((j + 0.5) / count - 0.5)
+            topology.add_node(Node(key, [x, height * (level + 1), 0.0]))
+            topology.add_edge(DeviationEdge(parents[j // branching], key, force=-1.0))
+            if j % branching:
+                topology.add_edge(DeviationEdge(key - 1, key, force=1.0))
+            nodes.append(key)
+            key += 1
+        parents = nodes
+
+    for node in parents:
+        topology.add_load(NodeLoad(node, [0.0, load, 0.0]))
+
+    return topology
+
+
+# ==============================================================================
+# Tensegrity Wheel
+# ==============================================================================
+
+
+def tensegrity_wheel(
+    spokes, diameter=1.0, tension=1.0, compression=-0.5, appendix_length=0.1
+):
+    """
+    A planar wheel of struts across a circle of cables.
+
+    Parameters
+    ----------
+    spokes :
+        The number of struts, each across a diameter of the wheel.
+    diameter :
+        The diameter of the wheel.
+    tension :
+        The force in the cables around the wheel.
+    compression :
+        The force in the struts.
+    appendix_length :
+        The length of the auxiliary trails.
+
+    Returns
+    -------
+    topology :
+        A topology diagram with `2 * spokes` nodes and no trails. Build them
+        with `build_trails(auxiliary_trails=True)`, which adds one auxiliary
+        trail to every node.
+
+    Notes
+    -----
+    The wheel is the one of the tensegrity wheel example, with `spokes` struts.
+    """
+    if spokes < 2:
+        raise ValueError("A wheel needs at least two spokes, got {}".format(spokes))
+
+    num_sides = 2 * spokes
+    radius = diameter / 2.0
+
+    topology = TopologyDiagram()
+
+    for i in range(num_sides):
+        theta = 2.0 * pi * i / num_sides
+        topology.add_node(Node(i, [radius * cos(theta), radius * sin(theta), 0.0]))
+
+    for i in range(num_sides):
+        topology.add_edge(DeviationEdge(i, (i + 1) % num_sides, force=tension))
+
+    for i in range(spokes):
+        topology.add_edge(DeviationEdge(i, i + spokes, force=compression))
+
+    topology.auxiliary_trail_length = -appendix_length
+
+    return topology
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
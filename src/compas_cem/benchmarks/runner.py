@@ -0,0 +1,364 @@
+import json
+import platform
+from contextlib import redirect_stdout
+from functools import partial
+from io import StringIO
+from timeit import default_timer as timer
+
+import numpy as np
+from autograd import value_and_grad
+
+import compas_cem
+from compas_cem.benchmarks.generators import braced_tower
+from compas_cem.benchmarks.generators import gridshell
+from compas_cem.benchmarks.generators import tensegrity_wheel
+from compas_cem.benchmarks.generators import tree
+from compas_cem.equilibrium import EquilibriumStructure
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium import static_equilibrium_numpy
+from compas_cem.optimization import DeviationEdgeParameter
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import PointGoal
+from compas_cem.optimization import TrailEdgeForceGoal
+
+__all__ = ["BENCHMARKS", "OPERATIONS", "run_benchmarks", "benchmark_optimizer"]
+
+# the generator of every benchmark, the sizes it runs at by default, and
+# whether its trails need auxiliary trails
+BENCHMARKS = {
+    "braced_tower": (braced_tower, (4, 8, 16, 32, 64), False),
+    "gridshell": (gridshell, (3, 5, 9, 17, 33), False),
+    "tree": (tree, (2, 3, 5, 7, 9), True),
+    "tensegrity_wheel": (tensegrity_wheel, (4, 8, 16, 32, 64), True),
+}
+
+# the operations a benchmark times, in the order they run
+OPERATIONS = (
+    "build_trails",
+    "static_equilibrium",
+    "static_equilibrium_numpy",
+    "gradient",
+    "optimize",
+)
+
+# ==============================================================================
+# Runner
+# ==============================================================================
+
+
+def run_benchmarks(
+    benchmarks=None,
+    sizes=None,
+    operations=None,
+    repeat=3,
+    algorithm="LBFGS",
+    iters=20,
+    tmax=100,
+    eta=1e-6,
+    path=None,
+    verbose=False,
+):
+    """
+    Time the form-finding and the optimization of generated topologies by size.
+
+    Parameters
+    ----------
+    benchmarks :
+        The names of the benchmarks to run, out of `BENCHMARKS`. If `None`, all
+        of them run.
+    sizes :
+        The sizes to generate the topologies at. If `None`, every benchmark
+        runs at its default sizes.
+    operations :
+        The names of the operations to time, out of `OPERATIONS`. If `None`,
+        all of them are timed.
+    repeat :
+        The number of times every operation is timed.
+    algorithm :
+        The optimization algorithm of the `"optimize"` operation.
+    iters :
+        The maximum number of iterations of the `"optimize"` operation.
+    tmax :
+        Maximum number of iterations of the form-finding algorithm.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    path :
+        A file to write the results to as JSON. If `None`, nothing is written.
+    verbose :
+        Flag to print one line per operation timed.
+
+    Returns
+    -------
+    results :
+        A dictionary with the `environment` the benchmarks ran in and their
+        `results`, one record per benchmark, size and operation.
+
+    Notes
+    -----
+    Every record carries the name of the benchmark, the size, the operation,
+    the node, edge, trail and indirect deviation edge counts of the topology,
+    the wall `times` of every repetition and the best `time` among them. The
+    solver operations add the `iterations` they ran, the gradient and the
+    optimization the number of `parameters`, and the optimization the number
+    of `evals`, the `penalty` and the `status` it finished with.
+
+    An operation that fails, like a form-finding that does not converge or an
+    optimization the optimization algorithm gives up on, is recorded with its
+    `error` instead of its times.
+
+    The `"build_trails"` and `"optimize"` operations start every repetition
+    from a fresh topology. The other ones reuse the topology with trails.
+    """
+    if benchmarks is None:
+        benchmarks = list(BENCHMARKS)
+    if operations is None:
+        operations = OPERATIONS
+
+    for name in benchmarks:
+        if name not in BENCHMARKS:
+            raise ValueError("Benchmark {} is not supported!".format(name))
+    for operation in operations:
+        if operation not in OPERATIONS:
+            raise ValueError("Operation {} is not supported!".format(operation))
+
+    options = {"algorithm": algorithm, "iters": iters, "tmax": tmax, "eta": eta}
+
+    records = []
+    for name in benchmarks:
+        generator, default_sizes, auxiliary_trails = BENCHMARKS[name]
+        build = partial(_build_topology, generator, auxiliary_trails=auxiliary_trails)
+
+        for size in sizes or default_sizes:
+            topology = build(size)
+            info = {
+                "benchmark": name,
+                "size": size,
+                "nodes": topology.number_of_nodes(),
+                "edges": topology.number_of_edges(),
+                "trails": topology.number_of_trails(),
+                "indirect_deviation_edges": (
+                    topology.number_of_indirect_deviation_edges()
+                ),
+            }
+
+            for operation in operations:
+                record = dict(info)
+                record["operation"] = operation
+                try:
+                    record.update(
+                        _time_operation(
+                            operation, topology, partial(build, size), repeat, options
+                        )
+                    )
+                # one operation failing must not stop the others
+                except Exception as error:
+                    record["error"] = "{}: {}".format(type(error).__name__, error)
+                    record["error"] = record["error"].rstrip(": ")
+                records.append(record)
+
+                if verbose:
+                    print(_format_record(record))
+
+    results = {}
+    results["environment"] = _environment(repeat, options)
+    results["results"] = records
+
+    if path is not None:
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+
+def benchmark_optimizer(topology, bound=0.25):
+    """
+    Pose a constrained form-finding problem on a benchmark topology.
+
+    Parameters
+    ----------
+    topology :
+        A topology diagram with trails.
+    bound :
+        How far the force of a deviation edge may move from its start value.
+
+    Returns
+    -------
+    optimizer :
+        An optimizer with the force of every deviation edge as a parameter.
+        Its goals zero the forces in the auxiliary trails, if there are any.
+        Otherwise, they pull the supports to where they land once the force of
+        every deviation edge grows by a tenth of the bound, so the problem has a
+        solution within the bounds.
+    """
+    optimizer = Optimizer()
+
+    deviation_edges = list(topology.deviation_edges())
+    for edge in deviation_edges:
+        optimizer.add_parameter(DeviationEdgeParameter(edge, bound, bound))
+
+    auxiliary_edges = list(topology.auxiliary_trail_edges())
+    if auxiliary_edges:
+        for edge in auxiliary_edges:
+            optimizer.add_goal(TrailEdgeForceGoal(edge, force=0.0))
+        return optimizer
+
+    target = topology.copy()
+    for edge in deviation_edges:
+        force = target.edge_attribute(edge, "force")
+        target.edge_attribute(edge, "force", force + 0.1 * bound)
+    form = static_equilibrium_numpy(target)
+
+    for node in topology.support_nodes():
+        optimizer.add_goal(PointGoal(node, form.node_coordinates(node)))
+
+    return optimizer
+
+
+# ==============================================================================
+# Operations
+# ==============================================================================
+
+
+def _time_operation(operation, topology, build, repeat, options):
+    """
+    Time one operation on a benchmark topology.
+    """
+    tmax = options["tmax"]
+    eta = options["eta"]
+
+    if operation == "build_trails":
+        times, _ = _repeat(build, repeat)
+        return {"times": times, "time": min(times)}
+
+    if operation == "static_equilibrium":
+        solve = partial(static_equilibrium, topology, tmax=tmax, eta=eta)
+        times, form = _repeat(solve, repeat)
+        return {
+            "times": times,
+            "time": min(times),
+            "iterations": form.attributes["iterations"],
+        }
+
+    if operation == "static_equilibrium_numpy":
+        solve = partial(static_equilibrium_numpy, topology, tmax=tmax, eta=eta)
+        times, form = _repeat(solve, repeat)
+        return {
+            "times": times,
+            "time": min(times),
+            "iterations": form.attributes["iterations"],
+        }
+
+    if operation == "gradient":
+        optimizer = benchmark_optimizer(topology)
+        structure = EquilibriumStructure.from_topology_diagram(topology)
+        x = optimizer.optimization_parameters(topology)
+        value_grad = value_and_grad(
+            partial(
+                optimizer._optimize_form,
+                topology=topology.copy(),
+                structure=structure,
+                tmax=tmax,
+                eta=eta,
+            )
+        )
+        times, _ = _repeat(partial(value_grad, x), repeat)
+        return {
+            "times": times,
+            "time": min(times),
+            "parameters": optimizer.number_of_parameters(),
+        }
+
+    if operation == "optimize":
+
+        def setup():
+            return benchmark_optimizer(topology), topology.copy()
+
+        def optimize(optimizer, topology):
+            with redirect_stdout(StringIO()):
+                optimizer.solve(
+                    topology,
+                    options["algorithm"],
+                    iters=options["iters"],
+                    tmax=tmax,
+                    eta=eta,
+                )
+            return optimizer
+
+        times, optimizer = _repeat(optimize, repeat, setup)
+        return {
+            "times": times,
+            "time": min(times),
+            "parameters": optimizer.number_of_parameters(),
+            "evals": optimizer.evals,
+            "penalty": optimizer.penalty,
+            "status": optimizer.status,
+        }
+
+
+def _repeat(func, repeat, setup=None):
+    """
+    Time a function a number of times, running its setup apart.
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+        start = timer()
+        result = func(*args)
+        times.append(timer() - start)
+
+    return times, result
+
+
+def _build_topology(generator, size, auxiliary_trails=False):
+    """
+    Generate a topology and build its trails, quietly.
+    """
+    topology = generator(size)
+    with redirect_stdout(StringIO()):
+        topology.build_trails(auxiliary_trails=auxiliary_trails)
+
+    return topology
+
+
+# ==============================================================================
+# Reports
+# ==============================================================================
+
+
+def _environment(repeat, options):
+    """
+    Describe what the benchmarks ran on and with which options.
+    """
+    environment = {}
+    environment["compas_cem"] = compas_cem.__version__
+    environment["numpy"] = np.__version__
+    environment["python"] = platform.python_version()
+    environment["platform"] = platform.platform()
+    environment["processor"] = platform.processor()
+    environment["repeat"] = repeat
+    environment.update(options)
+
+    return environment
+
+
+def _format_record(record):
+    """
+    Format a benchmark record as one line of text.
+    """
+    head = "{:<18}{:>6}{:>8}  {:<26}".format(
+        record["benchmark"], record["size"], record["nodes"], record["operation"]
+    )
+    if "error" in record:
+        return head + "failed: {}".format(record["error"])
+
+    return head + "{:>12.3f} ms".format(1e3 * record["time"])
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
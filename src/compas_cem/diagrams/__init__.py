@@ -6,9 +6,15 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+from .spatial import *  # noqa F403
 from .diagram import *  # noqa F403
 from .topology import *  # noqa F403
 from .form import *  # noqa F403
 
+import compas
+
+if not compas.IPY:
+    from .adjacency import *  # noqa F403
+
 
 __all__ = [name for name in dir() if not name.startswith("_")]
@@ -0,0 +1,210 @@
+import numpy as np
+
+__all__ = ["AdjacencyCSR"]
+
+# ==============================================================================
+# Adjacency CSR
+# ==============================================================================
+
+
+class AdjacencyCSR(object):
+    """
+    The node-edge incidence of a diagram in compressed sparse row format.
+
+    The incident edges of the node at index ``i`` are stored in the slice
+    ``offsets[i]:offsets[i + 1]`` of the ``neighbors``, ``edge_indices`` and
+    ``signs`` arrays, in the order the diagram reports its neighbors.
+
+    Parameters
+    ----------
+    nodes :
+        The node keys, in diagram order.
+    edges :
+        The edge keys, in diagram order.
+    offsets :
+        The start of the incident edges of every node, with one more entry that
+        closes the last slice.
+    neighbors :
+        The indices of the neighbor nodes across the incident edges.
+    edge_indices :
+        The indices of the incident edges.
+    signs :
+        The orientation of the incident edges. `1` if an edge starts at the
+        node, `-1` if it ends there.
+    """
+
+    def __init__(self, nodes, edges, offsets, neighbors, edge_indices, signs):
+        self.nodes = nodes
+        self.edges = edges
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.neighbors = np.asarray(neighbors, dtype=np.int64)
+        self.edge_indices = np.asarray(edge_indices, dtype=np.int64)
+        self.signs = np.asarray(signs, dtype=np.int64)
+
+        self.node_index = {node: i for i, node in enumerate(nodes)}
+        self.edge_index = {edge: i for i, edge in enumerate(edges)}
+
+        # plain lists answer single node queries faster than array slices
+        self._offsets = self.offsets.tolist()
+        self._neighbors = self.neighbors.tolist()
+        self._edge_indices = self.edge_indices.tolist()
+
+    # ==============================================================================
+    # Constructors
+    # ==============================================================================
+
+    @classmethod
+    def from_diagram(cls, diagram):
+        """
+        Compress the incidence of a diagram.
+
+        Parameters
+        ----------
+        diagram :
+            A diagram.
+
+        Returns
+        -------
+        csr :
+            The adjacency of the diagram in compressed sparse row format.
+        """
+        nodes = list(diagram.nodes())
+        edges = list(diagram.edges())
+        node_index = {node: i for i, node in enumerate(nodes)}
+        edge_index = {edge: i for i, edge in enumerate(edges)}
+
+        offsets = [0]
+        neighbors = []
+        edge_indices = []
+        signs = []
+
+        for node in nodes:
+            out_edges = diagram.edge[node]
+            for nbr in diagram.adjacency[node]:
+                if nbr in out_edges:
+                    edge_indices.append(edge_index[(node, nbr)])
+                    signs.append(1)
+                else:
+                    edge_indices.append(edge_index[(nbr, node)])
+                    signs.append(-1)
+                neighbors.append(node_index[nbr])
+            offsets.append(len(neighbors))
+
+        return cls(nodes, edges, offsets, neighbors, edge_indices, signs)
+
+    # ==============================================================================
+    # Counters
+    # ==============================================================================
+
+    def number_of_nodes(self):
+        """
+        The number of nodes in the adjacency.
+        """
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        """
+        The number of edges in the adjacency.
+        """
+        return len(self.edges)
+
+    def degrees(self):
+        """
+        The number of edges incident to every node, in diagram order.
+        """
+        return np.diff(self.offsets)
+
+    # ==============================================================================
+    # Queries
+    # ==============================================================================
+
+    def node_slice(self, node):
+        """
+        The slice of the incident edges of a node in the compressed arrays.
+
+        Parameters
+        ----------
+        node :
+            A node key.
+
+        Returns
+        -------
+        node_slice :
+            The slice object.
+        """
+        i = self.node_index[node]
+        return slice(self._offsets[i], self._offsets[i + 1])
+
+    def node_edges(self, node):
+        """
+        The keys of the edges incident to a node.
+
+        Parameters
+        ----------
+        node :
+            A node key.
+
+        Returns
+        -------
+        edges :
+            The edge keys, each in the direction it is stored in.
+        """
+        edges = self.edges
+        return [edges[i] for i in self._edge_indices[self.node_slice(node)]]
+
+    def node_neighbors(self, node):
+        """
+        The keys of the neighbors of a node.
+
+        Parameters
+        ----------
+        node :
+            A node key.
+
+        Returns
+        -------
+        neighbors :
+            The node keys.
+        """
+        nodes = self.nodes
+        return [nodes[i] for i in self._neighbors[self.node_slice(node)]]
+
+    def node_incidence(self, node):
+        """
+        The neighbors of a node paired with the edges that lead to them.
+
+        Parameters
+        ----------
+        node :
+            A node key.
+
+        Returns
+        -------
+        incidence :
+            A list of tuples with a neighbor key and the key of the edge to it.
+        """
+        node_slice = self.node_slice(node)
+        nodes = self.nodes
+        edges = self.edges
+        neighbors = self._neighbors[node_slice]
+        edge_indices = self._edge_indices[node_slice]
+        return [(nodes[i], edges[j]) for i, j in zip(neighbors, edge_indices)]
+
+    # ==============================================================================
+    # Magic methods
+    # ==============================================================================
+
+    def __repr__(self):
+        tpl = "{}(nodes={}, edges={})"
+        return tpl.format(
+            self.__class__.__name__, self.number_of_nodes(), self.number_of_edges()
+        )
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
@@ -3,6 +3,7 @@ from compas.datastructures import Graph
 from compas.geometry import length_vector
 from compas.tolerance import TOL
 
+from compas_cem.diagrams.spatial import SpatialHash
 from compas_cem.elements import Edge
 from compas_cem.elements import Node
 
@@ -43,6 +44,9 @@ class Diagram(Graph):
         self.attributes["gkey_node"] = {}
         self.attributes["tol"] = 3
 
+        self._csr = None
+        self._spatial_hash = None
+
     # ==============================================================================
     # Properties
     # ==============================================================================
@@ -57,6 +61,7 @@ class Diagram(Graph):
     @tol.setter
     def tol(self, tol):
         self.attributes["tol"] = tol
+        self._spatial_hash = None
 
     @property
     def gkey_node(self):
@@ -71,6 +76,69 @@ class Diagram(Graph):
         """
         return self.attributes["gkey_node"]
 
+    @property
+    def spatial_hash(self):
+        """
+        A spatial hash of the node coordinates of the diagram.
+
+        Returns
+        -------
+        spatial_hash :
+            The spatial hash, with cells as large as the tolerance of the diagram.
+
+        Notes
+        -----
+        The spatial hash is built on first access and kept in sync as nodes are
+        added, moved with `update_node_xyz`, or deleted. Coordinates edited
+        through the node attributes directly are not tracked.
+        """
+        if self._spatial_hash is None:
+            nodes = list(self.nodes())
+            points = [self.node_coordinates(node) for node in nodes]
+            self._spatial_hash = SpatialHash.from_points(
+                nodes, points, self._spatial_tol()
+            )
+        return self._spatial_hash
+
+    def _spatial_tol(self):
+        """
+        The distance along each axis within which two points are coincident.
+        """
+        return 10.0**-self.tol
+
+    @property
+    def csr(self):
+        """
+        The node-edge incidence of the diagram in compressed sparse row format.
+
+        Returns
+        -------
+        csr :
+            The adjacency of the diagram.
+
+        Notes
+        -----
+        The adjacency is built on first access and kept until a node or an edge
+        is added to or deleted from the diagram.
+        """
+        if self._csr is None:
+            from compas_cem.diagrams.adjacency import AdjacencyCSR
+
+            self._csr = AdjacencyCSR.from_diagram(self)
+        return self._csr
+
+    def _graph_changed(self, nodes=()):
+        """
+        Discard the views of the diagram that depend on its nodes and edges.
+
+        Parameters
+        ----------
+        nodes :
+            The keys of the nodes that were added or deleted, or that gained or
+            lost an edge.
+        """
+        self._csr = None
+
     # ==============================================================================
     # Elements
     # ==============================================================================
@@ -103,7 +171,9 @@ class Diagram(Graph):
         node, and how deserialization replays one.
         """
         if isinstance(node, Node):
-            return self._add_node_element(node)
+            key = self._add_node_element(node)
+            self._graph_changed([key])
+            return key
 
         if isinstance(node, Edge):
             raise TypeError("an edge element must be added with add_edge")
@@ -116,7 +186,11 @@ class Diagram(Graph):
         if isinstance(key, Data):
             raise TypeError(f"{key!r} is not a node key")
 
-        return super(Diagram, self).add_node(key=key, attr_dict=attr_dict, **kwattr)
+        key = super(Diagram, self).add_node(key=key, attr_dict=attr_dict, **kwattr)
+        if self._spatial_hash is not None:
+            self._spatial_hash.add(key, self.node_coordinates(key))
+        self._graph_changed([key])
+        return key
 
     def add_edge(self, edge=None, v=None, attr_dict=None, **kwattr):
         """
@@ -147,22 +221,56 @@ class Diagram(Graph):
         if isinstance(edge, Edge):
             if v is not None:
                 raise ValueError("an edge element already names both of its nodes")
-            return self._add_edge_element(edge)
+            key = self._add_edge_element(edge)
+            self._graph_changed(key)
+            return key
 
         if isinstance(edge, Node):
             raise TypeError("a node element must be added with add_node")
 
-        return super(Diagram, self).add_edge(edge, v, attr_dict=attr_dict, **kwattr)
+        key = super(Diagram, self).add_edge(edge, v, attr_dict=attr_dict, **kwattr)
+        self._graph_changed(key)
+        return key
+
+    def delete_node(self, key):
+        """
+        Delete a node and its incident edges from the diagram.
+
+        Parameters
+        ----------
+        key :
+            A node key.
+        """
+        nodes = [key] + self.neighbors(key)
+        self._evict_gkey(key)
+        super(Diagram, self).delete_node(key)
+        if self._spatial_hash is not None and key in self._spatial_hash:
+            self._spatial_hash.remove(key)
+        self._graph_changed(nodes)
+
+    def delete_edge(self, edge):
+        """
+        Delete an edge from the diagram.
+
+        Parameters
+        ----------
+        edge :
+            An edge key.
+        """
+        super(Diagram, self).delete_edge(edge)
+        self._graph_changed(edge)
 
     def _add_node_element(self, node):
         """
-        Add a node element and index it by its geometric key.
+        Add a node element and index it by its coordinates.
         """
         xyz = node.xyz
         x, y, z = xyz
 
         key = super(Diagram, self).add_node(key=node.key, x=x, y=y, z=z)
         self.gkey_node[self.gkey(xyz)] = key
+        if self._spatial_hash is not None:
+            self._spatial_hash.add(key, xyz)
 
         return key
 
@@ -225,10 +333,55 @@ class Diagram(Graph):
         -----
         An integer is taken to be a node key and is returned unchanged, whether
         or not a node with that key exists.
+
+        A point resolves to the closest node whose coordinates all lie within
+        the tolerance of the diagram from those of the point, as looked up in
+        the spatial hash. Points on either side of a rounding boundary resolve
+        to the same node.
         """
         if isinstance(value, int):
             return value
-        return self.gkey_node.get(self.gkey(value))
+        return self.spatial_hash.nearest(value, self._spatial_tol())
+
+    def node_keys(self, points):
+        """
+        Resolve a batch of points to node keys.
+
+        Parameters
+        ----------
+        points :
+            The xyz coordinates of the points, as a list or an array.
+
+        Returns
+        -------
+        keys :
+            The node keys, with `None` for the points where no node sits.
+        """
+        if hasattr(points, "tolist"):
+            points = points.tolist()
+
+        spatial_hash = self.spatial_hash
+        tol = self._spatial_tol()
+
+        return [spatial_hash.nearest(point, tol) for point in points]
+
+    def nodes_within(self, point, radius):
+        """
+        Find the nodes within a radius of a point.
+
+        Parameters
+        ----------
+        point :
+            The xyz coordinates of the point.
+        radius :
+            The search radius.
+
+        Returns
+        -------
+        keys :
+            The keys of the nodes found, from the closest to the farthest.
+        """
+        return self.spatial_hash.within(point, radius)
 
     def update_node_xyz(self, key, xyz):
         """
@@ -241,11 +394,20 @@ class Diagram(Graph):
         xyz :
             The new xyz coordinates of the node.
         """
-        gkey = self.gkey(xyz)
-        if gkey in self.gkey_node:
-            del self.gkey_node[gkey]
+        if self.has_node(key):
+            self._evict_gkey(key)
         self._add_node_element(Node(key, xyz))
 
+    def _evict_gkey(self, key):
+        """
+        Drop the geometric key of a node at its current coordinates.
+
+        The geometric key is left alone if it resolves to another node.
+        """
+        gkey = self.gkey(self.node_coordinates(key))
+        if self.gkey_node.get(gkey) == key:
+            del self.gkey_node[gkey]
+
     def node_xyz(self, key, xyz=None):
         """
         Get or set the coordinates of a node.
@@ -304,17 +466,10 @@ class Diagram(Graph):
         Notes
         -----
         Each edge is reported in the direction it is stored in, so that the key
-        returned here can be used to look edge attributes up directly.
+        returned here can be used to look edge attributes up directly. The edges
+        are read from the compressed adjacency of the diagram.
         """
-        edges = []
-
-        for neighbor in self.neighbors(node):
-            if neighbor in self.edge[node]:
-                edges.append((node, neighbor))
-            else:
-                edges.append((neighbor, node))
-
-        return edges
+        return self.csr.node_edges(node)
 
     # ==============================================================================
     #  Node collections
@@ -1,9 +1,12 @@
+from copy import deepcopy
+
 from compas_cem.diagrams import Diagram
-from compas_cem.elements import Edge
-from compas_cem.elements import Node
 
 __all__ = ["FormDiagram"]
 
+# attribute values a copy can share with the original, since they never change
+IMMUTABLE_TYPES = (bool, int, float, str, type(None))
+
 # ==============================================================================
 # Form Diagram
 # ==============================================================================
@@ -23,9 +26,19 @@ class FormDiagram(Diagram):
         Arguments forwarded to the base diagram.
     **kwargs :
         Keyword arguments forwarded to the base diagram.
+
+    Notes
+    -----
+    A form diagram built lazily from an equilibrium state holds on to the state
+    and builds its nodes and edges the first time any of them is read.
+
+    A form diagram solved with `stats=True` carries the `SolveStats` of the
+    solve in `stats`. They are not part of its data.
     """
 
     def __init__(self, *args, **kwargs):
+        self._pending = None
+        self.stats = None
         super(FormDiagram, self).__init__(*args, **kwargs)
 
     # ==============================================================================
@@ -51,18 +64,18 @@ class FormDiagram(Diagram):
         -----
         The trail bookkeeping is dropped, because a form diagram is the result
         of walking the trails rather than a description of them.
-        """
-        form = topology.copy(cls=cls)
 
-        del form.attributes["_trails"]
-        del form.attributes["_auxiliary_trails"]
-        del form.attributes["_aux_length"]
-        del form.attributes["_aux_vector"]
+        The attribute dictionaries of the nodes and the edges are copied one by
+        one, rather than serialized and parsed back as a generic copy does.
+        """
+        form = cls()
+        form._copy_attributes(topology)
+        form._copy_graph(topology)
 
         return form
 
     @classmethod
-    def from_equilibrium_state(cls, eq_state, structure):
+    def from_equilibrium_state(cls, eq_state, structure, topology=None, lazy=False):
         """
         Build a form diagram from an equilibrium state.
 
@@ -72,13 +85,155 @@ class FormDiagram(Diagram):
             An equilibrium state computed by the numerical kernel.
         structure :
             The structure the equilibrium state was computed on.
+        topology :
+            The topology diagram the equilibrium state was computed from. If
+            given, the form diagram carries its attributes, such as the loads
+            and the edge types. If `None`, only the support nodes are marked.
+        lazy :
+            If `True`, the nodes and edges of the form diagram are only built
+            the first time one of them is read. Solving many states and reading
+            only a few of their forms then skips building the rest.
 
         Returns
         -------
         form :
             A form diagram carrying the equilibrium state.
+
+        Notes
+        -----
+        A lazy form diagram reads the topology diagram when it is built, not
+        when it is created. The topology diagram must not change in between.
         """
-        return form_from_eqstate(eq_state, structure, cls)
+        if not lazy:
+            return form_from_eqstate(eq_state, structure, cls, topology)
+
+        form = cls()
+        if topology is not None:
+            form._copy_attributes(topology)
+        form_update_attributes(form, eq_state)
+        form._pending = (eq_state, structure, topology)
+
+        return form
+
+    # ==============================================================================
+    # Graph
+    # ==============================================================================
+
+    @property
+    def node(self):
+        """
+        The attributes of the nodes, keyed by node keys.
+        """
+        if self._pending is not None:
+            self._build_pending()
+        return self._node
+
+    @node.setter
+    def node(self, node):
+        self._pending = None
+        self._node = node
+
+    @node.deleter
+    def node(self):
+        del self._node
+
+    @property
+    def edge(self):
+        """
+        The attributes of the edges, keyed by the keys of their nodes.
+        """
+        if self._pending is not None:
+            self._build_pending()
+        return self._edge
+
+    @edge.setter
+    def edge(self, edge):
+        self._pending = None
+        self._edge = edge
+
+    @edge.deleter
+    def edge(self):
+        del self._edge
+
+    @property
+    def adjacency(self):
+        """
+        The neighbors of the nodes, keyed by node keys.
+        """
+        if self._pending is not None:
+            self._build_pending()
+        return self._adjacency
+
+    @adjacency.setter
+    def adjacency(self, adjacency):
+        self._pending = None
+        self._adjacency = adjacency
+
+    @adjacency.deleter
+    def adjacency(self):
+        del self._adjacency
+
+    def _build_pending(self):
+        """
+        Build the nodes and edges of a lazy form diagram.
+        """
+        eq_state, structure, topology = self._pending
+        self._pending = None
+
+        if topology is not None:
+            self._copy_graph(topology)
+        else:
+            self._add_structure(structure)
+
+        form_update(self, eq_state, structure)
+
+    def _copy_attributes(self, topology):
+        """
+        Copy the diagram attributes of a topology diagram, without its trails.
+        """
+        attributes = dict(topology.attributes)
+        for name in ("_trails", "_auxiliary_trails", "_aux_length", "_aux_vector"):
+            attributes.pop(name, None)
+
+        self.attributes.update(deepcopy(attributes))
+        self.default_node_attributes.update(topology.default_node_attributes)
+        self.default_edge_attributes.update(topology.default_edge_attributes)
+        self._max_node = topology._max_node
+
+        if topology._name is not None:
+            self._name = topology._name
+
+    def _copy_graph(self, topology):
+        """
+        Copy the nodes and edges of a topology diagram with their attributes.
+        """
+        self._node = {
+            node: _copy_attributes(attr) for node, attr in topology.node.items()
+        }
+        self._edge = {
+            u: {v: _copy_attributes(attr) for v, attr in nbrs.items()}
+            for u, nbrs in topology.edge.items()
+        }
+        self._adjacency = {u: dict(nbrs) for u, nbrs in topology.adjacency.items()}
+
+        self._spatial_hash = None
+        self._graph_changed()
+
+    def _add_structure(self, structure):
+        """
+        Add the nodes and edges of an equilibrium structure, marking the supports.
+        """
+        add_node = super(Diagram, self).add_node
+        add_edge = super(Diagram, self).add_edge
+
+        for node, support in zip(structure.nodes.tolist(), structure.supports.tolist()):
+            add_node(key=node, attr_dict={"type": "support"} if support else None)
+
+        for u, v in structure.edges.tolist():
+            add_edge(u, v)
+
+        self._spatial_hash = None
+        self._graph_changed()
 
 
 # ==============================================================================
@@ -86,7 +241,7 @@ class FormDiagram(Diagram):
 # ==============================================================================
 
 
-def form_from_eqstate(eqstate, structure, cls=None):
+def form_from_eqstate(eqstate, structure, cls=None, topology=None):
     """
     Generate a form diagram from an equilibrium state calculated with JAX CEM.
 
@@ -98,6 +253,9 @@ def form_from_eqstate(eqstate, structure, cls=None):
         The structure the equilibrium state was computed on.
     cls :
         The form diagram class to instantiate. Defaults to `FormDiagram`.
+    topology :
+        The topology diagram the equilibrium state was computed from, whose
+        attributes the form diagram carries. Defaults to `None`.
 
     Returns
     -------
@@ -106,21 +264,13 @@ def form_from_eqstate(eqstate, structure, cls=None):
     """
     if cls is None:
         cls = FormDiagram
-    form = cls()
 
-    # Add nodes
-    for node in structure.nodes:
-        form.add_node(Node(int(node)))
+    if topology is not None:
+        form = cls.from_topology_diagram(topology)
+    else:
+        form = cls()
+        form._add_structure(structure)
 
-    # Assign support nodes
-    for node in structure.support_nodes:
-        form.node_attribute(int(node), "type", "support")
-
-    # Add edges
-    for u, v in structure.edges:
-        form.add_edge(Edge(int(u), int(v), {}))
-
-    # Update form attributes
     form_update(form, eqstate, structure)
 
     return form
@@ -138,24 +288,81 @@ def form_update(form, eqstate, structure):
         An equilibrium state computed by the numerical kernel.
     structure :
         The structure the equilibrium state was computed on.
+
+    Notes
+    -----
+    The arrays of the state are converted to lists once, and written straight
+    into the attribute dictionaries of the nodes and the edges. The reaction
+    forces are only written at the support nodes.
     """
+    node = form.node
+    edge = form.edge
+
+    nodes = structure.nodes.tolist()
+    edges = structure.edges.tolist()
+    supports = structure.supports.tolist()
+
     xyz = eqstate.xyz.tolist()
-    loads = eqstate.loads.tolist()
     reactions = eqstate.reactions.tolist()
-    lengths = eqstate.lengths.tolist()
-    forces = eqstate.forces.tolist()
-
-    # Update q values and lengths on edges
-    for edge in structure.edges:
-        idx = structure.edge_index[tuple(edge)]
-        form.edge_attribute(edge, name="force", value=forces[idx].pop())
-        form.edge_attribute(edge, name="lengths", value=lengths[idx].pop())
-
-    # Update residuals on nodes
-    for node in structure.nodes:
-        form.node_attributes(node, "xyz", xyz[node])
-        form.node_attributes(node, ["rx", "ry", "rz"], reactions[node])
-        form.node_attributes(node, ["qx", "qy", "qz"], loads[node])
+    forces = _flatten(eqstate.forces.tolist())
+    lengths = _flatten(eqstate.lengths.tolist())
+
+    # node coordinates and the reaction forces at the supports
+    for key, (x, y, z), reaction, support in zip(nodes, xyz, reactions, supports):
+        attr = node[key]
+        attr["x"] = x
+        attr["y"] = y
+        attr["z"] = z
+        if support:
+            attr["rx"], attr["ry"], attr["rz"] = reaction
+
+    # the loads, if the state carries them
+    loads = getattr(eqstate, "loads", None)
+    if loads is not None:
+        for key, load in zip(nodes, loads.tolist()):
+            attr = node[key]
+            attr["qx"], attr["qy"], attr["qz"] = load
+
+    # edge forces and signed lengths
+    for (u, v), force, length in zip(edges, forces, lengths):
+        attr = edge[u][v]
+        attr["force"] = force
+        attr["length"] = length
+
+    form_update_attributes(form, eqstate)
+
+    # the node coordinates moved
+    form._spatial_hash = None
+
+
+def form_update_attributes(form, eqstate):
+    """
+    Record how an equilibrium state converged among the attributes of a form.
+    """
+    iterations = getattr(eqstate, "iterations", None)
+    if iterations is not None:
+        form.attributes["iterations"] = iterations
+
+    residual_history = getattr(eqstate, "residual_history", None)
+    if residual_history is not None:
+        form.attributes["residual_history"] = [float(r) for r in residual_history]
+
+
+def _copy_attributes(attr):
+    """
+    Copy an attribute dictionary, sharing the values that never change.
+    """
+    return {
+        name: value if isinstance(value, IMMUTABLE_TYPES) else deepcopy(value)
+        for name, value in attr.items()
+    }
+
+
+def _flatten(values):
+    """
+    Unwrap the entries of a list of one-element rows, such as an `(E, 1)` array.
+    """
+    return [value[0] if isinstance(value, list) else value for value in values]
 
 
 # ==============================================================================
@@ -0,0 +1,224 @@
+from math import floor
+
+__all__ = ["SpatialHash"]
+
+# ==============================================================================
+# Spatial Hash
+# ==============================================================================
+
+
+class SpatialHash(object):
+    """
+    A uniform grid that buckets points to look them up by their coordinates.
+
+    Parameters
+    ----------
+    cell_size :
+        The edge length of the cubic cells of the grid.
+
+    Notes
+    -----
+    A point is looked up in the cell it falls in and in the cells around it,
+    so two points closer than the cell size are always found, no matter how
+    their coordinates round.
+    """
+
+    def __init__(self, cell_size):
+        if cell_size <= 0.0:
+            raise ValueError("The cell size must be positive, got {}".format(cell_size))
+
+        self.cell_size = cell_size
+        self._cells = {}
+        self._points = {}
+
+    # ==============================================================================
+    # Constructors
+    # ==============================================================================
+
+    @classmethod
+    def from_points(cls, keys, points, cell_size):
+        """
+        Bucket a collection of points.
+
+        Parameters
+        ----------
+        keys :
+            The keys of the points.
+        points :
+            The xyz coordinates of the points.
+        cell_size :
+            The edge length of the cells of the grid.
+
+        Returns
+        -------
+        spatial_hash :
+            The spatial hash.
+        """
+        spatial_hash = cls(cell_size)
+        for key, xyz in zip(keys, points):
+            spatial_hash.add(key, xyz)
+        return spatial_hash
+
+    # ==============================================================================
+    # Edits
+    # ==============================================================================
+
+    def cell(self, xyz):
+        """
+        The index of the cell a point falls in.
+        """
+        size = self.cell_size
+        x, y, z = xyz
+        return int(floor(x / size)), int(floor(y / size)), int(floor(z / size))
+
+    def add(self, key, xyz):
+        """
+        Add a point, or move it if its key is in the hash already.
+
+        Parameters
+        ----------
+        key :
+            The key of the point.
+        xyz :
+            The xyz coordinates of the point.
+        """
+        if key in self._points:
+            self.remove(key)
+
+        x, y, z = xyz
+        xyz = (float(x), float(y), float(z))
+        self._points[key] = xyz
+        self._cells.setdefault(self.cell(xyz), []).append(key)
+
+    def remove(self, key):
+        """
+        Remove a point.
+
+        Parameters
+        ----------
+        key :
+            The key of the point.
+        """
+        cell = self.cell(self._points.pop(key))
+        keys = self._cells[cell]
+        keys.remove(key)
+        if not keys:
+            del self._cells[cell]
+
+    # ==============================================================================
+    # Queries
+    # ==============================================================================
+
+    def nearest(self, xyz, tol):
+        """
+        The point closest to a query point, among those within a tolerance.
+
+        Parameters
+        ----------
+        xyz :
+            The xyz coordinates of the query point.
+        tol :
+            The largest difference allowed between any of the coordinates of
+            the query point and of a point found. At most the cell size.
+
+        Returns
+        -------
+        key :
+            The key of the closest point, or `None` if there is none.
+        """
+        x, y, z = xyz
+        i, j, k = self.cell(xyz)
+        cells = self._cells
+        points = self._points
+
+        nearest = None
+        distance_min = None
+
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for dk in (-1, 0, 1):
+                    for key in cells.get((i + di, j + dj, k + dk), ()):
+                        px, py, pz = points[key]
+                        dx, dy, dz = px - x, py - y, pz - z
+                        if abs(dx) > tol or abs(dy) > tol or abs(dz) > tol:
+                            continue
+                        distance = dx * dx + dy * dy + dz * dz
+                        if distance_min is None or distance < distance_min:
+                            nearest = key
+                            distance_min = distance
+
+        return nearest
+
+    def within(self, xyz, radius):
+        """
+        The points within a radius of a query point.
+
+        Parameters
+        ----------
+        xyz :
+            The xyz coordinates of the query point.
+        radius :
+            The search radius.
+
+        Returns
+        -------
+        keys :
+            The keys of the points found, from the closest to the farthest.
+
+        Notes
+        -----
+        A radius spanning more cells than there are points is answered by
+        testing every point instead of visiting the cells.
+        """
+        x, y, z = xyz
+        points = self._points
+        reach = int(floor(radius / self.cell_size)) + 1
+
+        if (2 * reach + 1) ** 3 > len(points):
+            candidates = points
+        else:
+            i, j, k = self.cell(xyz)
+            cells = self._cells
+            candidates = [
+                key
+                for di in range(-reach, reach + 1)
+                for dj in range(-reach, reach + 1)
+                for dk in range(-reach, reach + 1)
+                for key in cells.get((i + di, j + dj, k + dk), ())
+            ]
+
+        radius_2 = radius * radius
+        found = []
+        for key in candidates:
+            px, py, pz = points[key]
+            distance = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+            if distance <= radius_2:
+                found.append((distance, key))
+        found.sort(key=lambda item: item[0])
+
+        return [key for _, key in found]
+
+    # ==============================================================================
+    # Magic methods
+    # ==============================================================================
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def __repr__(self):
+        tpl = "{}(points={}, cells={}, cell_size={})"
+        return tpl.format(
+            self.__class__.__name__, len(self), len(self._cells), self.cell_size
+        )
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
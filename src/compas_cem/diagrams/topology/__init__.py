@@ -9,6 +9,7 @@ from __future__ import print_function
 
 # from .<module> import *
 from .mesh_mixins import *  # noqa F403
+from .index import *  # noqa F403
 from .topology import *  # noqa F403
 
 
@@ -0,0 +1,207 @@
+__all__ = ["TopologyIndex"]
+
+# ==============================================================================
+# Topology Index
+# ==============================================================================
+
+
+class TopologyIndex(object):
+    """
+    A snapshot of the queries a topology diagram answers over and over again.
+
+    The index collects, in one pass over the diagram, the nodes per sequence,
+    the sequences of every trail, the trail every node belongs to, the edges of
+    every type, the class of every edge and the edges incident to every node.
+
+    Parameters
+    ----------
+    sequences :
+        The node keys per sequence, in ascending sequence order.
+    unsequenced :
+        The keys of the nodes that do not belong to a sequence yet.
+    node_trail :
+        A mapping from node keys to the key of the trail they belong to.
+    trail_sequences :
+        A mapping from trail keys to a mapping from sequences to node keys.
+    edge_types :
+        A mapping from edge types to the keys of the edges of that type.
+    edge_class :
+        A mapping from edge keys to edge classes.
+    node_edges :
+        A mapping from node keys to the keys of their incident edges.
+
+    Notes
+    -----
+    The class of an edge refines its type. Trail edges are either `"trail"` or
+    `"auxiliary_trail"` edges. Once the trails are built, deviation edges are
+    either `"direct_deviation"` or `"indirect_deviation"` edges, and remain
+    plain `"deviation"` edges until then. Other edges are classed by type.
+
+    An index does not track the diagram it was built from. A topology diagram
+    discards its index whenever it is modified through its own methods, and
+    builds a new one the next time it is queried.
+    """
+
+    def __init__(
+        self,
+        sequences,
+        unsequenced,
+        node_trail,
+        trail_sequences,
+        edge_types,
+        edge_class,
+        node_edges,
+    ):
+        self.sequences = sequences
+        self.unsequenced = unsequenced
+        self.node_trail = node_trail
+        self.trail_sequences = trail_sequences
+        self.edge_types = edge_types
+        self.edge_class = edge_class
+        self.node_edges = node_edges
+
+        class_edges = {}
+        for edge, name in edge_class.items():
+            class_edges.setdefault(name, []).append(edge)
+        self._class_edges = {name: tuple(edges) for name, edges in class_edges.items()}
+
+    # ==============================================================================
+    # Constructors
+    # ==============================================================================
+
+    @classmethod
+    def from_topology_diagram(cls, topology):
+        """
+        Index a topology diagram.
+
+        Parameters
+        ----------
+        topology :
+            A topology diagram.
+
+        Returns
+        -------
+        index :
+            The topology index.
+        """
+        sequences = {}
+        unsequenced = []
+        node_k = {}
+        for node, attr in topology.nodes(data=True):
+            k = attr.get("_k")
+            if k is None:
+                unsequenced.append(node)
+                continue
+            sequences.setdefault(k, []).append(node)
+            node_k[node] = k
+
+        num_sequences = max(sequences) + 1 if sequences else 0
+        sequences = tuple(tuple(sequences.get(k, ())) for k in range(num_sequences))
+
+        node_trail = {}
+        trail_sequences = {}
+        for key, trail in topology.attributes["_trails"].items():
+            trail_sequences[key] = {}
+            for node in trail:
+                node_trail[node] = key
+                trail_sequences[key][topology.node_attribute(node, "_k")] = node
+
+        auxiliary_edges = set(
+            tuple(edge) for edge in topology.attributes["_auxiliary_trails"].values()
+        )
+        has_trails = len(trail_sequences) > 0
+
+        edge_types = {}
+        edge_class = {}
+        for edge, attr in topology.edges(data=True):
+            edge_type = attr.get("type")
+            edge_types.setdefault(edge_type, []).append(edge)
+
+            name = edge_type
+            if edge in auxiliary_edges:
+                name = "auxiliary_trail"
+            elif edge_type == "deviation" and has_trails:
+                u, v = edge
+                ku, kv = node_k.get(u), node_k.get(v)
+                if ku is not None and kv is not None:
+                    name = "direct_deviation" if ku == kv else "indirect_deviation"
+            edge_class[edge] = name
+
+        edge_types = {key: tuple(edges) for key, edges in edge_types.items()}
+
+        csr = topology.csr
+        node_edges = {node: tuple(csr.node_edges(node)) for node in csr.nodes}
+
+        return cls(
+            sequences,
+            tuple(unsequenced),
+            node_trail,
+            trail_sequences,
+            edge_types,
+            edge_class,
+            node_edges,
+        )
+
+    # ==============================================================================
+    # Queries
+    # ==============================================================================
+
+    def number_of_sequences(self):
+        """
+        The number of sequences, including the empty ones below the last one.
+        """
+        return len(self.sequences)
+
+    def edges(self, edge_type):
+        """
+        The keys of the edges of a given type.
+
+        Parameters
+        ----------
+        edge_type :
+            The edge type, such as `"trail"` or `"deviation"`.
+
+        Returns
+        -------
+        edges :
+            The edge keys. The tuple is empty if there is no edge of that type.
+        """
+        return self.edge_types.get(edge_type, ())
+
+    def classified_edges(self, edge_class):
+        """
+        The keys of the edges of a given class.
+
+        Parameters
+        ----------
+        edge_class :
+            The edge class, such as `"auxiliary_trail"` or `"direct_deviation"`.
+
+        Returns
+        -------
+        edges :
+            The edge keys. The tuple is empty if there is no edge of that class.
+        """
+        return self._class_edges.get(edge_class, ())
+
+    # ==============================================================================
+    # Magic methods
+    # ==============================================================================
+
+    def __repr__(self):
+        tpl = "{}(sequences={}, trails={}, nodes={})"
+        return tpl.format(
+            self.__class__.__name__,
+            self.number_of_sequences(),
+            len(self.trail_sequences),
+            len(self.node_edges),
+        )
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
@@ -4,6 +4,7 @@ from compas.geometry import scale_vector
 
 from compas_cem.diagrams import Diagram
 from compas_cem.diagrams.topology import MeshMixins
+from compas_cem.diagrams.topology import TopologyIndex
 from compas_cem.elements import Node
 from compas_cem.elements import TrailEdge
 from compas_cem.supports import NodeSupport
@@ -39,6 +40,10 @@ class TopologyDiagram(Diagram, MeshMixins):
         self.attributes["_aux_length"] = -1.0
         self.attributes["_aux_vector"] = [1.0, 1.0, 1.0]
 
+        self._index = None
+        self._edited_nodes = set()
+        self._node_trails = None
+
     # ==============================================================================
     # Serialization
     # ==============================================================================
@@ -74,8 +79,175 @@ class TopologyDiagram(Diagram, MeshMixins):
                 int(key): tuple(value) for key, value in trails.items()
             }
 
+        # replaying the graph is not an edit of its trails
+        topology._edited_nodes.clear()
+
         return topology
 
+    # ==============================================================================
+    # Array Conversion
+    # ==============================================================================
+
+    @classmethod
+    def from_arrays(
+        cls,
+        xyz,
+        trail_edges,
+        trail_lengths,
+        deviation_edges=None,
+        deviation_forces=None,
+        supports=None,
+        loads=None,
+        trail_planes=None,
+    ):
+        """
+        Construct a topology diagram from arrays in bulk.
+
+        Parameters
+        ----------
+        xyz :
+            The coordinates of the nodes, one row per node.
+            The node keys are the row indices.
+        trail_edges :
+            The indices of the two nodes of every trail edge.
+        trail_lengths :
+            The signed length of every trail edge.
+        deviation_edges :
+            The indices of the two nodes of every deviation edge.
+            Defaults to `None`, for no deviation edges.
+        deviation_forces :
+            The signed force of every deviation edge.
+        supports :
+            The indices of the support nodes.
+            Defaults to `None`, for no supports.
+        loads :
+            The xyz components of the load on every node, one row per node.
+            Defaults to `None`, for no loads.
+        trail_planes :
+            The projection plane of every trail edge, or `None` for an edge
+            without one. Defaults to `None`, for no planes at all.
+
+        Returns
+        -------
+        topology :
+            A topology diagram.
+
+        Notes
+        -----
+        The graph is populated directly, without an element object per node
+        and edge, and without indexing the nodes by geometric key. Look the
+        nodes up by key rather than by coordinates.
+        """
+        import numpy as np
+
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        num_nodes = xyz.shape[0]
+
+        def edge_array(edges, values, name):
+            edges = np.asarray(edges if edges is not None else [], dtype=int)
+            edges = edges.reshape(-1, 2)
+            values = np.asarray(values if values is not None else [], dtype=float)
+            values = values.reshape(-1)
+            if values.shape[0] != edges.shape[0]:
+                msg = "Got {} {} edges but {} values for them"
+                raise ValueError(msg.format(edges.shape[0], name, values.shape[0]))
+            if edges.size and (edges.min() < 0 or edges.max() >= num_nodes):
+                msg = "The {} edges refer to nodes out of the {} given"
+                raise ValueError(msg.format(name, num_nodes))
+            return edges.tolist(), values.tolist()
+
+        trail_edges, trail_lengths = edge_array(trail_edges, trail_lengths, "trail")
+        deviation_edges, deviation_forces = edge_array(
+            deviation_edges, deviation_forces, "deviation"
+        )
+
+        if trail_planes is None:
+            trail_planes = [None] * len(trail_edges)
+        if len(trail_planes) != len(trail_edges):
+            msg = "Got {} trail edges but {} planes for them"
+            raise ValueError(msg.format(len(trail_edges), len(trail_planes)))
+
+        supports = np.asarray(supports if supports is not None else [], dtype=int)
+        if supports.size and (supports.min() < 0 or supports.max() >= num_nodes):
+            msg = "The supports refer to nodes out of the {} given"
+            raise ValueError(msg.format(num_nodes))
+
+        if loads is not None:
+            loads = np.asarray(loads, dtype=float).reshape(-1, 3)
+            if loads.shape[0] != num_nodes:
+                msg = "Got {} nodes but {} loads for them"
+                raise ValueError(msg.format(num_nodes, loads.shape[0]))
+
+        topology = cls()
+        add_node = super(Diagram, topology).add_node
+        add_edge = super(Diagram, topology).add_edge
+
+        for key, (x, y, z) in enumerate(xyz.tolist()):
+            add_node(key=key, attr_dict={"x": x, "y": y, "z": z})
+
+        for key in supports.tolist():
+            topology.node_attribute(key, "type", "support")
+
+        if loads is not None:
+            for key in np.flatnonzero(np.any(loads != 0.0, axis=1)).tolist():
+                topology.node_attributes(key, ["qx", "qy", "qz"], loads[key].tolist())
+
+        for (u, v), length, plane in zip(trail_edges, trail_lengths, trail_planes):
+            attr = {"length": length, "type": "trail", "plane": plane}
+            add_edge(u, v, attr_dict=attr)
+
+        for (u, v), force in zip(deviation_edges, deviation_forces):
+            add_edge(u, v, attr_dict={"force": force, "type": "deviation"})
+
+        return topology
+
+    def to_arrays(self):
+        """
+        Convert the topology diagram into arrays.
+
+        Returns
+        -------
+        arrays :
+            A dictionary with the arguments of `from_arrays()`.
+
+        Notes
+        -----
+        The rows of the node arrays follow the order of the nodes in the
+        diagram, and the edges refer to nodes by row index. Edges that are
+        neither trail nor deviation edges are left out.
+        """
+        import numpy as np
+
+        nodes = list(self.nodes())
+        node_index = {node: i for i, node in enumerate(nodes)}
+
+        xyz = [self.node_coordinates(node) for node in nodes]
+        loads = [self.node_load(node) for node in nodes]
+        supports = [node_index[node] for node in self.support_nodes()]
+
+        trail_edges = list(self.trail_edges())
+        deviation_edges = list(self.deviation_edges())
+
+        def edge_indices(edges):
+            indices = [(node_index[u], node_index[v]) for u, v in edges]
+            return np.array(indices, dtype=int).reshape(-1, 2)
+
+        arrays = {}
+        arrays["xyz"] = np.array(xyz, dtype=float).reshape(-1, 3)
+        arrays["trail_edges"] = edge_indices(trail_edges)
+        arrays["trail_lengths"] = np.array(
+            [self.edge_length_2(edge) for edge in trail_edges], dtype=float
+        )
+        arrays["deviation_edges"] = edge_indices(deviation_edges)
+        arrays["deviation_forces"] = np.array(
+            [self.edge_force(edge) for edge in deviation_edges], dtype=float
+        )
+        arrays["supports"] = np.array(supports, dtype=int)
+        arrays["loads"] = np.array(loads, dtype=float).reshape(-1, 3)
+        arrays["trail_planes"] = [self.edge_plane(edge) for edge in trail_edges]
+
+        return arrays
+
     # ==============================================================================
     # Properties
     # ==============================================================================
@@ -112,6 +284,47 @@ class TopologyDiagram(Diagram, MeshMixins):
     def auxiliary_trail_vector(self, vector):
         self.attributes["_aux_vector"] = vector
 
+    @property
+    def index(self):
+        """
+        The topology index of the diagram, built on first access.
+
+        Returns
+        -------
+        index :
+            The topology index.
+
+        Notes
+        -----
+        The index is discarded by every method of the diagram that adds or
+        deletes elements, assigns supports and loads, or changes the trails.
+        Call `invalidate_index()` after editing the `type` or `_k` attributes
+        of nodes and edges directly.
+        """
+        if self._index is None:
+            self._index = TopologyIndex.from_topology_diagram(self)
+        return self._index
+
+    def invalidate_index(self):
+        """
+        Discard the topology index so that the next query builds it again.
+        """
+        self._index = None
+
+    def _graph_changed(self, nodes=()):
+        """
+        Discard the views of the diagram that depend on its nodes and edges.
+
+        Parameters
+        ----------
+        nodes :
+            The keys of the nodes that were added or deleted, or that gained or
+            lost an edge. They are revisited by the next incremental trail build.
+        """
+        super(TopologyDiagram, self)._graph_changed(nodes)
+        self.invalidate_index()
+        self._edited_nodes.update(nodes)
+
     # ==============================================================================
     # Node Additions
     # ==============================================================================
@@ -138,6 +351,8 @@ class TopologyDiagram(Diagram, MeshMixins):
             raise ValueError("A node doesn't exist at {} yet!".format(value))
 
         self.node_attribute(node, "type", "support")
+        self.invalidate_index()
+        self._edited_nodes.add(node)
 
     def add_load(self, load):
         """
@@ -156,6 +371,7 @@ class TopologyDiagram(Diagram, MeshMixins):
             raise ValueError("A node doesn't exist at {} yet!".format(value))
 
         self.node_attributes(node, ["qx", "qy", "qz"], load.vector)
+        self.invalidate_index()
 
     # ==============================================================================
     # Counters
@@ -170,7 +386,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         number :
             The number of trails.
         """
-        return len(list(self.trails()))
+        return len(self.attributes["_trails"])
 
     def number_of_auxiliary_trails(self):
         """
@@ -192,7 +408,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         number :
             The number of trail edges.
         """
-        return len(list(self.trail_edges()))
+        return len(self.index.edges("trail"))
 
     def number_of_deviation_edges(self):
         """
@@ -203,7 +419,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         number :
             The number of deviation edges.
         """
-        return len(list(self.deviation_edges()))
+        return len(self.index.edges("deviation"))
 
     def number_of_direct_deviation_edges(self):
         """
@@ -250,6 +466,22 @@ class TopologyDiagram(Diagram, MeshMixins):
         """
         return self.attributes["_trails"][key]
 
+    def node_trail(self, node):
+        """
+        Gets the key of the trail a node belongs to.
+
+        Parameters
+        ----------
+        node :
+            A node key.
+
+        Returns
+        -------
+        key :
+            The trail key, or `None` if the node is not on a trail yet.
+        """
+        return self.index.node_trail.get(node)
+
     def trails(self, keys=False):
         """
         Iterate over all the existing trails in the topology diagram.
@@ -336,7 +568,9 @@ class TopologyDiagram(Diagram, MeshMixins):
             sequence_new = sequence + idx
             self.node_attribute(node, name="_k", value=sequence_new)
 
-    def build_trails(self, auxiliary_trails=False):
+        self.invalidate_index()
+
+    def build_trails(self, auxiliary_trails=False, incremental=False):
         """
         Automatically generate the trails in the topology diagram.
 
@@ -349,68 +583,48 @@ class TopologyDiagram(Diagram, MeshMixins):
         ----------
         auxiliary_trails :
             A flag to automatically append auxiliary trails to trail-unassigned nodes.
+        incremental :
+            If `True`, only the trails that run through the nodes edited since
+            the trails were last built are traversed again. The other trails
+            are kept as they are. Defaults to `False`.
 
         Notes
         -----
             Origin nodes are computed in automatic as part of the trail-making process.
             Previous trails and auxiliary trails are recalculated every time
-            this function is called.
-        """
-        trails = {}
-
-        # trail search
-        nodes_in_trails = set()
+            this function is called, unless the build is incremental.
 
-        for support in self.support_nodes():
-            trail = []
-            visited = set()
-            node = support
-
-            while True:
-                last_node = node
-                neighbors = self.neighbors(node)
-
-                while neighbors:
-                    neighbor = neighbors.pop()
-
-                    if neighbor in visited:
-                        continue
-
-                    try:
-                        is_trail = self.is_trail_edge((node, neighbor))
-                    except KeyError:
-                        is_trail = self.is_trail_edge((neighbor, node))
-
-                    if not is_trail:
-                        continue
-
-                    trail.append(node)
-                    visited.add(node)
-                    node = neighbor
-                    break
-
-                if last_node == node:
-                    origin_node = node
-                    trail.append(origin_node)
-                    visited.add(node)
-                    break
+            A node counts as edited when it is added or deleted, when an edge
+            incident to it is added or deleted, or when it is assigned a support.
+            Edits are tracked per diagram object, so a copy or a deserialized
+            diagram starts with none. An incremental build on a diagram without
+            trails builds them all.
+        """
+        self.invalidate_index()
 
-            # set last node to be origin/start node
-            self.node_attribute(origin_node, "type", "_origin")
+        incremental = incremental and self.has_trails()
 
-            trail.reverse()
+        if incremental:
+            trails, nodes, supports = self._release_trails(self._edited_nodes)
+            incidence = self._node_incidence
+        else:
+            trails = {}
+            nodes = set(self.nodes())
+            supports = list(self.support_nodes())
+            incidence = self.csr.node_incidence
 
-            # assign node sequences
-            # start should be _k= 0, support _k=len(trail)
-            for index, node in enumerate(trail):
-                self.node_attribute(node, "_k", index)
+        # trail search
+        walked = []
 
-            trails[origin_node] = tuple(trail)
-            nodes_in_trails.update(visited)
+        for support in supports:
+            trail = self._walk_trail(support, incidence)
+            trails[trail[0]] = trail
+            walked.append(trail)
 
         # output sanity checks
         # all nodes must belong to a trail
-        unassigned = set(self.nodes()) - nodes_in_trails
+        nodes_in_trails = set(node for trail in walked for node in trail)
+        unassigned = nodes - nodes_in_trails
 
         # automatically create auxiliary trails
         if auxiliary_trails:
@@ -428,20 +642,31 @@ class TopologyDiagram(Diagram, MeshMixins):
                 )
                 aux_trails[node] = edge
 
-            self.attributes["_auxiliary_trails"] = aux_trails
+            if incremental:
+                self.attributes["_auxiliary_trails"].update(aux_trails)
+            else:
+                self.attributes["_auxiliary_trails"] = aux_trails
             print(
                 "Warning: {} auxiliary trails have been added to the topology diagram!".format(
                     len(aux_trails)
                 )
             )
 
-            return self.build_trails(auxiliary_trails=False)
+            # only the new supports need a trail search
+            for _, aux_node in aux_trails.values():
+                trail = self._walk_trail(aux_node, self._node_incidence)
+                trails[trail[0]] = trail
+                walked.append(trail)
+                nodes_in_trails.update(trail)
+
+            unassigned = nodes - nodes_in_trails
 
         # sanity checks
-        # there must be at least one trail edge
-        assert len(list(self.trail_edges())) > 0, "No trail edges defined!"
-        # there must be at least one support node for trails to run
-        assert len(list(self.support_nodes())) > 0, "No supports assigned!"
+        if not incremental:
+            # there must be at least one trail edge
+            assert len(list(self.trail_edges())) > 0, "No trail edges defined!"
+            # there must be at least one support node for trails to run
+            assert len(list(self.support_nodes())) > 0, "No supports assigned!"
         # no free nodes
         msg = "Nodes {} haven't been assigned to a trail. Check your topology!".format(
             unassigned
@@ -450,6 +675,218 @@ class TopologyDiagram(Diagram, MeshMixins):
 
         # store trails in topology diagram
         self.attributes["_trails"] = trails
+        self.invalidate_index()
+
+        # keep the trail membership of the nodes in sync
+        if incremental:
+            node_trails = self._trail_membership()
+            for node in self._edited_nodes:
+                node_trails.pop(node, None)
+            for trail in walked:
+                for node in trail:
+                    node_trails[node] = trail[0]
+        else:
+            self._node_trails = None
+
+        self._edited_nodes.clear()
+
+    def check_trails(self):
+        """
+        Check that the trails are consistent with the diagram.
+
+        Returns
+        -------
+        errors :
+            A description of every inconsistency found.
+            The list is empty if the trails are consistent.
+
+        Notes
+        -----
+        This is a debugging aid for incremental trail builds. It scans the
+        whole diagram, so it costs as much as building the trails anew.
+        """
+        errors = []
+
+        if self._edited_nodes:
+            msg = "Nodes {} were edited after the trails were built"
+            errors.append(msg.format(sorted(self._edited_nodes)))
+
+        node_trails = {}
+        for key, trail in self.attributes["_trails"].items():
+            if trail[0] != key:
+                errors.append("Trail {} does not start at node {}".format(key, key))
+
+            missing = [node for node in trail if not self.has_node(node)]
+            if missing:
+                msg = "Nodes {} of trail {} do not exist"
+                errors.append(msg.format(missing, key))
+                continue
+
+            for node in trail:
+                if node in node_trails:
+                    msg = "Node {} is on trails {} and {}"
+                    errors.append(msg.format(node, node_trails[node], key))
+                node_trails[node] = key
+
+            if len(trail) > 1:
+                if not self.is_node_origin(trail[0]):
+                    errors.append("Trail {} does not start at an origin".format(key))
+                if not self.is_node_support(trail[-1]):
+                    errors.append("Trail {} does not end at a support".format(key))
+
+            for u, v in zip(trail[:-1], trail[1:]):
+                edge = (u, v) if self.has_edge((u, v)) else (v, u)
+                if not self.has_edge(edge) or not self.is_trail_edge(edge):
+                    msg = "Nodes {} and {} of trail {} are not joined by a trail edge"
+                    errors.append(msg.format(u, v, key))
+
+            sequences = [self.node_attribute(node, "_k") for node in trail]
+            if None in sequences:
+                msg = "Trail {} has nodes without a sequence"
+                errors.append(msg.format(key))
+            elif sequences != list(range(sequences[0], sequences[0] + len(trail))):
+                msg = "Trail {} has the sequences {}"
+                errors.append(msg.format(key, sequences))
+
+        unassigned = [node for node in self.nodes() if node not in node_trails]
+        if unassigned:
+            errors.append("Nodes {} are not on a trail".format(unassigned))
+
+        for u, v in self.edges_where({"type": "trail"}):
+            a, b = node_trails.get(u), node_trails.get(v)
+            if a is not None and b is not None and a != b:
+                msg = "Trail edge {} joins trails {} and {}"
+                errors.append(msg.format((u, v), a, b))
+
+        return errors
+
+    def _walk_trail(self, support, incidence):
+        """
+        Walks a trail from a support node and assigns its node sequences.
+
+        Parameters
+        ----------
+        support :
+            The key of the support node to start from.
+        incidence :
+            A function that takes a node key and returns a list of tuples with
+            the key of a neighbor and the key of the edge to it.
+
+        Returns
+        -------
+        trail :
+            The node keys from the origin node to the support node.
+        """
+        trail = []
+        visited = set()
+        node = support
+
+        while True:
+            last_node = node
+            neighbors = incidence(node)
+
+            while neighbors:
+                neighbor, edge = neighbors.pop()
+
+                if neighbor in visited:
+                    continue
+
+                if not self.is_trail_edge(edge):
+                    continue
+
+                trail.append(node)
+                visited.add(node)
+                node = neighbor
+                break
+
+            if last_node == node:
+                origin_node = node
+                trail.append(origin_node)
+                visited.add(node)
+                break
+
+        # set last node to be origin/start node
+        self.node_attribute(origin_node, "type", "_origin")
+
+        trail.reverse()
+
+        # assign node sequences
+        # start should be _k= 0, support _k=len(trail)
+        for index, node in enumerate(trail):
+            self.node_attribute(node, "_k", index)
+
+        return tuple(trail)
+
+    def _release_trails(self, nodes):
+        """
+        Takes apart the trails that run through a collection of nodes.
+
+        Parameters
+        ----------
+        nodes :
+            The keys of the edited nodes.
+
+        Returns
+        -------
+        trails :
+            The trails that remain, keyed by origin node.
+        released :
+            The keys of the existing nodes that need to be assigned to a trail.
+        supports :
+            The keys of the support nodes to start a trail search from.
+        """
+        trails = dict(self.attributes["_trails"])
+        node_trails = self._trail_membership()
+
+        released = set()
+        for node in nodes:
+            key = node_trails.get(node)
+            if key in trails:
+                released.update(trails.pop(key))
+            released.add(node)
+
+        released = set(node for node in released if self.has_node(node))
+        for node in released:
+            if self.is_node_origin(node):
+                self.node_attribute(node, "type", None)
+            self.node_attribute(node, "_k", None)
+
+        supports = sorted(node for node in released if self.is_node_support(node))
+
+        # auxiliary trails along a deleted edge are gone
+        aux_trails = self.attributes["_auxiliary_trails"]
+        for node, edge in list(aux_trails.items()):
+            if not self.has_edge(edge):
+                del aux_trails[node]
+
+        return trails, released, supports
+
+    def _trail_membership(self):
+        """
+        A mapping from node keys to the key of the trail they belong to.
+        """
+        if self._node_trails is None:
+            self._node_trails = {
+                node: key
+                for key, trail in self.attributes["_trails"].items()
+                for node in trail
+            }
+        return self._node_trails
+
+    def _node_incidence(self, node):
+        """
+        The neighbors of a node paired with the edges that lead to them.
+
+        Notes
+        -----
+        This reads the adjacency dictionaries directly, so that an incremental
+        trail build does not compress the whole diagram after every edit.
+        """
+        edges = self.edge[node]
+        return [
+            (nbr, (node, nbr) if nbr in edges else (nbr, node))
+            for nbr in self.adjacency[node]
+        ]
 
     # ==============================================================================
     #  Node Collections
@@ -566,7 +1003,7 @@ class TopologyDiagram(Diagram, MeshMixins):
             If no edge of the given type is attached, the list will be empty.
         """
         deviation_edges = []
-        for edge in self.node_connected_edges(node):
+        for edge in self.index.node_edges[node]:
             if predicate(edge):
                 deviation_edges.append(edge)
         return deviation_edges
@@ -592,6 +1029,8 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes :
             The attributes of the next trail edge if `data=True`.
         """
+        if not data:
+            return iter(self.index.edges("trail"))
         return self.edges_where({"type": "trail"}, data)
 
     def deviation_edges(self, data=False):
@@ -611,6 +1050,8 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes :
             The attributes of the next deviation edge if `data=True`.
         """
+        if not data:
+            return iter(self.index.edges("deviation"))
         return self.edges_where({"type": "deviation"}, data)
 
     def direct_deviation_edges(self, data=False):
@@ -630,11 +1071,8 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes :
             The attributes of the next direct deviation edge if `data=True`.
         """
-
-        def predicate(edge, attr):
-            return self.is_direct_deviation_edge(edge)
-
-        return self.edges_where_predicate(predicate, data)
+        predicate = self.is_direct_deviation_edge
+        return self._classified_edges("direct_deviation", predicate, data)
 
     def indirect_deviation_edges(self, data=False):
         """
@@ -653,11 +1091,8 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes :
             The attributes of the next indirect deviation edge if `data=True`.
         """
-
-        def predicate(edge, attr):
-            return self.is_indirect_deviation_edge(edge)
-
-        return self.edges_where_predicate(predicate, data)
+        predicate = self.is_indirect_deviation_edge
+        return self._classified_edges("indirect_deviation", predicate, data)
 
     def auxiliary_trail_edges(self, data=False):
         """
@@ -676,11 +1111,51 @@ class TopologyDiagram(Diagram, MeshMixins):
         attributes :
             The attributes of the next auxiliary trail edge if `data=True`.
         """
+        predicate = self.is_auxiliary_trail_edge
+        return self._classified_edges("auxiliary_trail", predicate, data)
+
+    def _classified_edges(self, edge_class, predicate, data=False):
+        """
+        Iterates over the keys of all the edges of a class in the diagram.
+
+        Parameters
+        ----------
+        edge_class :
+            The edge class.
+        predicate :
+            The edge predicate of the class, used for the edges that have not
+            been classified yet.
+        data :
+            `True` if the edges attributes should be yielded simultaneously.
+            Defaults to `False`.
+
+        Yields
+        -------
+        edge :
+            The key of the next edge of the class.
+        attributes :
+            The attributes of the next edge if `data=True`.
+
+        Notes
+        -----
+        Deviation edges are classified by the sequences of their nodes. Until
+        the trails are built, asking for direct or indirect deviation edges
+        falls back to the edge predicate, which fails on unsequenced nodes.
+        """
+        index = self.index
 
-        def predicate(edge, attr):
-            return self.is_auxiliary_trail_edge(edge)
+        if edge_class.endswith("_deviation") and index.classified_edges("deviation"):
+            return self.edges_where_predicate(lambda edge, attr: predicate(edge), data)
 
-        return self.edges_where_predicate(predicate, data)
+        if not data:
+            return iter(index.classified_edges(edge_class))
+
+        edge_classes = index.edge_class
+
+        def is_classified(edge, attr):
+            return edge_classes[edge] == edge_class
+
+        return self.edges_where_predicate(is_classified, data)
 
     # ==============================================================================
     # Node Filters
@@ -724,6 +1199,29 @@ class TopologyDiagram(Diagram, MeshMixins):
     # Edge Predicates
     # ==============================================================================
 
+    def edge_class(self, edge):
+        """
+        Gets the class of an edge.
+
+        Parameters
+        ----------
+        edge :
+            The key of the edge.
+
+        Returns
+        -------
+        edge_class :
+            `"trail"` or `"auxiliary_trail"` for a trail edge.
+            `"direct_deviation"` or `"indirect_deviation"` for a deviation edge
+            once the trails are built, `"deviation"` before that.
+
+        Notes
+        -----
+        The classes of all the edges are computed at once and looked up from
+        the topology index afterwards.
+        """
+        return self.index.edge_class[edge]
+
     def is_trail_edge(self, edge):
         """
         Tests whether or not an edge is a trail edge.
@@ -774,10 +1272,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         flag :
             `True`if the edge is in an auxiliary trail. `False` otherwise.
         """
-        aux_trails = set([tuple(edge) for edge in self.auxiliary_trails()])
-        if edge in set(aux_trails):
-            return True
-        return False
+        return self.index.edge_class.get(edge) == "auxiliary_trail"
 
     def is_direct_deviation_edge(self, edge):
         """
@@ -794,6 +1289,9 @@ class TopologyDiagram(Diagram, MeshMixins):
             `True`if the deviation edge is direct.
             `False` otherwise.
         """
+        edge_class = self.index.edge_class.get(edge)
+        if edge_class in ("direct_deviation", "indirect_deviation"):
+            return edge_class == "direct_deviation"
 
         def predicate(x):
             a, b = self.edge_sequence(edge)
@@ -817,6 +1315,9 @@ class TopologyDiagram(Diagram, MeshMixins):
             `True`if the deviation edge is indirect.
             `False` otherwise.
         """
+        edge_class = self.index.edge_class.get(edge)
+        if edge_class in ("direct_deviation", "indirect_deviation"):
+            return edge_class == "indirect_deviation"
 
         def predicate(x):
             a, b = self.edge_sequence(edge)
@@ -909,12 +1410,7 @@ class TopologyDiagram(Diagram, MeshMixins):
             The next sequence if `keys` is `False`.
             Otherwise, a tuple with the sequence key and the corresponding node keys.
         """
-        for k in range(self.number_of_sequences()):
-
-            def predicate(node, attr):
-                return self.node_sequence(node) == k
-
-            sequence = tuple(self.nodes_where_predicate(predicate))
+        for k, sequence in enumerate(self.index.sequences):
             if not keys:
                 yield sequence
             else:
@@ -942,7 +1438,11 @@ class TopologyDiagram(Diagram, MeshMixins):
         key : `int`
             The sequence key.
         """
-        return max(list(self.nodes_attribute(name="_k")))
+        index = self.index
+        if index.unsequenced or not index.sequences:
+            msg = "Nodes {} don't belong to a sequence yet. Try adding trails first."
+            raise ValueError(msg.format(list(index.unsequenced)))
+        return index.number_of_sequences() - 1
 
     # ==============================================================================
     # Mappings
@@ -962,11 +1462,7 @@ class TopologyDiagram(Diagram, MeshMixins):
         sequence_map :
             A dictionary wherein keys are sequences and values are node keys.
         """
-        sequences = dict()
-        for node in self.trail(key):
-            sequences[self.node_sequence(node)] = node
-
-        return sequences
+        return dict(self.index.trail_sequences[key])
 
     def trails_sequences(self):
         """
@@ -980,12 +1476,8 @@ class TopologyDiagram(Diagram, MeshMixins):
             A dictionary wherein keys are trail keys and values are dictionaries
             wherein keys are sequences and values are node keys.
         """
-        sequences = dict()
-
-        for key, trail in self.trails(keys=True):
-            sequences[key] = self.trail_sequences(key)
-
-        return sequences
+        trail_sequences = self.index.trail_sequences
+        return {key: dict(sequences) for key, sequences in trail_sequences.items()}
 
     # ==============================================================================
     # Magic methods
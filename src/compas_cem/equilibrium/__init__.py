@@ -8,12 +8,16 @@ from __future__ import print_function
 
 
 # from .<module> import *
+from .stats import *  # noqa F403
 from .force import *  # noqa F403
 
 import compas
 
 if not compas.IPY:
+    from .state import *  # noqa F403
+    from .structure import *  # noqa F403
     from .force_numpy import *  # noqa F403
+    from .batch_numpy import *  # noqa F403
 
 
 __all__ = [name for name in dir() if not name.startswith("_")]
@@ -0,0 +1,347 @@
+import numpy as np
+
+from compas_cem.equilibrium.force_numpy import equilibrium_parameters_numpy
+from compas_cem.equilibrium.force_numpy import length_vectors_numpy
+from compas_cem.equilibrium.force_numpy import normalize_vectors_numpy
+from compas_cem.equilibrium.force_numpy import sequence_plan
+from compas_cem.equilibrium.force_numpy import trail_lengths_from_planes_numpy
+from compas_cem.equilibrium.structure import EquilibriumStructure
+
+__all__ = ["static_equilibrium_batch"]
+
+
+# ==============================================================================
+# Batched equilibrium
+# ==============================================================================
+
+
+def static_equilibrium_batch(
+    topology,
+    lengths=None,
+    forces=None,
+    loads=None,
+    tmax=100,
+    eta=1e-6,
+    verbose=False,
+    structure=None,
+):
+    """
+    Solve a topology diagram for static equilibrium under many parameter sets.
+
+    Parameters
+    ----------
+    topology :
+        A topology diagram.
+    lengths :
+        A batch by edge array with the signed edge lengths of every parameter
+        set. Only the trail edges are read. If `None`, all parameter sets take
+        the lengths of the topology diagram.
+    forces :
+        A batch by edge array with the signed edge forces of every parameter
+        set. Only the deviation edges are read. If `None`, all parameter sets
+        take the forces of the topology diagram.
+    loads :
+        A batch by node by 3 array with the node loads of every parameter set.
+        If `None`, all parameter sets take the loads of the topology diagram.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence. Every parameter
+        set in the batch must hit it.
+    verbose :
+        Flag to print out internal operations.
+    structure :
+        The equilibrium structure of the topology diagram. If `None`, it is
+        compiled from the topology diagram.
+
+    Returns
+    -------
+    state :
+        A dictionary with the stacked node coordinates `xyz`, edge forces
+        `forces` and reaction forces `reactions` of every parameter set, the
+        `nodes` and `edges` keys the arrays are ordered by, the number of
+        `iterations` run and the last residual `distance` of every set.
+
+    Notes
+    -----
+    Nodes and edges follow the order of `topology.nodes()` and
+    `topology.edges()`. The batch size is the leading dimension of the arrays
+    given; a parameter given without a leading dimension applies to every set.
+    The trail entries of the output forces are computed; its deviation entries
+    are the input forces. Reactions are zero at nodes that are no supports.
+    """
+    if structure is None:
+        structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    xyz, _lengths, _forces, _loads, residuals = equilibrium_parameters_numpy(
+        topology, structure
+    )
+
+    lengths = _batch_parameter(lengths, _lengths, "lengths")
+    forces = _batch_parameter(forces, _forces, "forces")
+    loads = _batch_parameter(loads, _loads, "loads")
+
+    sizes = {array.shape[0] for array in (lengths, forces, loads)} - {1}
+    if len(sizes) > 1:
+        raise ValueError("Mismatched batch sizes: {}".format(sorted(sizes)))
+    num_batch = sizes.pop() if sizes else 1
+
+    lengths = np.broadcast_to(lengths, (num_batch,) + _lengths.shape)
+    forces = np.broadcast_to(forces, (num_batch,) + _forces.shape)
+    loads = np.broadcast_to(loads, (num_batch,) + _loads.shape)
+
+    state = equilibrium_arrays_batch_numpy(
+        structure,
+        np.tile(xyz, (num_batch, 1, 1)),
+        lengths,
+        forces,
+        loads,
+        np.tile(residuals, (num_batch, 1, 1)),
+        tmax,
+        eta,
+        verbose,
+    )
+
+    state["nodes"] = structure.nodes
+    state["edges"] = structure.edges
+
+    return state
+
+
+def equilibrium_arrays_batch_numpy(
+    structure, xyz, lengths, forces, loads, residuals, tmax=100, eta=1e-6, verbose=False
+):
+    """
+    Equilibrate forces on the stacked arrays of many parameter sets at once.
+
+    Parameters
+    ----------
+    structure :
+        An equilibrium structure.
+    xyz :
+        A batch by node by 3 array with the initial node coordinates. It is
+        updated in place.
+    lengths :
+        A batch by edge array with the signed edge lengths.
+    forces :
+        A batch by edge array with the signed edge forces.
+    loads :
+        A batch by node by 3 array with the node loads.
+    residuals :
+        A batch by node by 3 array with the initial residual vectors. It is
+        updated in place.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    verbose :
+        Flag to print out internal operations.
+
+    Returns
+    -------
+    state :
+        A dictionary with the stacked node coordinates `xyz`, edge forces
+        `forces`, reaction forces `reactions` and residual vectors `residuals`,
+        the number of `iterations` run and the last residual `distance` of every
+        parameter set.
+
+    Notes
+    -----
+    This is the batched twin of `equilibrium_arrays_numpy`. It runs on plain
+    numpy and updates its arrays in place, so it cannot be differentiated.
+    """
+    num_batch = xyz.shape[0]
+
+    plan = sequence_plan(structure)
+    reactions = np.zeros_like(xyz)
+    trail_forces = np.array(forces, dtype=float)
+
+    # without indirect deviation edges, a single sweep is exact
+    exact = structure.number_of_indirect_deviation_edges() == 0
+    if exact:
+        tmax = 1
+
+    distance = np.zeros(num_batch) if exact else np.full(num_batch, np.inf)
+    for t in range(tmax):  # max iterations
+        # store last positions for residual
+        last_xyz = xyz.copy()
+
+        # indirect deviation edges are ignored in the first iteration
+        for step in plan:
+            sequence_equilibrium_batch_numpy(
+                step,
+                xyz,
+                residuals,
+                reactions,
+                trail_forces,
+                lengths,
+                forces,
+                loads,
+                structure,
+                indirect=t > 0,
+            )
+
+        # if this is the first iteration, move directly to the next one
+        if t == 0:
+            continue
+
+        # calculate residual distance of every parameter set
+        distance = np.sqrt(np.sum(np.square(last_xyz - xyz), axis=(1, 2)))
+
+        # if all residual distances are smaller than threshold, stop iterating
+        if np.all(distance < eta):
+            break
+
+    # if any residual distance is larger than threshold, raise error
+    if t > 0:
+        failed = np.flatnonzero(distance > eta)
+        if failed.size:
+            msg = "Over {} iters. Residual: {} > eta: {} in {} of {} sets: {}"
+            raise ValueError(
+                msg.format(
+                    tmax,
+                    np.max(distance),
+                    eta,
+                    failed.size,
+                    num_batch,
+                    failed.tolist(),
+                )
+            )
+
+    # print log
+    if verbose:
+        msg = "====== Completed Equilibrium in {} iters. Residual: {}======"
+        print(msg.format(t, np.max(distance)))
+
+    state = {}
+    state["xyz"] = xyz
+    state["forces"] = trail_forces
+    state["reactions"] = reactions
+    state["residuals"] = residuals
+    state["iterations"] = t + 1
+    state["distance"] = distance
+
+    return state
+
+
+def sequence_equilibrium_batch_numpy(
+    step,
+    xyz,
+    residuals,
+    reactions,
+    trail_forces,
+    lengths,
+    forces,
+    loads,
+    structure,
+    indirect=True,
+):
+    """
+    Equilibrate every trail at one sequence in every parameter set, in place.
+
+    Parameters
+    ----------
+    step :
+        The index arrays of the sequence, one entry of `sequence_plan`.
+    xyz :
+        The stacked node coordinates.
+    residuals :
+        The stacked residual vectors.
+    reactions :
+        The stacked reaction forces.
+    trail_forces :
+        The stacked edge forces the trail forces are written to.
+    lengths :
+        The stacked signed edge lengths.
+    forces :
+        The stacked signed edge forces.
+    loads :
+        The stacked node loads.
+    structure :
+        An equilibrium structure.
+    indirect :
+        Flag to consider indirect deviation edges in the calculation.
+    """
+    nodes = step["nodes"]
+
+    # deviation edges resultant vectors, one sum per trail
+    r_vec = np.zeros((xyz.shape[0], nodes.size, 3))
+    incidences = step["incidences"] if indirect else step["incidences_direct"]
+    if incidences.size:
+        node = structure.incidence_node[incidences]
+        other = structure.incidence_other[incidences]
+        edge = structure.incidence_edge[incidences]
+        segments = structure.incidence_trail[incidences]
+
+        vectors = normalize_vectors_numpy(xyz[:, other] - xyz[:, node])
+        contributions = forces[:, edge, None] * vectors
+        np.add.at(r_vec, (slice(None), segments), contributions)
+
+    # node equilibrium for all trails of all parameter sets at once
+    r_vec = residuals[:, nodes] - loads[:, nodes] - r_vec
+
+    # if a node is a support, store its reaction
+    supports = step["supports"]
+    if supports.size:
+        reactions[:, nodes[supports]] = r_vec[:, supports]
+
+    # otherwise, advance its trail to the next node
+    active = step["active"]
+    if not active.size:
+        return
+
+    r_vec = r_vec[:, active]
+    edges = step["edges"]
+    next_nodes = step["next_nodes"]
+    pos = xyz[:, nodes[active]]
+
+    # query trail edge lengths, overriden by the planes of the edges with one
+    length = lengths[:, edges]
+    if step["planes"]:
+        length = trail_lengths_from_planes_numpy(
+            pos,
+            r_vec,
+            structure.plane_origins[edges],
+            structure.plane_normals[edges],
+            length,
+        )
+
+    # store next node positions and residuals
+    xyz[:, next_nodes] = pos + length[..., None] * normalize_vectors_numpy(r_vec)
+    residuals[:, next_nodes] = r_vec
+
+    # trail forces signed by trail lengths
+    trail_force = length_vectors_numpy(r_vec)
+    trail_forces[:, edges] = np.where(length < 0.0, -trail_force, trail_force)
+
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+
+def _batch_parameter(values, default, name):
+    """
+    Give a batch parameter a leading batch dimension, of size one if it lacks it.
+    """
+    if values is None:
+        return default[None]
+
+    values = np.asarray(values, dtype=float)
+    if values.shape == default.shape:
+        return values[None]
+
+    if values.shape[1:] != default.shape:
+        msg = "Expected {} of shape (batch,) + {}, got {}"
+        raise ValueError(msg.format(name, default.shape, values.shape))
+
+    return values
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
@@ -10,12 +10,24 @@ from compas.geometry import scale_vector
 from compas.geometry import subtract_vectors
 
 from compas_cem.diagrams import FormDiagram
+from compas_cem.equilibrium.stats import SolveStats
 
 __all__ = ["static_equilibrium"]
 
+# number of past iterate differences the anderson method mixes
+ANDERSON_DEPTH = 5
+
 
 def static_equilibrium(
-    topology, kmax=None, tmax=100, eta=1e-6, verbose=False, callback=None
+    topology,
+    kmax=None,
+    tmax=100,
+    eta=1e-6,
+    verbose=False,
+    callback=None,
+    initial_state=None,
+    method="fixed_point",
+    stats=False,
 ):
     """
     Generate a form diagram in static equilibrium.
@@ -45,27 +57,99 @@ def static_equilibrium(
     callback : ``function``, optional
         An optional callback function to run at every iteration.
         Defaults to ``None``.
+    initial_state : ``dict``, optional
+        A previous equilibrium state to warm start the calculation from, as
+        returned by :func:`equilibrium_state`. The coordinates of its nodes
+        seed the first iteration, which then considers indirect deviation edges
+        and already counts towards convergence. The origin nodes keep theirs.
+        Defaults to ``None``.
+    method : ``str``, optional
+        The iteration scheme of the form-finding algorithm.
+        The currently available methods are:
+
+        - fixed_point: Sweep over the trails from the last node positions.
+        - anderson: Mix the last few sweeps with Anderson acceleration.
+          It takes fewer iterations on stiff topologies with many indirect
+          deviation edges.
+
+        Defaults to ``"fixed_point"``.
+    stats : ``bool``, optional
+        Flag to time the phases of the calculation.
+        Defaults to ``False``.
 
     Returns
     -------
     form : :class:`compas_cem.diagrams.FormDiagram`
-        A form diagram.
+        A form diagram. Its ``iterations`` and ``residual_history`` attributes
+        report how the form-finding algorithm converged. If ``stats`` is
+        ``True``, its ``stats`` report how long every phase took.
     """
-    attrs = equilibrium_state(topology, kmax, tmax, eta, verbose, callback)
+    if stats:
+        with SolveStats() as solve_stats:
+            form = static_equilibrium(
+                topology, kmax, tmax, eta, verbose, callback, initial_state, method
+            )
+        form.stats = solve_stats
+        return form
+
+    attrs = equilibrium_state(
+        topology, kmax, tmax, eta, verbose, callback, initial_state, method
+    )
+
+    solve_stats = SolveStats.recording()
+    if solve_stats is not None:
+        start = solve_stats.clock()
+
     form = FormDiagram.from_topology_diagram(topology)
     form_update(form, **attrs)
+
+    if solve_stats is not None:
+        solve_stats.lap("form", start)
+
     return form
 
 
 def equilibrium_state(
-    topology, kmax=None, tmax=100, eta=1e-6, verbose=False, callback=None
+    topology,
+    kmax=None,
+    tmax=100,
+    eta=1e-6,
+    verbose=False,
+    callback=None,
+    initial_state=None,
+    method="fixed_point",
+    stats=False,
 ):
     """
     Equilibrate forces at the nodes of a topology diagram.
+
+    If an ``initial_state`` is given, the calculation is warm started from the
+    node coordinates of that previous equilibrium state. Besides the node
+    coordinates and the forces, the equilibrium state reports the number of
+    ``iterations`` run and the ``residual_history`` of the iterations. If
+    ``stats`` is ``True``, it also carries the ``stats`` of the calculation,
+    and the phases of the calculation are timed by any ``SolveStats``
+    recording in the current thread.
     """
+    if stats:
+        with SolveStats() as solve_stats:
+            eq_state = equilibrium_state(
+                topology, kmax, tmax, eta, verbose, callback, initial_state, method
+            )
+        eq_state["stats"] = solve_stats
+        return eq_state
+
     # there must be at least one trail
     assert topology.number_of_trails() > 0, "No trails in the diagram!"
 
+    if method not in ("fixed_point", "anderson"):
+        raise ValueError("Method {} is not supported!".format(method))
+    anderson = method == "anderson"
+
+    solve_stats = SolveStats.recording()
+    if solve_stats is not None:
+        start = solve_stats.clock()
+
     # mapping between trails and sequences
     trails_sequences = topology.trails_sequences()
 
@@ -78,6 +162,13 @@ def equilibrium_state(
     }
     node_xyz = {node: topology.node_coordinates(node) for node in topology.nodes()}
 
+    # seed the nodes with a previous state, except for the origins of the trails
+    warm = initial_state is not None
+    if warm:
+        for node, xyz in initial_state["node_xyz"].items():
+            if node in node_xyz and not topology.is_node_origin(node):
+                node_xyz[node] = list(xyz)
+
     # compute last sequence
     klast = topology.sequence_last()
     if kmax is not None:
@@ -85,6 +176,18 @@ def equilibrium_state(
         if kmax < klast:
             klast = kmax
 
+    # without indirect deviation edges, a single sweep is exact
+    exact = topology.number_of_indirect_deviation_edges() == 0
+
+    # past iterates and their sweeps, for the anderson method
+    nodes = list(node_xyz)
+    xs = []
+    gs = []
+
+    if solve_stats is not None:
+        solve_stats.lap("structure", start)
+
+    residual_history = []
     for t in range(tmax):  # max iterations
         # store last positions for residual
         last_xyz = {k: v for k, v in node_xyz.items()}
@@ -106,9 +209,14 @@ def equilibrium_state(
 
                 # calculate nodal equilibrium to get new residual vector
                 indirect = True
-                if t == 0:
+                if t == 0 and not warm:
                     indirect = False
-                rvec = node_equilibrium(topology, node, rvec, node_xyz, indirect)
+                rvec = node_equilibrium(
+                    topology, node, rvec, node_xyz, indirect, solve_stats
+                )
+
+                if solve_stats is not None:
+                    start = solve_stats.clock()
 
                 # if this is the last node, exit loop
                 if topology.is_node_support(node) or k == kmax:
@@ -131,6 +239,8 @@ def equilibrium_state(
 
                 # override signed length if a plane has been supplied for trail edge
                 if plane:
+                    if solve_stats is not None:
+                        start = solve_stats.lap("node_equilibrium", start, False)
                     # compute length from line plane intersection
                     plength = trail_length_from_plane_intersection(pos, rvec, plane)
                     # The intersection length is None or zero
@@ -149,6 +259,8 @@ def equilibrium_state(
                             )
                         # override signed length
                         length = plength
+                    if solve_stats is not None:
+                        start = solve_stats.lap("plane_intersections", start)
 
                 # store next node position
                 nrvec = normalize_vector(rvec)
@@ -164,26 +276,58 @@ def equilibrium_state(
                 # store residual vector
                 residual_vectors[next_node] = rvec
 
+                if solve_stats is not None:
+                    solve_stats.lap("node_equilibrium", start, False)
+
                 # do callback
                 if callback:
                     callback()
 
-        # if this is the first iteration, move directly to the next one
-        if t == 0:
+        # if the sweep is exact, there is no residual left to measure
+        if exact:
+            distance = 0.0
+            break
+
+        # if this is the first cold iteration, move directly to the next one
+        if t == 0 and not warm:
             continue
 
+        if solve_stats is not None:
+            start = solve_stats.clock()
+
         # calculate residual distance
         distance = 0.0
         for key, pos in node_xyz.items():
             last_pos = last_xyz[key]
             distance += distance_point_point(last_pos, pos)
+        residual_history.append(distance)
 
         # if residual distance smaller than threshold, stop iterating
         if distance < eta:
+            if solve_stats is not None:
+                solve_stats.lap("convergence", start)
             break
 
+        # otherwise, mix the last sweeps into the next positions
+        if anderson:
+            # restart the mixing once it stops reducing the residual
+            if len(residual_history) > 1 and distance > residual_history[-2]:
+                del xs[:], gs[:]
+            xs.append([c for node in nodes for c in last_xyz[node]])
+            gs.append([c for node in nodes for c in node_xyz[node]])
+            x = anderson_step(xs, gs)
+            del xs[: -ANDERSON_DEPTH - 1], gs[: -ANDERSON_DEPTH - 1]
+            for i, node in enumerate(nodes):
+                node_xyz[node] = x[3 * i : 3 * i + 3]
+
+        if solve_stats is not None:
+            solve_stats.lap("convergence", start)
+
+    if solve_stats is not None:
+        solve_stats.converged(t + 1, residual_history)
+
     # if residual distance larger than threshold after tmax iterations, raise error
-    if t > 0:
+    if t > 0 or warm:
         if distance > eta:
             raise ValueError(
                 "Over {} iters. Residual: {} > eta: {}".format(tmax, distance, eta)
@@ -199,36 +343,143 @@ def equilibrium_state(
     eq_state["trail_forces"] = trail_forces
     eq_state["reaction_forces"] = reaction_forces
     eq_state["trail_directions"] = trail_directions
+    eq_state["iterations"] = t + 1
+    eq_state["residual_history"] = residual_history
 
     return eq_state
 
 
-def form_update(form, node_xyz, trail_forces, reaction_forces, **kwargs):
+def form_update(
+    form,
+    node_xyz,
+    trail_forces,
+    reaction_forces,
+    iterations=None,
+    residual_history=None,
+    **kwargs,
+):
     """
     Update the node and edge attributes of a form after equilibrating it.
+
+    The attributes are written straight into the attribute dictionaries of the
+    nodes and the edges, and the edge lengths are measured between the new
+    node coordinates.
     """
+    node = form.node
+    edge = form.edge
+
+    # record how the equilibrium converged, if it was reported
+    if iterations is not None:
+        form.attributes["iterations"] = iterations
+    if residual_history is not None:
+        form.attributes["residual_history"] = [float(r) for r in residual_history]
+
     # assign nodes' coordinates
-    for node, xyz in node_xyz.items():
-        form.node_attributes(key=node, names=["x", "y", "z"], values=xyz)
+    for key, (x, y, z) in node_xyz.items():
+        attr = node[key]
+        attr["x"] = x
+        attr["y"] = y
+        attr["z"] = z
 
     # assign forces on trail edges
-    for edge, tforce in trail_forces.items():
-        form.edge_attribute(key=edge, name="force", value=tforce)
+    for (u, v), tforce in trail_forces.items():
+        edge[u][v]["force"] = tforce
 
     # assign reaction forces
-    for node, rforce in reaction_forces.items():
-        form.node_attributes(key=node, names=["rx", "ry", "rz"], values=rforce)
+    for key, (rx, ry, rz) in reaction_forces.items():
+        attr = node[key]
+        attr["rx"] = rx
+        attr["ry"] = ry
+        attr["rz"] = rz
+
+    # assign signed lengths to all edges
+    force_default = form.default_edge_attributes["force"]
+    for u, nbrs in edge.items():
+        for v, attr in nbrs.items():
+            length = distance_point_point(node_xyz[u], node_xyz[v])
+            attr["length"] = copysign(length, attr.get("force", force_default))
 
-    # assign lengths to deviation edges
-    for edge in form.edges():
-        u, v = edge
-        length = form.edge_length(edge)
-        force = form.edge_attribute(key=edge, name="force")
-        length = copysign(length, force)
-        form.edge_attribute(key=(u, v), name="length", value=length)
+    # the node coordinates moved
+    form._spatial_hash = None
 
 
-def node_equilibrium(form, node, t_vec, node_xyz, indirect=False):
+def anderson_step(xs, gs):
+    """
+    Mix the last iterates of a fixed-point iteration with Anderson acceleration.
+
+    Parameters
+    ----------
+    xs : ``list`` of ``list`` of ``float``
+        The last iterates, oldest first.
+    gs : ``list`` of ``list`` of ``float``
+        The image of every iterate under the fixed-point map.
+
+    Returns
+    -------
+    x : ``list`` of ``float``
+        The next iterate.
+
+    Notes
+    -----
+    The next iterate is the combination of the images whose residuals combine
+    into the smallest residual in a least-squares sense. It falls back to the
+    last image if there is a single iterate or the mixing is degenerate.
+    """
+    if len(xs) < 2:
+        return gs[-1]
+
+    fs = [subtract_vectors(g, x) for x, g in zip(xs, gs)]
+    dfs = [subtract_vectors(f1, f0) for f0, f1 in zip(fs, fs[1:])]
+    dgs = [subtract_vectors(g1, g0) for g0, g1 in zip(gs, gs[1:])]
+
+    # least squares through the normal equations, regularized to stay solvable
+    m = len(dfs)
+    a = [[dot_vectors(dfs[i], dfs[j]) for j in range(m)] for i in range(m)]
+    b = [dot_vectors(df, fs[-1]) for df in dfs]
+    reg = 1e-12 * max(a[i][i] for i in range(m))
+    for i in range(m):
+        a[i][i] += reg
+
+    gamma = _solve_linear_system(a, b)
+    if gamma is None:
+        return gs[-1]
+
+    x = list(gs[-1])
+    for c, dg in zip(gamma, dgs):
+        x = subtract_vectors(x, scale_vector(dg, c))
+
+    return x
+
+
+def _solve_linear_system(a, b):
+    """
+    Solve a small dense linear system with gaussian elimination.
+
+    Returns ``None`` if the system is singular.
+    """
+    n = len(b)
+    rows = [list(row) + [value] for row, value in zip(a, b)]
+
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: fabs(rows[r][col]))
+        if fabs(rows[pivot][col]) < 1e-300:
+            return None
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+
+        for r in range(col + 1, n):
+            factor = rows[r][col] / rows[col][col]
+            for c in range(col, n + 1):
+                rows[r][c] -= factor * rows[col][c]
+
+    x = [0.0] * n
+    for r in reversed(range(n)):
+        value = rows[r][n] - sum(rows[r][c] * x[c] for c in range(r + 1, n))
+        x[r] = value / rows[r][r]
+
+    return x
+
+
+def node_equilibrium(form, node, t_vec, node_xyz, indirect=False, stats=None):
     """
     Calculates the equilibrium of trail and deviation forces at a node.
 
@@ -243,16 +494,18 @@ def node_equilibrium(form, node, t_vec, node_xyz, indirect=False):
     indirect : ``bool``
         Flag to consider indirect deviation edges in the calculation.
         Defaults to ``False``.
-    verbose : ``bool``
-        Flag to print out internal output. Defaults to ``False``.
+    stats : ``SolveStats``, optional
+        The stats to time the deviation resultants and the node equilibrium
+        with. Defaults to ``None``.
 
     Returns
     -------
     t_vec : ``list``
         The new trail vector.
     """
-    tvec_in = scale_vector(t_vec, -1.0)
-    q_vec = form.node_load(node)
+    if stats is not None:
+        start = stats.clock()
+
     rd_vec = direct_deviation_edges_resultant_vector(form, node, node_xyz)
 
     if indirect:
@@ -260,8 +513,16 @@ def node_equilibrium(form, node, t_vec, node_xyz, indirect=False):
     else:
         ri_vec = [0.0, 0.0, 0.0]
 
+    if stats is not None:
+        start = stats.lap("deviation_resultants", start)
+
+    tvec_in = scale_vector(t_vec, -1.0)
+    q_vec = form.node_load(node)
     tvec_out = trail_vector_out(tvec_in, q_vec, rd_vec, ri_vec)
 
+    if stats is not None:
+        stats.lap("node_equilibrium", start)
+
     return tvec_out
 
 
@@ -0,0 +1,648 @@
+"""
+An optional JAX backend for the form-finding algorithm.
+
+Importing this module requires `jax`, `equinox` and `optimistix`, installed with
+`pip install compas_cem[jax]`. Its kernels run on 64-bit floats, so their
+results match those of the numpy backend to the convergence threshold.
+
+Importing it leaves the JAX configuration of the process alone. The functions
+that return numpy data, `static_equilibrium_jax` and `equilibrium_state_jax`,
+enable 64-bit floats for the duration of the call. The functions that return
+JAX arrays, `equilibrium_arrays_jax` and `equilibrium_vjp_jax`, need them
+enabled by the caller, with `jax.config.update("jax_enable_x64", True)` or
+within `with jax.enable_x64(True):`, and raise a `RuntimeError` otherwise.
+"""
+
+from functools import wraps
+
+import numpy as np
+
+try:
+    import equinox.internal as eqxi
+    import jax
+    import jax.numpy as jnp
+    import optimistix as optx
+except ImportError as error:
+    msg = (
+        "The JAX backend needs jax, equinox and optimistix: pip install compas_cem[jax]"
+    )
+    raise ImportError(msg) from error
+
+from compas_cem.diagrams import FormDiagram
+from compas_cem.equilibrium.force_numpy import equilibrium_parameters_numpy
+from compas_cem.equilibrium.state import EquilibriumState
+from compas_cem.equilibrium.structure import EquilibriumStructure
+
+__all__ = [
+    "static_equilibrium_jax",
+    "equilibrium_state_jax",
+    "equilibrium_arrays_jax",
+    "equilibrium_vjp_jax",
+    "structure_arrays_jax",
+]
+
+
+def _x64(func):
+    """
+    Run a function with 64-bit floats enabled in JAX, and only while it runs.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with jax.enable_x64(True):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _check_x64():
+    """
+    Raise if 64-bit floats are not enabled in JAX.
+    """
+    if not jax.config.jax_enable_x64:
+        raise RuntimeError(
+            "The JAX backend needs 64-bit floats. Enable them with "
+            'jax.config.update("jax_enable_x64", True), or call it within '
+            "`with jax.enable_x64(True):`."
+        )
+
+
+# ==============================================================================
+# Equilibrium
+# ==============================================================================
+
+
+@_x64
+def static_equilibrium_jax(topology, tmax=100, eta=1e-6, verbose=False):
+    """
+    Generate a form diagram in static equilibrium using JAX.
+
+    Parameters
+    ----------
+    topology :
+        A topology diagram.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    verbose :
+        Flag to print out internal operations.
+
+    Returns
+    -------
+    form :
+        A form diagram.
+
+    Notes
+    -----
+    Unlike the other backends, this one takes no `callback`. The iterations run
+    inside compiled control flow, where a Python function cannot be called.
+    """
+    eq_state = equilibrium_state_jax(topology, tmax, eta, verbose)
+    return FormDiagram.from_equilibrium_state(eq_state, eq_state.structure, topology)
+
+
+@_x64
+def equilibrium_state_jax(topology, tmax=100, eta=1e-6, verbose=False, structure=None):
+    """
+    Equilibrate forces in a topology diagram using JAX.
+
+    Parameters
+    ----------
+    topology :
+        A topology diagram.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    verbose :
+        Flag to print out internal operations.
+    structure :
+        The equilibrium structure of the topology diagram. If `None`, it is
+        compiled from the topology diagram on every call.
+
+    Returns
+    -------
+    eq_state :
+        The equilibrium state. It reads like a dictionary with the node
+        coordinates, the trail forces, the trail directions and the reaction
+        forces, keyed by node and edge keys.
+    """
+    if structure is None:
+        structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    parameters = equilibrium_parameters_numpy(topology, structure)
+    state = equilibrium_arrays_jax(structure, *parameters, tmax=tmax, eta=eta)
+
+    if verbose:
+        msg = "====== Completed Equilibrium in {} iters. Residual: {}======"
+        print(msg.format(state["iterations"] - 1, state["distance"]))
+
+    state = {name: np.asarray(value) for name, value in state.items()}
+
+    return EquilibriumState.from_arrays(state, structure)
+
+
+def equilibrium_arrays_jax(
+    structure,
+    xyz,
+    lengths,
+    forces,
+    loads,
+    residuals=None,
+    tmax=100,
+    eta=1e-6,
+    implicit=False,
+):
+    """
+    Equilibrate forces on the arrays of a structure with a compiled kernel.
+
+    Parameters
+    ----------
+    structure :
+        An equilibrium structure.
+    xyz :
+        The initial node coordinates. Only the origin nodes keep theirs.
+    lengths :
+        The signed edge lengths. Only the trail edges are read.
+    forces :
+        The signed edge forces. Only the deviation edges are read.
+    loads :
+        The node loads.
+    residuals :
+        The initial residual vectors, which only matter at the origin nodes.
+        If `None`, they are zero.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    implicit :
+        Flag to differentiate the converged equilibrium implicitly instead of
+        through every iteration.
+
+    Returns
+    -------
+    state :
+        A dictionary with the node coordinates `xyz`, the edge forces `forces`,
+        the reaction forces `reactions`, the residual vectors `residuals`, the
+        number of `iterations` run and the last residual `distance`, as JAX
+        arrays.
+
+    Notes
+    -----
+    The kernel is compiled once per array shape and `tmax`, so structures with
+    as many nodes, edges, sequences, trails and deviation incidences as one
+    solved before reuse its compiled code. The function can be traced by
+    `jax.grad` and `jax.vjp`. A convergence error is only raised when it is
+    called on concrete arrays. It needs 64-bit floats enabled in JAX.
+
+    By default, reverse-mode differentiation runs back through every iteration
+    of the solve, so its cost grows with the number of iterations. If
+    `implicit` is `True`, the solve is posed as a fixed point on the node
+    coordinates and differentiated with the implicit function theorem. The
+    backward pass then solves one linear adjoint system at the converged
+    coordinates, whatever the number of iterations it took to get there.
+    """
+    _check_x64()
+    if residuals is None:
+        residuals = np.zeros_like(xyz)
+
+    state = _equilibrium_jit(
+        structure_arrays_jax(structure),
+        xyz,
+        lengths,
+        forces,
+        loads,
+        residuals,
+        eta,
+        tmax=tmax,
+        implicit=implicit,
+    )
+
+    _check_convergence(state, tmax, eta)
+
+    return state
+
+
+def equilibrium_vjp_jax(
+    structure,
+    xyz,
+    lengths,
+    forces,
+    loads,
+    residuals=None,
+    tmax=100,
+    eta=1e-6,
+    implicit=False,
+):
+    """
+    Equilibrate forces on the arrays of a structure and linearize the solve.
+
+    Parameters
+    ----------
+    structure :
+        An equilibrium structure.
+    xyz :
+        The initial node coordinates.
+    lengths :
+        The signed edge lengths.
+    forces :
+        The signed edge forces.
+    loads :
+        The node loads.
+    residuals :
+        The initial residual vectors. If `None`, they are zero.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    implicit :
+        Flag to differentiate the converged equilibrium implicitly instead of
+        through every iteration.
+
+    Returns
+    -------
+    state :
+        The equilibrium state, as returned by `equilibrium_arrays_jax`.
+    vjp :
+        A function that maps a dictionary of cotangents on the `xyz`, `forces`,
+        `reactions` and `residuals` of the state to the cotangents on `xyz`,
+        `lengths`, `forces` and `loads`. Missing entries count as zero.
+
+    Notes
+    -----
+    Rather than holding on to the linearization of the solve, `vjp` solves
+    again and pulls the cotangents back within one compiled call. Compiling
+    the solve and its pullback together is far cheaper than tracing a
+    linearization on every call.
+    """
+    if residuals is None:
+        residuals = np.zeros_like(xyz)
+
+    state = equilibrium_arrays_jax(
+        structure, xyz, lengths, forces, loads, residuals, tmax, eta, implicit
+    )
+    arrays = structure_arrays_jax(structure)
+
+    def vjp(cotangents):
+        _check_x64()
+        cotangents = {
+            name: jnp.asarray(cotangents.get(name, jnp.zeros_like(state[name])))
+            for name in _OUTPUTS
+        }
+        return _equilibrium_vjp_jit(
+            arrays,
+            xyz,
+            lengths,
+            forces,
+            loads,
+            residuals,
+            eta,
+            cotangents,
+            tmax=tmax,
+            implicit=implicit,
+        )
+
+    return state, vjp
+
+
+# ==============================================================================
+# Structure
+# ==============================================================================
+
+
+@_x64
+def structure_arrays_jax(structure):
+    """
+    Pad the index arrays of a structure into the fixed shapes of the kernel.
+
+    Parameters
+    ----------
+    structure :
+        An equilibrium structure.
+
+    Returns
+    -------
+    arrays :
+        A dictionary of JAX arrays with one row per sequence.
+
+    Notes
+    -----
+    Slots without a node gather from node 0 and scatter to one past the last
+    node, where the kernel drops the write. Edges are padded the same way. The
+    deviation incidences of every sequence are padded to the largest count of
+    any sequence, with a zero weight. The result is kept on the structure, so
+    it is computed once per structure and released along with it.
+    """
+    arrays = structure._derived.get("jax")
+    if arrays is not None:
+        return arrays
+
+    num_nodes = structure.number_of_nodes()
+    num_edges = structure.number_of_edges()
+    num_sequences, num_trails = structure.shape
+
+    sequences = structure.sequences
+    valid = sequences >= 0
+    active = structure.active
+    nodes = np.where(valid, sequences, 0)
+    next_nodes = np.roll(sequences, -1, axis=0)
+    edges = np.where(active, structure.trail_edges, 0)
+
+    offsets = structure.incidence_offsets
+    counts = np.diff(offsets)
+    width = max(int(counts.max(initial=0)), 1)
+
+    shape = (num_sequences, width)
+    incidence_node = np.zeros(shape, dtype=int)
+    incidence_other = np.zeros(shape, dtype=int)
+    incidence_edge = np.zeros(shape, dtype=int)
+    incidence_trail = np.full(shape, num_trails, dtype=int)
+    incidence_valid = np.zeros(shape, dtype=bool)
+    incidence_indirect = np.zeros(shape, dtype=bool)
+
+    for k in range(num_sequences):
+        span = slice(offsets[k], offsets[k + 1])
+        count = counts[k]
+        incidence_node[k, :count] = structure.incidence_node[span]
+        incidence_other[k, :count] = structure.incidence_other[span]
+        incidence_edge[k, :count] = structure.incidence_edge[span]
+        incidence_trail[k, :count] = structure.incidence_trail[span]
+        incidence_valid[k, :count] = True
+        incidence_indirect[k, :count] = structure.incidence_indirect[span]
+
+    arrays = {}
+    arrays["nodes"] = nodes
+    arrays["next_nodes"] = np.where(active, next_nodes, num_nodes)
+    arrays["edges"] = edges
+    arrays["edges_out"] = np.where(active, structure.trail_edges, num_edges)
+    arrays["supports"] = np.where(valid & structure.supports[nodes], nodes, num_nodes)
+    arrays["planes"] = active & structure.plane_mask[edges]
+    arrays["plane_origins"] = structure.plane_origins[edges]
+    arrays["plane_normals"] = structure.plane_normals[edges]
+    arrays["incidence_node"] = incidence_node
+    arrays["incidence_other"] = incidence_other
+    arrays["incidence_edge"] = incidence_edge
+    arrays["incidence_trail"] = incidence_trail
+    arrays["incidence_valid"] = incidence_valid
+    arrays["incidence_indirect"] = incidence_indirect
+
+    arrays = {name: jnp.asarray(value) for name, value in arrays.items()}
+    structure._derived["jax"] = arrays
+
+    return arrays
+
+
+# ==============================================================================
+# Kernel
+# ==============================================================================
+
+
+def _equilibrium(
+    arrays, xyz, lengths, forces, loads, residuals, eta, tmax, implicit=False
+):
+    """
+    Run the sweeps of the form-finding algorithm until they converge.
+    """
+    xyz, lengths, forces, loads, residuals = (
+        jnp.asarray(array, dtype=float)
+        for array in (xyz, lengths, forces, loads, residuals)
+    )
+    if implicit:
+        return _equilibrium_implicit(
+            arrays, xyz, lengths, forces, loads, residuals, eta, tmax
+        )
+
+    state = (xyz, residuals, jnp.zeros_like(xyz), forces)
+
+    def condition(loop):
+        t, distance, _ = loop
+        return (t < tmax) & ((t < 2) | (distance >= eta))
+
+    def body(loop):
+        t, _, state = loop
+        # indirect deviation edges are ignored in the first iteration
+        state_next = _sweep(state, lengths, forces, loads, arrays, t > 0)
+        distance = _norm(jnp.ravel(state_next[0] - state[0]))
+        return t + 1, distance, state_next
+
+    loop = (jnp.asarray(0), jnp.asarray(jnp.inf), state)
+    t, distance, state = eqxi.while_loop(
+        condition, body, loop, max_steps=tmax, kind="checkpointed"
+    )
+    xyz, residuals, reactions, forces = state
+
+    state = {}
+    state["xyz"] = xyz
+    state["forces"] = forces
+    state["reactions"] = reactions
+    state["residuals"] = residuals
+    state["iterations"] = t
+    state["distance"] = distance
+
+    return state
+
+
+_equilibrium_jit = jax.jit(_equilibrium, static_argnames=("tmax", "implicit"))
+
+
+def _equilibrium_implicit(arrays, xyz, lengths, forces, loads, residuals, eta, tmax):
+    """
+    Solve for the fixed point of a sweep on the node coordinates.
+
+    Notes
+    -----
+    A sweep never writes the coordinates of the origin nodes. Carried as
+    fixed-point variables, their rows of the adjoint operator would vanish and
+    make it singular, so the map pins them to their input values instead.
+    """
+    origins = arrays["nodes"][0]
+    zeros = jnp.zeros_like(xyz)
+
+    def sweep(coordinates, args):
+        lengths, forces, loads, xyz, residuals = args
+        coordinates = coordinates.at[origins].set(xyz[origins])
+        state = (coordinates, residuals, zeros, forces)
+        return _sweep(state, lengths, forces, loads, arrays, True)
+
+    def fixed_point_map(coordinates, args):
+        return sweep(coordinates, args)[0]
+
+    args = (lengths, forces, loads, xyz, residuals)
+
+    # start where the first iteration of the algorithm, without indirect
+    # deviation edges, lands. the fixed point does not depend on this guess
+    guess = jax.lax.stop_gradient(
+        _sweep((xyz, residuals, zeros, forces), lengths, forces, loads, arrays, False)
+    )
+
+    solver = optx.FixedPointIteration(rtol=0.0, atol=eta, norm=optx.two_norm)
+    solution = optx.fixed_point(
+        fixed_point_map, solver, guess[0], args, max_steps=tmax, throw=False
+    )
+
+    xyz, residuals, reactions, forces = sweep(solution.value, args)
+
+    state = {}
+    state["xyz"] = xyz
+    state["forces"] = forces
+    state["reactions"] = reactions
+    state["residuals"] = residuals
+    state["iterations"] = solution.stats["num_steps"] + 2
+    state["distance"] = _norm(jnp.ravel(xyz - solution.value))
+
+    return state
+
+
+_OUTPUTS = ("xyz", "forces", "reactions", "residuals")
+
+
+def _equilibrium_vjp(
+    arrays, xyz, lengths, forces, loads, residuals, eta, cotangents, tmax, implicit
+):
+    """
+    Pull cotangents on a solve back to its inputs, forward and backward in one.
+    """
+
+    def solve(xyz, lengths, forces, loads):
+        state = _equilibrium(
+            arrays, xyz, lengths, forces, loads, residuals, eta, tmax, implicit
+        )
+        return {name: state[name] for name in _OUTPUTS}
+
+    _, pullback = jax.vjp(solve, xyz, lengths, forces, loads)
+
+    return pullback(cotangents)
+
+
+_equilibrium_vjp_jit = jax.jit(_equilibrium_vjp, static_argnames=("tmax", "implicit"))
+
+
+def _sweep(state, lengths, forces, loads, arrays, indirect):
+    """
+    Sweep once over all the sequences, one scan step per sequence.
+    """
+    names = (
+        "nodes",
+        "next_nodes",
+        "edges",
+        "edges_out",
+        "supports",
+        "planes",
+        "plane_origins",
+        "plane_normals",
+        "incidence_node",
+        "incidence_other",
+        "incidence_edge",
+        "incidence_trail",
+        "incidence_valid",
+        "incidence_indirect",
+    )
+    rows = {name: arrays[name] for name in names}
+    num_trails = arrays["nodes"].shape[1]
+
+    def step(state, row):
+        xyz, residuals, reactions, trail_forces = state
+        nodes = row["nodes"]
+
+        # deviation edges resultant vectors, one segment sum per trail
+        weight = row["incidence_valid"] & (indirect | ~row["incidence_indirect"])
+        vectors = _normalize(xyz[row["incidence_other"]] - xyz[row["incidence_node"]])
+        force = jnp.where(weight, forces[row["incidence_edge"]], 0.0)
+        r_vec = jax.ops.segment_sum(
+            force[:, None] * vectors, row["incidence_trail"], num_segments=num_trails
+        )
+
+        # node equilibrium for all trails at once
+        r_vec = residuals[nodes] - loads[nodes] - r_vec
+
+        # if a node is a support, store its reaction
+        reactions = reactions.at[row["supports"]].set(r_vec, mode="drop")
+
+        # query trail edge lengths, overriden by the planes of the edges with one
+        pos = xyz[nodes]
+        length = lengths[row["edges"]]
+        length = _plane_lengths(
+            pos,
+            r_vec,
+            row["plane_origins"],
+            row["plane_normals"],
+            row["planes"],
+            length,
+        )
+
+        # store next node positions and residuals, where a trail advances
+        next_nodes = row["next_nodes"]
+        xyz = xyz.at[next_nodes].set(
+            pos + length[:, None] * _normalize(r_vec), mode="drop"
+        )
+        residuals = residuals.at[next_nodes].set(r_vec, mode="drop")
+
+        # trail forces signed by trail lengths
+        trail_force = _norm(r_vec)
+        trail_force = jnp.where(length < 0.0, -trail_force, trail_force)
+        trail_forces = trail_forces.at[row["edges_out"]].set(trail_force, mode="drop")
+
+        return (xyz, residuals, reactions, trail_forces), None
+
+    state, _ = jax.lax.scan(step, state, rows)
+
+    return state
+
+
+def _plane_lengths(points, vectors, origins, normals, planes, lengths, tol=1e-6):
+    """
+    Override trail lengths with the distances to the planes of their edges.
+    """
+    cos_nv = jnp.sum(normals * _normalize(vectors), axis=-1)
+    parallel = jnp.abs(cos_nv) < tol
+
+    cos_noa = jnp.sum(normals * (origins - points), axis=-1)
+    plengths = cos_noa / jnp.where(parallel, 1.0, cos_nv)
+
+    valid = planes & ~parallel & (plengths != 0.0)
+
+    return jnp.where(valid, plengths, lengths)
+
+
+def _norm(vectors):
+    """
+    The norm along the last axis, with a zero derivative at zero vectors.
+    """
+    squared = jnp.sum(jnp.square(vectors), axis=-1)
+    nonzero = squared > 0.0
+
+    return jnp.where(nonzero, jnp.sqrt(jnp.where(nonzero, squared, 1.0)), 0.0)
+
+
+def _normalize(vectors):
+    """
+    Normalize every row vector, leaving zero vectors untouched.
+    """
+    lengths = _norm(vectors)
+
+    return vectors / jnp.where(lengths > 0.0, lengths, 1.0)[..., None]
+
+
+def _check_convergence(state, tmax, eta):
+    """
+    Raise the error of the other backends if a concrete solve did not converge.
+    """
+    distance = state["distance"]
+    if isinstance(distance, jax.core.Tracer):
+        return
+
+    distance = float(distance)
+    if int(state["iterations"]) > 1 and distance > eta:
+        raise ValueError(
+            "Over {} iters. Residual: {} > eta: {}".format(tmax, distance, eta)
+        )
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
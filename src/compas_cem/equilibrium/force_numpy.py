@@ -1,12 +1,32 @@
 import autograd.numpy as np
+import numpy as onp
+from autograd import make_vjp
+from autograd.extend import defvjp
+from autograd.extend import defvjp_argnums
+from autograd.extend import primitive
+from autograd.tracer import getval
+from autograd.tracer import isbox
 
 from compas_cem.diagrams import FormDiagram
+from compas_cem.equilibrium.state import EquilibriumState
+from compas_cem.equilibrium.stats import SolveStats
+from compas_cem.equilibrium.structure import EquilibriumStructure
 
-__all__ = ["static_equilibrium_numpy"]
+__all__ = ["static_equilibrium_numpy", "iter_equilibrium"]
+
+# number of past iterate differences the Anderson method mixes
+ANDERSON_DEPTH = 5
 
 
 def static_equilibrium_numpy(
-    topology, tmax=100, eta=1e-6, verbose=False, callback=None
+    topology,
+    tmax=100,
+    eta=1e-6,
+    verbose=False,
+    callback=None,
+    initial_state=None,
+    method="fixed_point",
+    stats=False,
 ):
     """
     Generate a form diagram in static equilibrium using numpy.
@@ -31,184 +51,454 @@ def static_equilibrium_numpy(
     callback : ``function``, optional
         An optional callback function to run at every iteration.
         Defaults to ``None``.
+    initial_state : ``dict``, optional
+        A previous equilibrium state to warm start the calculation from.
+        Defaults to ``None``.
+    method : ``str``, optional
+        The iteration scheme of the form-finding algorithm, either
+        ``"fixed_point"`` or ``"anderson"`` for Anderson acceleration.
+        Defaults to ``"fixed_point"``.
+    stats : ``bool``, optional
+        Flag to time the phases of the calculation.
+        Defaults to ``False``.
 
     Returns
     -------
     form : :class:`compas_cem.diagrams.FormDiagram`
-        A form diagram.
+        A form diagram. Its ``iterations`` and ``residual_history`` attributes
+        report how the form-finding algorithm converged. If ``stats`` is
+        ``True``, its ``stats`` report how long every phase took.
     """
-    attrs = equilibrium_state_numpy(topology, tmax, eta, verbose, callback)
-    form = FormDiagram.from_topology_diagram(topology)
-    form_update(form, **attrs)
+    if stats:
+        with SolveStats() as solve_stats:
+            form = static_equilibrium_numpy(
+                topology, tmax, eta, verbose, callback, initial_state, method
+            )
+        form.stats = solve_stats
+        return form
+
+    eq_state = equilibrium_state_numpy(
+        topology,
+        tmax,
+        eta,
+        verbose,
+        callback,
+        initial_state=initial_state,
+        method=method,
+    )
+
+    solve_stats = SolveStats.recording()
+    if solve_stats is not None:
+        start = solve_stats.clock()
+
+    form = FormDiagram.from_equilibrium_state(eq_state, eq_state.structure, topology)
+
+    if solve_stats is not None:
+        solve_stats.lap("form", start)
+
     return form
 
 
-def equilibrium_state_numpy(topology, tmax=100, eta=1e-6, verbose=False, callback=None):
+def equilibrium_state_numpy(
+    topology,
+    tmax=100,
+    eta=1e-6,
+    verbose=False,
+    callback=None,
+    structure=None,
+    initial_state=None,
+    method="fixed_point",
+    stats=False,
+):
     """
     Equilibrate forces in a topology diagram using numpy.
-    """
-    # there must be at least one trail
-    assert topology.number_of_trails() > 0, "No trails in the diagram!"
-
-    # mapping between trails and sequences, immutable
-    trails_sequences = topology.trails_sequences()
-
-    # input, output
-    node_xyz = {n: np.array(topology.node_coordinates(n)) for n in topology.nodes()}
-
-    # output, mutable
-    edge_forces = {e: np.array(topology.edge_force(e)) for e in topology.edges()}
-    edge_lengths = {e: np.array(topology.edge_length_2(e)) for e in topology.edges()}
-
-    # input, immutable
-    # numpy
-    node_loads = {n: np.array(topology.node_load(n)) for n in topology.nodes()}
-    # no numpy
-    node_direct = {
-        n: topology._connected_direct_deviation_edges(n) for n in topology.nodes()
-    }
-    node_indirect = {
-        n: topology._connected_indirect_deviation_edges(n) for n in topology.nodes()
-    }
-    edge_keys = {e for e in topology.edges()}
-
-    # edge planes
-    edge_planes = {}
-    for edge in topology.trail_edges():
-        plane = topology.edge_plane(edge)
-        if not plane:
-            continue
-        plane = [np.array(vector) for vector in plane]
-        edge_planes[edge] = plane
 
-    # internals
-    residual_vectors = {
-        node: np.array(topology.reaction_force(node)) for node in topology.nodes()
-    }
+    Parameters
+    ----------
+    topology :
+        A topology diagram.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    verbose :
+        Flag to print out internal operations.
+    callback :
+        An optional callback function to run at every iteration.
+    structure :
+        The equilibrium structure of the topology diagram. If `None`, it is
+        compiled from the topology diagram on every call.
+    initial_state :
+        A previous equilibrium state to warm start the calculation from, either
+        as returned by this function or by `equilibrium_arrays_numpy`. If
+        `None`, the calculation starts from the topology diagram.
+    method :
+        The iteration scheme, either `"fixed_point"` or `"anderson"`.
+    stats :
+        Flag to time the phases of the calculation.
 
-    # output
-    reaction_forces = {}
-    trail_forces = {}
-    trail_directions = {}
+    Returns
+    -------
+    eq_state :
+        The equilibrium state, with the number of `iterations` run and the
+        `residual_history`. It reads like a dictionary with the node
+        coordinates, the trail forces, the trail directions and the reaction
+        forces, keyed by node and edge keys. If `stats` is `True`, its `stats`,
+        also read as `eq_state["stats"]`, report how long every phase took.
+
+    Notes
+    -----
+    Compile the structure once with `EquilibriumStructure.from_topology_diagram`
+    and pass it in to skip that setup when the same topology is solved many times.
+    """
+    if stats:
+        with SolveStats() as solve_stats:
+            eq_state = equilibrium_state_numpy(
+                topology,
+                tmax,
+                eta,
+                verbose,
+                callback,
+                structure,
+                initial_state,
+                method,
+            )
+        eq_state.stats = solve_stats
+        return eq_state
+
+    solve_stats = SolveStats.recording()
+    if solve_stats is not None:
+        start = solve_stats.clock()
+
+    if structure is None:
+        structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    xyz, lengths, forces, loads, residuals = equilibrium_parameters_numpy(
+        topology, structure
+    )
+
+    warm = initial_state is not None
+    if warm:
+        xyz, residuals = warm_start_numpy(structure, xyz, residuals, initial_state)
+
+    if solve_stats is not None:
+        solve_stats.lap("structure", start)
+
+    state = equilibrium_arrays_numpy(
+        structure,
+        xyz,
+        lengths,
+        forces,
+        loads,
+        residuals,
+        tmax,
+        eta,
+        verbose,
+        callback,
+        warm=warm,
+        method=method,
+    )
+
+    return EquilibriumState.from_arrays(state, structure)
+
+
+def iter_equilibrium(
+    topology,
+    tmax=100,
+    eta=1e-6,
+    structure=None,
+    initial_state=None,
+    method="fixed_point",
+):
+    """
+    Equilibrate forces in a topology diagram, one iteration at a time.
 
-    for t in range(tmax):  # max iterations
-        # store last positions for residual
-        last_positions = {k: v for k, v in node_xyz.items()}
+    Parameters
+    ----------
+    topology :
+        A topology diagram.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    structure :
+        The equilibrium structure of the topology diagram. If `None`, it is
+        compiled from the topology diagram.
+    initial_state :
+        A previous equilibrium state to warm start the calculation from.
+        If `None`, the calculation starts from the topology diagram.
+    method :
+        The iteration scheme, either `"fixed_point"` or `"anderson"`.
+
+    Yields
+    ------
+    eq_state :
+        The equilibrium state after every iteration. Its `iterations` count the
+        iterations run so far and its `distance` is the residual of the last
+        one, which is `None` for the first iteration of a cold start.
+
+    Notes
+    -----
+    Every state shares the arrays the iteration produced, without copying
+    them, and is not touched by later iterations. Stop consuming the generator
+    to stop the calculation early. If the calculation runs for `tmax`
+    iterations without converging, a `ValueError` is raised after the last
+    state.
+
+    A structure without indirect deviation edges is solved exactly by a single
+    iteration, which yields one state.
+    """
+    if method not in ("fixed_point", "anderson"):
+        raise ValueError("Method {} is not supported!".format(method))
+
+    if structure is None:
+        structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    xyz, lengths, forces, loads, residuals = equilibrium_parameters_numpy(
+        topology, structure
+    )
+
+    warm = initial_state is not None
+    if warm:
+        xyz, residuals = warm_start_numpy(structure, xyz, residuals, initial_state)
+
+    plan = sequence_plan(structure)
+    params = (xyz, lengths, forces, loads, residuals)
+
+    if structure.number_of_indirect_deviation_edges() == 0:
+        state, _, _ = _equilibrium_exact_numpy(structure, plan, *params, None)
+        iterates = [(0, xyz, state, None)]
+    else:
+        anderson = method == "anderson"
+        iterates = _iterate_numpy(
+            structure, plan, params, tmax, eta, warm=warm, anderson=anderson
+        )
 
-        for k in range(topology.number_of_sequences()):  # sequences
-            for key, trail in topology.trails(keys=True):
-                # if index is larger than available nodes in trail, skip trail
-                if k not in trails_sequences[key]:
-                    continue
+    distance = None
+    for t, _, state, distance in iterates:
+        xyz, residuals, reactions, forces = state
+        yield EquilibriumState(
+            structure,
+            xyz,
+            forces,
+            reactions,
+            residuals,
+            iterations=t + 1,
+            distance=distance,
+        )
 
-                # select node from trail at current sequence
-                node = trails_sequences[key][k]
+    # if residual distance larger than threshold after tmax iterations, raise error
+    if distance is not None and distance > eta:
+        raise ValueError(
+            "Over {} iters. Residual: {} > eta: {}".format(tmax, distance, eta)
+        )
 
-                # get node position
-                pos = node_xyz[node]
 
-                # get incoming residual vector
-                rvec = residual_vectors[node]
+def equilibrium_parameters_numpy(topology, structure):
+    """
+    Read the parameters of a topology diagram into arrays ordered by a structure.
 
-                # node load
-                q_vec = node_loads[node]
+    Parameters
+    ----------
+    topology :
+        A topology diagram.
+    structure :
+        The equilibrium structure of the topology diagram.
 
-                # direct deviation edges vector
-                dir_edges = node_direct[node]
-                rd_vec = deviation_edges_resultant_vector(
-                    node, node_xyz, dir_edges, edge_forces
-                )
+    Returns
+    -------
+    xyz :
+        The node coordinates.
+    lengths :
+        The signed edge lengths.
+    forces :
+        The signed edge forces.
+    loads :
+        The node loads.
+    residuals :
+        The initial residual vectors, which only matter at the origin nodes.
+    """
+    nodes = structure.nodes.tolist()
+    edges = [tuple(edge) for edge in structure.edges.tolist()]
 
-                # indirect deviation edges vector
-                ri_vec = np.zeros(3)
-                if t > 0:
-                    indir_edges = node_indirect[node]
-                    ri_vec = deviation_edges_resultant_vector(
-                        node, node_xyz, indir_edges, edge_forces
-                    )
+    xyz = np.array([topology.node_coordinates(node) for node in nodes], dtype=float)
+    lengths = np.array([topology.edge_length_2(edge) for edge in edges], dtype=float)
+    forces = np.array([topology.edge_force(edge) for edge in edges], dtype=float)
+    loads = np.array([topology.node_load(node) for node in nodes], dtype=float)
+    residuals = np.array([topology.reaction_force(node) for node in nodes], dtype=float)
 
-                # node equilibrium, bottleneck 60%
-                rvec = node_equilibrium(rvec, q_vec, rd_vec, ri_vec)
+    return xyz, lengths, forces, loads, residuals
 
-                # if this is the last node, store and exit
-                if topology.is_node_support(node):
-                    reaction_forces[node] = rvec
-                    continue
 
-                # otherwise, pick next node in the trail
-                next_node = trails_sequences[key][k + 1]
+def warm_start_numpy(structure, xyz, residuals, initial_state):
+    """
+    Seed the node coordinates and residual vectors from a previous state.
 
-                # correct edge key
-                edge = (node, next_node)
-                if edge not in edge_keys:
-                    edge = (next_node, node)
+    Parameters
+    ----------
+    structure :
+        An equilibrium structure.
+    xyz :
+        The node coordinates read from a topology diagram.
+    residuals :
+        The residual vectors read from a topology diagram.
+    initial_state :
+        A previous equilibrium state, either as arrays with `xyz` and
+        optionally `residuals` ordered by the structure, or as a dictionary with
+        `node_xyz` keyed by node keys.
+
+    Returns
+    -------
+    xyz :
+        The seeded node coordinates.
+    residuals :
+        The seeded residual vectors.
+
+    Notes
+    -----
+    The origin nodes keep their coordinates and residual vectors, since those
+    are inputs to the algorithm and not a guess. Nodes missing from a
+    dictionary state keep theirs too.
+    """
+    seed = structure.node_sequence > 0
+
+    if "xyz" in initial_state:
+        xyz_0 = onp.asarray(initial_state["xyz"], dtype=float)
+        residuals_0 = initial_state.get("residuals")
+    else:
+        node_xyz = initial_state["node_xyz"]
+        nodes = structure.nodes.tolist()
+        seed = seed & onp.array([node in node_xyz for node in nodes], dtype=bool)
+        xyz_0 = onp.array(
+            [node_xyz.get(node, [0.0, 0.0, 0.0]) for node in nodes], dtype=float
+        )
+        residuals_0 = None
 
-                # query trail edge's length
-                length = edge_lengths[edge]
+    if xyz_0.shape != onp.shape(xyz):
+        msg = "Expected an initial state with {} nodes, got {}"
+        raise ValueError(msg.format(structure.number_of_nodes(), len(xyz_0)))
 
-                # query trail edge plane, if any
-                plane = edge_planes.get(edge)
+    xyz = np.where(seed[:, None], xyz_0, xyz)
+    if residuals_0 is not None:
+        residuals_0 = onp.asarray(residuals_0, dtype=float)
+        residuals = np.where(seed[:, None], residuals_0, residuals)
 
-                # override length if a plane exists
-                if plane:
-                    # get length from line plane intersection
-                    plength = trail_length_from_plane_intersection_numpy(
-                        pos, rvec, plane
-                    )
+    return xyz, residuals
 
-                    # check that returned length is not null
-                    if plength:
-                        length = plength
 
-                # compute trail force
-                trail_force = length_vector_numpy(rvec)  # always positive
+# ------------------------------------------------------------------------------
+# Vectorized kernel
+# ------------------------------------------------------------------------------
 
-                # compute trail direction by normalizing residual vector
-                # NOTE: to avoid NaNs, do not normalize residual vector if it is zero length
-                nrvec = rvec / trail_force
-                if np.isnan(length_vector_numpy(nrvec)):
-                    nrvec = rvec
 
-                # store trail direction
-                trail_directions[edge] = nrvec
+def equilibrium_arrays_numpy(
+    structure,
+    xyz,
+    lengths,
+    forces,
+    loads,
+    residuals=None,
+    tmax=100,
+    eta=1e-6,
+    verbose=False,
+    callback=None,
+    warm=False,
+    method="fixed_point",
+):
+    """
+    Equilibrate forces on the arrays of a structure, all trails at a time.
 
-                # store next node position
-                next_pos = pos + length * nrvec
-                node_xyz[next_node] = next_pos
+    Parameters
+    ----------
+    structure :
+        An equilibrium structure.
+    xyz :
+        The initial node coordinates. Only the origin nodes keep theirs.
+    lengths :
+        The signed edge lengths. Only the trail edges are read.
+    forces :
+        The signed edge forces. Only the deviation edges are read.
+    loads :
+        The node loads.
+    residuals :
+        The initial residual vectors, which only matter at the origin nodes.
+        If `None`, they are zero.
+    tmax :
+        Maximum number of iterations the algorithm will run for.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    verbose :
+        Flag to print out internal operations.
+    callback :
+        An optional callback function to run at every iteration.
+    warm :
+        Flag that marks the node coordinates as a guess close to equilibrium,
+        such as a previous state seeded by `warm_start_numpy`. The first
+        iteration then considers indirect deviation edges and already counts
+        towards convergence.
+    method :
+        The iteration scheme of the outer loop. `"fixed_point"` sweeps from the
+        last node coordinates, `"anderson"` mixes the last few sweeps with
+        Anderson acceleration, which needs fewer iterations on stiff topologies
+        with many indirect deviation edges.
 
-                # correct trail force sign based on trail signed length
-                # NOTE: autograd.np does not support derivatives of copysign
-                if trail_force * length < 0.0:
-                    trail_force = trail_force * -1.0
+    Returns
+    -------
+    state :
+        A dictionary with the node coordinates `xyz`, the edge forces `forces`,
+        the reaction forces `reactions`, the residual vectors `residuals`, the
+        number of `iterations` run, the last residual `distance` and the
+        `residual_history` of every iteration that measured one.
+
+    Notes
+    -----
+    The arrays follow the node and edge order of the structure. The trail
+    entries of the output forces are computed; its deviation entries are the
+    input forces. The kernel is written with `autograd.numpy` and carries no
+    in-place updates, so it can be differentiated. A warm start and the
+    Anderson method are differentiated implicitly at the fixed point, so their
+    gradient matches the one of a cold fixed-point iteration however few
+    iterations they take. A structure without indirect deviation edges is
+    solved exactly by a single sweep, whatever the method, with an empty
+    residual history.
+
+    The phases of the calculation are timed by the `SolveStats` recording in
+    the current thread, if any.
+    """
+    if method not in ("fixed_point", "anderson"):
+        raise ValueError("Method {} is not supported!".format(method))
 
-                # store trail force
-                trail_forces[edge] = trail_force
+    solve_stats = SolveStats.recording()
+    if solve_stats is not None:
+        start = solve_stats.clock()
 
-                # store residual
-                residual_vectors[next_node] = rvec
+    num_nodes = structure.number_of_nodes()
+    if residuals is None:
+        residuals = np.zeros((num_nodes, 3))
 
-                # do callback
-                if callback:
-                    callback()
+    plan = sequence_plan(structure)
+    if solve_stats is not None:
+        solve_stats.lap("structure", start, count=False)
 
-        # if this is the first iteration, move directly to the next one
-        if t == 0:
-            continue
+    arrays = (xyz, lengths, forces, loads, residuals)
 
-        # TODO: simplify by iterating only over values?
-        pos_array = np.array([pos for key, pos in node_xyz.items()])
-        last_pos_array = np.array(
-            [last_positions[key] for key, pos in node_xyz.items()]
+    if structure.number_of_indirect_deviation_edges() == 0:
+        state, t, history = _equilibrium_exact_numpy(structure, plan, *arrays, callback)
+    elif warm or method == "anderson":
+        state, t, history = _equilibrium_implicit_numpy(
+            structure, plan, *arrays, tmax, eta, callback, warm, method == "anderson"
         )
+    else:
+        state, t, history = _equilibrium_unrolled_numpy(
+            structure, plan, *arrays, tmax, eta, callback
+        )
+    distance = history[-1] if history else None
 
-        # calculate residual distance
-        distance = np.sqrt(np.sum(np.square(last_pos_array - pos_array)))
-        # if residual distance smaller than threshold, stop iterating
-        if distance < eta:
-            break
+    if solve_stats is not None:
+        solve_stats.converged(t + 1, history)
 
     # if residual distance larger than threshold after tmax iterations, raise error
-    if t > 0:
+    if distance is not None:
         if distance > eta:
             raise ValueError(
                 "Over {} iters. Residual: {} > eta: {}".format(tmax, distance, eta)
@@ -219,163 +509,589 @@ def equilibrium_state_numpy(topology, tmax=100, eta=1e-6, verbose=False, callbac
         msg = "====== Completed Equilibrium in {} iters. Residual: {}======"
         print(msg.format(t, distance))
 
-    eq_state = {}
-    eq_state["node_xyz"] = node_xyz
-    eq_state["trail_forces"] = trail_forces
-    eq_state["trail_directions"] = trail_directions
-    eq_state["reaction_forces"] = reaction_forces
+    xyz, residuals, reactions, forces = state
 
-    # return node_xyz, trail_forces, reaction_forces
-    return eq_state
+    state = {}
+    state["xyz"] = xyz
+    state["forces"] = forces
+    state["reactions"] = reactions
+    state["residuals"] = residuals
+    state["iterations"] = t + 1
+    state["distance"] = distance
+    state["residual_history"] = history
 
+    return state
 
-def form_update(form, node_xyz, trail_forces, reaction_forces, **kwargs):
+
+def _equilibrium_exact_numpy(
+    structure, plan, xyz, lengths, forces, loads, residuals, callback
+):
     """
-    Update the node and edge attributes of a form after equilibrating it.
+    Sweep once, which is exact when there are no indirect deviation edges.
+
+    Every deviation edge then connects two nodes of the same sequence, whose
+    positions are final by the time the sweep reaches them. A second sweep
+    would only measure a zero residual.
     """
-    # assign nodes' coordinates
-    for node, xyz in node_xyz.items():
-        form.node_attributes(key=node, names=["x", "y", "z"], values=xyz)
+    state = (xyz, residuals, np.zeros_like(residuals), forces)
+    state = equilibrium_sweep_numpy(
+        state, lengths, forces, loads, structure, plan, indirect=False
+    )
+
+    # do callback
+    if callback:
+        callback()
+
+    return state, 0, []
 
-    # assign forces on trail edges
-    for edge, tforce in trail_forces.items():
-        form.edge_attribute(key=edge, name="force", value=tforce)
 
-    # assign reaction forces
-    for node, rforce in reaction_forces.items():
-        rforce = reaction_forces[node]
-        form.node_attributes(key=node, names=["rx", "ry", "rz"], values=rforce)
+def _equilibrium_unrolled_numpy(
+    structure, plan, xyz, lengths, forces, loads, residuals, tmax, eta, callback
+):
+    """
+    Iterate from the coordinates of a topology diagram, unrolling every sweep.
+    """
+    state = (xyz, residuals, np.zeros_like(residuals), forces)
+    solve_stats = SolveStats.recording()
 
-    # assign lengths to deviation edges
-    for edge in form.edges():
-        u, v = edge
-        length = length_vector_numpy(node_xyz[u] - node_xyz[v])
-        force = form.edge_attribute(key=edge, name="force")
-        length = np.copysign(length, force)
-        form.edge_attribute(key=(u, v), name="length", value=length)
+    history = []
+    for t in range(tmax):  # max iterations
+        # store last positions for residual
+        last_xyz = state[0]
+
+        # indirect deviation edges are ignored in the first iteration
+        state = equilibrium_sweep_numpy(
+            state, lengths, forces, loads, structure, plan, indirect=t > 0
+        )
 
+        # do callback
+        if callback:
+            callback()
 
-def node_equilibrium(t_vec, q_vec, rd_vec, ri_vec):
+        # if this is the first iteration, move directly to the next one
+        if t == 0:
+            continue
+
+        if solve_stats is not None:
+            start = solve_stats.clock()
+
+        # calculate residual distance
+        distance = np.sqrt(np.sum(np.square(last_xyz - state[0])))
+        history.append(getval(distance))
+
+        if solve_stats is not None:
+            solve_stats.lap("convergence", start)
+
+        # if residual distance smaller than threshold, stop iterating
+        if distance < eta:
+            break
+
+    return state, t, history
+
+
+def _equilibrium_implicit_numpy(
+    structure,
+    plan,
+    xyz,
+    lengths,
+    forces,
+    loads,
+    residuals,
+    tmax,
+    eta,
+    callback,
+    warm=False,
+    anderson=False,
+):
+    """
+    Iterate on plain arrays, differentiating the fixed point implicitly.
+
+    Unrolling the sweeps of a warm start would differentiate a handful of steps
+    away from a constant guess, and Anderson mixing cannot be traced at all.
+    Both miss how the fixed point moves with the parameters, so a last sweep is
+    traced from the fixed point instead, and `fixed_point_numpy` carries the
+    implicit derivative of the fixed point.
+    """
+    params = tuple(getval(array) for array in (xyz, lengths, forces, loads, residuals))
+
+    # a cold start ignores the indirect deviation edges in its first iteration
+    start = 0 if warm else 1
+
+    state = None
+    history = []
+    t = start - 1
+    last_xyz = params[0]
+    iterates = _iterate_numpy(
+        structure, plan, params, tmax, eta, callback, warm, anderson
+    )
+    for t, last_xyz, state, distance in iterates:
+        if distance is not None:
+            history.append(distance)
+
+    arrays = (xyz, lengths, forces, loads, residuals)
+    if t < start or not any(isbox(array) for array in arrays):
+        return state, max(t, 0), history
+
+    # trace the last sweep again, from a fixed point that knows its derivative
+    x = fixed_point_numpy(
+        last_xyz, *arrays, structure=structure, plan=plan, tmax=tmax, eta=eta
+    )
+    state = _sweep_fixed_point(x, arrays, structure, plan)
+
+    return state, t, history
+
+
+def _iterate_numpy(
+    structure, plan, params, tmax, eta, callback=None, warm=False, anderson=False
+):
     """
-    Calculates the equilibrium of trail and deviation forces at a node.
+    Sweep plain arrays until the node coordinates settle, one sweep at a time.
+
+    Yields the index of every iteration, the node coordinates it started from,
+    the state tuple it reached and its residual distance. The residual of the
+    first iteration of a cold start is `None`, since it ignores the indirect
+    deviation edges and is not compared to anything.
+    """
+    x = params[0]
+    solve_stats = SolveStats.recording()
+
+    start = 0
+    if not warm:
+        start = 1
+        xyz_0, lengths_0, forces_0, loads_0, residuals_0 = params
+        state = (xyz_0, residuals_0, onp.zeros_like(residuals_0), forces_0)
+        state = equilibrium_sweep_numpy(
+            state, lengths_0, forces_0, loads_0, structure, plan, indirect=False
+        )
+        if callback:
+            callback()
+        yield 0, x, state, None
+        x = state[0]
+
+    xs = []
+    gs = []
+    distance_last = None
+    for t in range(start, tmax):  # max iterations
+        last_xyz = x
+        state = _sweep_fixed_point(x, params, structure, plan)
+
+        # do callback
+        if callback:
+            callback()
+
+        if solve_stats is not None:
+            clock = solve_stats.clock()
+
+        # calculate residual distance
+        distance = onp.sqrt(onp.sum(onp.square(last_xyz - state[0])))
+
+        if solve_stats is not None:
+            solve_stats.lap("convergence", clock)
+
+        yield t, last_xyz, state, distance
+
+        # if residual distance smaller than threshold, stop iterating
+        if distance < eta:
+            return
+
+        if solve_stats is not None:
+            clock = solve_stats.clock()
+
+        # otherwise, pick the next iterate
+        x = state[0]
+        if anderson:
+            # restart the mixing once it stops reducing the residual
+            if distance_last is not None and distance > distance_last:
+                del xs[:], gs[:]
+            xs.append(last_xyz)
+            gs.append(x)
+            x = anderson_step_numpy(xs, gs)
+            del xs[: -ANDERSON_DEPTH - 1], gs[: -ANDERSON_DEPTH - 1]
+        distance_last = distance
+
+        if solve_stats is not None:
+            solve_stats.lap("convergence", clock, count=False)
+
+
+def anderson_step_numpy(xs, gs):
+    """
+    Mix the last iterates of a fixed-point iteration with Anderson acceleration.
 
     Parameters
     ----------
-    t_vec : ``list``
-        A trail vector.
-    indirect : ``bool``
-        Flag to consider indirect deviation edges in the calculation.
-        Defaults to ``False``.
+    xs :
+        The last iterates, oldest first.
+    gs :
+        The image of every iterate under the fixed-point map.
 
     Returns
     -------
-    t_vec : ``list``
-        The new trail vector.
+    x :
+        The next iterate.
+
+    Notes
+    -----
+    The next iterate is the combination of the images whose residuals combine
+    into the smallest residual in a least-squares sense. It falls back to the
+    last image if there is a single iterate or the mixing is not finite.
+    """
+    if len(xs) < 2:
+        return gs[-1]
+
+    shape = onp.shape(gs[-1])
+    xs = onp.reshape(xs, (len(xs), -1))
+    gs = onp.reshape(gs, (len(gs), -1))
+    fs = gs - xs
+
+    df = onp.diff(fs, axis=0).T
+    dg = onp.diff(gs, axis=0).T
+    gamma = onp.linalg.lstsq(df, fs[-1], rcond=None)[0]
+
+    x = gs[-1] - dg @ gamma
+    if not onp.all(onp.isfinite(x)):
+        return onp.reshape(gs[-1], shape)
+
+    return onp.reshape(x, shape)
+
+
+def _sweep_fixed_point(x, params, structure, plan):
+    """
+    Sweep once from the node coordinates of an iterate, with indirect edges.
+
+    Only the nodes a sweep computes are taken from the iterate. The other ones,
+    like the origin nodes, keep the coordinates of the parameters.
     """
-    tvec_in = -1.0 * t_vec
+    xyz, lengths, forces, loads, residuals = params
 
-    return trail_vector_out(tvec_in, q_vec, rd_vec, ri_vec)  # bottleneck
+    fixed = structure.node_sequence < 1
+    x = np.where(fixed[:, None], xyz, x)
+    state = (x, residuals, np.zeros_like(residuals), forces)
 
+    return equilibrium_sweep_numpy(state, lengths, forces, loads, structure, plan)
 
-def deviation_edges_resultant_vector(node, node_xyz, deviation_edges, edge_forces):
+
+@primitive
+def fixed_point_numpy(
+    x, xyz, lengths, forces, loads, residuals, structure, plan, tmax, eta
+):
     """
-    Adds up the force vectors of the deviation edges incident to a node.
+    Mark node coordinates as the fixed point of the sweeps of a structure.
 
     Parameters
     ----------
-    topology : ``TopologyDiagram``
-        A topology diagram.
-    node : ``int``
-        A node key.
-    node_xyz : ``dict``
-        A dictionary with node keys and xyz coordinates as values.
-    deviation_edges : ``list``
-        A list with deviation edges keys.
+    x :
+        The node coordinates at the fixed point, found beforehand.
+    xyz :
+        The node coordinates. Only the ones of the nodes no sweep computes, like
+        the origin nodes, are read.
+    lengths :
+        The signed edge lengths.
+    forces :
+        The signed edge forces.
+    loads :
+        The node loads.
+    residuals :
+        The initial residual vectors.
+    structure :
+        An equilibrium structure.
+    plan :
+        The per-sequence index arrays of the structure.
+    tmax :
+        Maximum number of iterations of the adjoint iteration.
+    eta :
+        The convergence threshold of the adjoint iteration, relative to the
+        norm of the incoming gradient.
 
     Returns
     -------
-    rvec : ``list``
-        The resulting force vector.
+    x :
+        The same node coordinates.
+
+    Notes
+    -----
+    This returns its input as is. What it adds is a vector-Jacobian product
+    that differentiates the fixed point implicitly with respect to the other
+    arrays, by iterating the transposed sweep to its own fixed point. Its cost
+    does not depend on the number of sweeps that found the fixed point. If
+    that iteration does not converge within `tmax` iterations, the product
+    raises a `ValueError` instead of returning a wrong gradient.
     """
-    r_vec = np.zeros(3)
-    if not deviation_edges:
-        return r_vec
+    return onp.array(x, dtype=float)
+
+
+def _fixed_point_vjp(argnums, ans, args, kwargs):
+    x = onp.asarray(args[0])
+    params = tuple(onp.asarray(array) for array in args[1:6])
+    structure = kwargs["structure"]
+    plan = kwargs["plan"]
+    tmax = kwargs["tmax"]
+    eta = kwargs["eta"]
+
+    def sweep(x, params):
+        return _sweep_fixed_point(x, params, structure, plan)[0]
+
+    vjp_x, _ = make_vjp(sweep, 0)(x, params)
+    vjp_params, _ = make_vjp(sweep, 1)(x, params)
+
+    def vjp(g):
+        tol = eta * onp.linalg.norm(g)
+
+        # solve the adjoint fixed point, as many sweeps as the forward may take
+        adjoint = g
+        distance = onp.inf
+        for _ in range(tmax):
+            adjoint_next = g + vjp_x(adjoint)
+            distance = onp.linalg.norm(adjoint_next - adjoint)
+            adjoint = adjoint_next
+            if distance <= tol:
+                break
+
+        # a gradient short of its fixed point is wrong, raise like the forward
+        if distance > tol:
+            raise ValueError(
+                "Over {} iters. Adjoint residual: {} > tol: {}".format(
+                    tmax, distance, tol
+                )
+            )
 
-    for edge in deviation_edges:
-        force = edge_forces[edge]
-        vector = incoming_edge_vector(node, node_xyz, edge, normalize=True)
-        r_vec = r_vec + force * vector
+        grads = vjp_params(adjoint)
 
-    # bottleneck 40%
-    # TODO: check if np.array forces broadcasts well with vectors array
+        return tuple(
+            onp.zeros_like(x) if argnum == 0 else grads[argnum - 1]
+            for argnum in argnums
+        )
 
-    return r_vec
+    return vjp
 
 
-def direct_deviation_edges_resultant_vector(topology, node, node_xyz):
+defvjp_argnums(fixed_point_numpy, _fixed_point_vjp)
+
+
+def equilibrium_sweep_numpy(
+    state, lengths, forces, loads, structure, plan=None, indirect=True
+):
     """
-    Adds up the force vectors of the direct deviation edges incident to a node.
+    Sweep once over all the sequences of a structure.
 
     Parameters
     ----------
-    topology : ``TopologyDiagram``
-        A topology diagram.
-    node : ``int``
-        A node key.
+    state :
+        A tuple with the node coordinates, the residual vectors, the reaction
+        forces and the edge forces.
+    lengths :
+        The signed edge lengths.
+    forces :
+        The signed edge forces.
+    loads :
+        The node loads.
+    structure :
+        An equilibrium structure.
+    plan :
+        The per-sequence index arrays of the structure. If `None`, they are
+        computed here.
+    indirect :
+        Flag to consider indirect deviation edges in the calculation.
 
     Returns
     -------
-    rvec : ``list``
-        The resulting force vector.
+    state :
+        The updated state tuple.
     """
-    deviation_edges = topology._connected_direct_deviation_edges(node)
-    res = deviation_edges_resultant_vector(topology, node, node_xyz, deviation_edges)
+    if plan is None:
+        plan = sequence_plan(structure)
+
+    for step in plan:
+        state = sequence_equilibrium_numpy(
+            state, step, lengths, forces, loads, structure, indirect
+        )
 
-    return res
+    return state
 
 
-def indirect_deviation_edges_resultant_vector(topology, node, node_xyz):
+def sequence_equilibrium_numpy(
+    state, step, lengths, forces, loads, structure, indirect=True
+):
     """
-    Adds up the force vectors of the indirect deviation edges incident to a node.
+    Equilibrate every trail at one sequence and advance each one node.
 
     Parameters
     ----------
-    topology : ``TopologyDiagram``
-        A topology diagram.
-    node : ``int``
-        A node key.
+    state :
+        A tuple with the node coordinates, the residual vectors, the reaction
+        forces and the edge forces.
+    step :
+        The index arrays of the sequence, one entry of `sequence_plan`.
+    lengths :
+        The signed edge lengths.
+    forces :
+        The signed edge forces.
+    loads :
+        The node loads.
+    structure :
+        An equilibrium structure.
+    indirect :
+        Flag to consider indirect deviation edges in the calculation.
 
     Returns
     -------
-    rvec : ``list``
-        The resulting force vector.
+    state :
+        The updated state tuple.
     """
-    deviation_edges = topology._connected_indirect_deviation_edges(node)
+    xyz, residuals, reactions, trail_forces = state
+
+    solve_stats = SolveStats.recording()
+    if solve_stats is not None:
+        start = solve_stats.clock()
+
+    nodes = step["nodes"]
+
+    # deviation edges resultant vectors, one segment sum over the incidences
+    incidences = step["incidences"] if indirect else step["incidences_direct"]
+    r_vec = deviation_resultants_numpy(xyz, forces, structure, incidences, nodes.size)
+
+    if solve_stats is not None:
+        start = solve_stats.lap("deviation_resultants", start)
+
+    # node equilibrium for all trails at once
+    r_vec = residuals[nodes] - loads[nodes] - r_vec
+
+    # if a node is a support, store its reaction
+    supports = step["supports"]
+    if supports.size:
+        reactions = scatter(reactions, nodes[supports], r_vec[supports])
+
+    # otherwise, advance its trail to the next node
+    active = step["active"]
+    if not active.size:
+        if solve_stats is not None:
+            solve_stats.lap("node_equilibrium", start)
+        return xyz, residuals, reactions, trail_forces
+
+    nodes = nodes[active]
+    r_vec = r_vec[active]
+    edges = step["edges"]
+    next_nodes = step["next_nodes"]
+    pos = xyz[nodes]
+
+    # query trail edge lengths, overriden by the planes of the edges with one
+    length = lengths[edges]
+    if step["planes"]:
+        if solve_stats is not None:
+            start = solve_stats.lap("node_equilibrium", start)
+        length = trail_lengths_from_planes_numpy(
+            pos,
+            r_vec,
+            structure.plane_origins[edges],
+            structure.plane_normals[edges],
+            length,
+        )
+        if solve_stats is not None:
+            start = solve_stats.lap("plane_intersections", start)
+
+    # compute trail forces and directions, always positive
+    trail_force = length_vectors_numpy(r_vec)
+    direction = normalize_vectors_numpy(r_vec)
+
+    # store next node positions and residuals
+    xyz = scatter(xyz, next_nodes, pos + length[:, None] * direction)
+    residuals = scatter(residuals, next_nodes, r_vec)
+
+    # correct trail force signs based on trail signed lengths
+    trail_force = np.where(length < 0.0, -trail_force, trail_force)
+    trail_forces = scatter(trail_forces, edges, trail_force)
 
-    return deviation_edges_resultant_vector(topology, node, node_xyz, deviation_edges)
+    if solve_stats is not None:
+        solve_stats.lap("node_equilibrium", start, count=not step["planes"])
 
+    return xyz, residuals, reactions, trail_forces
 
-def trail_vector_out(tvec_in, q_vec, rd_vec, ri_vec):
+
+def deviation_resultants_numpy(xyz, forces, structure, incidences, num_segments):
     """
-    Calculate an outgoing trail vector.
+    Add up the force vectors of the deviation edges incident to some nodes.
 
     Parameters
     ----------
-    tvec_in : ``list``
-        An incoming trail vector.
-    q_vec : ``list``
-        A load vector.
-    rd_vec : ``list``
-        The direct deviation edges resultant force vector.
-    ri_vec : ``list``
-        The indirect deviation edges resultant force vector.
+    xyz :
+        The node coordinates.
+    forces :
+        The signed edge forces.
+    structure :
+        An equilibrium structure.
+    incidences :
+        The indices of the deviation incidences to add up.
+    num_segments :
+        The number of nodes the resultants are computed for.
 
     Returns
     -------
-    tvec_out : ``list``
-        An outgoing trail vector.
+    r_vecs :
+        The resultant force vector at every node, in the order the segment ids
+        of the incidences point to.
+    """
+    if not incidences.size:
+        return np.zeros((num_segments, 3))
+
+    node = structure.incidence_node[incidences]
+    other = structure.incidence_other[incidences]
+    edge = structure.incidence_edge[incidences]
+    segments = structure.incidence_trail[incidences]
+
+    vectors = normalize_vectors_numpy(xyz[other] - xyz[node])
+    contributions = forces[edge][:, None] * vectors
+
+    return segment_sum(contributions, segments, num_segments)
+
+
+def sequence_plan(structure):
     """
-    return -1.0 * (tvec_in + q_vec + rd_vec + ri_vec)
+    Precompute the index arrays a sweep needs at every sequence of a structure.
+
+    Parameters
+    ----------
+    structure :
+        An equilibrium structure.
+
+    Returns
+    -------
+    plan :
+        A list with one dictionary of index arrays per sequence.
+
+    Notes
+    -----
+    The resultants at a sequence are summed into one slot per trail, so the
+    segment id of an incidence is the trail of its node, and the nodes of a
+    sequence are listed with padding, one per trail, to match.
+    """
+    plan = []
+    num_sequences, num_trails = structure.shape
+    offsets = structure.incidence_offsets
+
+    for k in range(num_sequences):
+        slots = structure.sequences[k]
+        nodes = np.where(slots >= 0, slots, 0)
+
+        active = np.flatnonzero(structure.active[k])
+        edges = structure.trail_edges[k][active]
+        next_nodes = structure.sequences[(k + 1) % num_sequences][active]
+
+        supports = np.flatnonzero((slots >= 0) & structure.supports[nodes])
+
+        incidences = np.arange(offsets[k], offsets[k + 1])
+        direct = incidences[~structure.incidence_indirect[incidences]]
+
+        step = {}
+        step["nodes"] = nodes
+        step["active"] = active
+        step["edges"] = edges
+        step["next_nodes"] = next_nodes
+        step["supports"] = supports
+        step["incidences"] = incidences
+        step["incidences_direct"] = direct
+        step["planes"] = bool(np.any(structure.plane_mask[edges]))
+        plan.append(step)
+
+    return plan
 
 
 # ------------------------------------------------------------------------------
@@ -383,66 +1099,156 @@ def trail_vector_out(tvec_in, q_vec, rd_vec, ri_vec):
 # ------------------------------------------------------------------------------
 
 
-def incoming_edge_vectors(node, node_xyz, edges, normalize=False):
+def normalize_vector_numpy(vector):
+    """
+    Hand-made vector normalization.
+    """
+    return vector / length_vector_numpy(vector)
+
+
+def length_vector_numpy(vector):
+    """
+    Calculates the norm of a vector.
+    """
+    return np.linalg.norm(vector)
+
+
+def length_vectors_numpy(vectors):
     """
-    Temporary alternative to Diagram.incoming_edge_vectors()
+    Calculates the norm of every row vector, with a zero norm for zero vectors.
+
+    Notes
+    -----
+    The square root is only taken of nonzero squared norms, so the derivative
+    of a zero vector's norm is zero instead of a NaN.
     """
-    vectors = []
-    for u, v in edges:
-        other = u if u != node else v
-        vector = vector_two_nodes(node_xyz[other], node_xyz[node], normalize)
-        vectors.append(vector)
+    squared = np.sum(np.square(vectors), axis=-1)
+    nonzero = squared > 0.0
 
-    return vectors
+    return np.where(nonzero, np.sqrt(np.where(nonzero, squared, 1.0)), 0.0)
 
 
-def incoming_edge_vector(node, node_xyz, edge, normalize=False):
+def normalize_vectors_numpy(vectors):
     """
-    Temporary alternative to Diagram.incoming_edge_vectors()
+    Normalizes every row vector, leaving zero vectors untouched.
     """
-    u, v = edge
-    other = u if u != node else v
+    lengths = length_vectors_numpy(vectors)
+    lengths = np.where(lengths > 0.0, lengths, 1.0)
 
-    return vector_two_nodes(node_xyz[other], node_xyz[node], normalize)
+    return vectors / lengths[..., None]
 
 
-def vector_two_nodes(a, b, normalize=False):
+def trail_lengths_from_planes_numpy(
+    points, vectors, origins, normals, lengths, tol=1e-6
+):
     """
-    Calculates the vector between the xyz coordinates of two noddes.
+    Calculates the signed lengths of trail edges from vector-plane intersections.
 
     Parameters
     ----------
-    a : ``list``
-        The xyz coordinates of the first node
-    b : ``list``
-        The xyz coordinates of the second node
-    normalize : ``bool``
-        A boolean flag to normalize all the resulting edge vectors.
-        Defaults to ``False``.
+    points :
+        The XYZ coordinates of the base positions of the vectors.
+    vectors :
+        The XYZ coordinates of the vectors.
+    origins :
+        The origins of the planes.
+    normals :
+        The normals of the planes. A zero normal stands for no plane.
+    lengths :
+        The lengths to fall back to where no intersection is found.
+    tol :
+        A tolerance to check if a vector and a plane normal are parallel.
 
     Returns
     -------
-    vector : ``list``
-        The calculated xyz vector.
+    lengths :
+        The distances between the points and the line-plane intersections, or
+        the fallback lengths where there is no intersection or it is null.
     """
-    vector = a - b
-    if not normalize:
-        return vector
-    return normalize_vector_numpy(vector)
+    cos_nv = np.sum(normals * normalize_vectors_numpy(vectors), axis=-1)
+    parallel = np.abs(cos_nv) < tol
 
+    cos_noa = np.sum(normals * (origins - points), axis=-1)
+    plengths = cos_noa / np.where(parallel, 1.0, cos_nv)
 
-def normalize_vector_numpy(vector):
+    valid = np.logical_and(np.logical_not(parallel), plengths != 0.0)
+
+    return np.where(valid, plengths, lengths)
+
+
+@primitive
+def segment_sum(data, segment_ids, num_segments):
     """
-    Hand-made vector normalization.
+    Adds up the rows of an array that share a segment id.
+
+    Parameters
+    ----------
+    data :
+        The rows to add up.
+    segment_ids :
+        The segment id of every row.
+    num_segments :
+        The number of segments.
+
+    Returns
+    -------
+    sums :
+        One summed row per segment.
     """
-    return vector / length_vector_numpy(vector)
+    sums = onp.zeros((num_segments,) + onp.shape(data)[1:])
+    onp.add.at(sums, segment_ids, data)
 
+    return sums
 
-def length_vector_numpy(vector):
+
+@primitive
+def scatter(array, indices, values):
     """
-    Calculates the norm of a vector.
+    Returns a copy of an array with the rows at some indices replaced.
+
+    Parameters
+    ----------
+    array :
+        The array to copy.
+    indices :
+        The unique indices of the rows to replace.
+    values :
+        The new rows.
+
+    Returns
+    -------
+    array :
+        The updated copy.
+
+    Notes
+    -----
+    This stands in for an in-place assignment, which autograd cannot trace.
     """
-    return np.linalg.norm(vector)
+    array = onp.array(array, dtype=float)
+    array[indices] = values
+
+    return array
+
+
+def _scatter_vjp_array(ans, array, indices, values):
+    def vjp(g):
+        g = onp.array(g)
+        g[indices] = 0.0
+        return g
+
+    return vjp
+
+
+defvjp(
+    segment_sum,
+    lambda ans, data, segment_ids, num_segments: lambda g: g[segment_ids],
+)
+defvjp(
+    scatter,
+    _scatter_vjp_array,
+    lambda ans, array, indices, values: lambda g: g[indices],
+    argnums=(0, 2),
+)
 
 
 def trail_length_from_plane_intersection_numpy(point, vector, plane, tol=1e-6):
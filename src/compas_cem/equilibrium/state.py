@@ -0,0 +1,343 @@
+from collections.abc import Mapping
+
+import autograd.numpy as np
+import numpy as onp
+
+__all__ = ["EquilibriumState"]
+
+# the names a state answers to, like the keys of a dictionary
+STATE_NAMES = (
+    "node_xyz",
+    "trail_forces",
+    "trail_directions",
+    "reaction_forces",
+    "xyz",
+    "forces",
+    "reactions",
+    "residuals",
+    "lengths",
+    "iterations",
+    "distance",
+    "residual_history",
+    "stats",
+)
+
+# ==============================================================================
+# Equilibrium State
+# ==============================================================================
+
+
+class EquilibriumState(Mapping):
+    """
+    The outcome of the form-finding algorithm, stored in contiguous arrays.
+
+    The arrays follow the node and edge order of the structure the state was
+    computed on, and the structure maps node and edge keys to rows.
+
+    Parameters
+    ----------
+    structure :
+        The equilibrium structure the state was computed on.
+    xyz :
+        The node coordinates, one row per node.
+    forces :
+        The signed edge forces, one entry per edge.
+    reactions :
+        The reaction forces, one row per node. Zero away from the supports.
+    residuals :
+        The residual vectors, one row per node.
+    lengths :
+        The signed edge lengths, one entry per edge. If `None`, they are
+        measured between the node coordinates the first time they are read.
+    iterations :
+        The number of iterations the form-finding algorithm ran for.
+    distance :
+        The residual of the last iteration that measured one.
+    residual_history :
+        The residual of every iteration that measured one.
+
+    Notes
+    -----
+    A state reads like the dictionary the solvers used to return. Besides its
+    arrays, `"node_xyz"`, `"trail_forces"`, `"trail_directions"` and
+    `"reaction_forces"` give read-only views keyed by node and edge keys, so
+    goals written against those dictionaries work unchanged. The views index
+    into the arrays and copy nothing.
+
+    The arrays are not copied either, and may be autograd boxes while a state
+    is differentiated.
+
+    A state solved with `stats=True` carries the `SolveStats` of the solve,
+    read as `state.stats` or, like the dictionary of `equilibrium_state`, as
+    `state["stats"]`. Otherwise, both are `None`.
+    """
+
+    def __init__(
+        self,
+        structure,
+        xyz,
+        forces,
+        reactions,
+        residuals,
+        lengths=None,
+        iterations=None,
+        distance=None,
+        residual_history=None,
+    ):
+        self.structure = structure
+        self.xyz = xyz
+        self.forces = forces
+        self.reactions = reactions
+        self.residuals = residuals
+        self.iterations = iterations
+        self.distance = distance
+        self.residual_history = residual_history
+        self.stats = None
+        self._lengths = lengths
+        self._views = {}
+
+    # ==============================================================================
+    # Constructors
+    # ==============================================================================
+
+    @classmethod
+    def from_arrays(cls, state, structure):
+        """
+        Wrap the array dictionary of an equilibrium kernel.
+
+        Parameters
+        ----------
+        state :
+            An equilibrium state as computed by `equilibrium_arrays_numpy`,
+            with the node coordinates `xyz`, the edge forces `forces`, the
+            reaction forces `reactions` and the residual vectors `residuals`.
+        structure :
+            The structure the equilibrium state was computed on.
+
+        Returns
+        -------
+        state :
+            The equilibrium state.
+        """
+        return cls(
+            structure,
+            state["xyz"],
+            state["forces"],
+            state["reactions"],
+            state["residuals"],
+            state.get("lengths"),
+            state.get("iterations"),
+            state.get("distance"),
+            state.get("residual_history"),
+        )
+
+    # ==============================================================================
+    # Properties
+    # ==============================================================================
+
+    @property
+    def lengths(self):
+        """
+        The signed edge lengths, with the sign of the edge forces.
+        """
+        if self._lengths is None:
+            from compas_cem.equilibrium.force_numpy import length_vectors_numpy
+
+            u, v = self.structure.edge_nodes.T
+            lengths = length_vectors_numpy(self.xyz[u] - self.xyz[v])
+            self._lengths = np.where(self.forces < 0.0, -lengths, lengths)
+
+        return self._lengths
+
+    @property
+    def node_xyz(self):
+        """
+        The node coordinates, keyed by node keys.
+        """
+        return self._view("node_xyz")
+
+    @property
+    def trail_forces(self):
+        """
+        The forces of the trail edges walked by the algorithm, keyed by edge keys.
+        """
+        return self._view("trail_forces")
+
+    @property
+    def trail_directions(self):
+        """
+        The unit vectors of the trail edges walked by the algorithm, keyed by
+        edge keys.
+        """
+        return self._view("trail_directions")
+
+    @property
+    def reaction_forces(self):
+        """
+        The reaction forces at the support nodes, keyed by node keys.
+        """
+        return self._view("reaction_forces")
+
+    # ==============================================================================
+    # Views
+    # ==============================================================================
+
+    def _view(self, name):
+        """
+        A keyed view on the arrays of the state, built once on first access.
+        """
+        view = self._views.get(name)
+        if view is not None:
+            return view
+
+        structure = self.structure
+        nodes = structure.nodes
+        edges = structure.edges
+        node_index = structure.node_index
+        edge_index = structure.edge_index
+
+        # the trail edges a sweep walks through
+        active = structure.active
+        walked = structure.trail_edges[active]
+
+        if name == "node_xyz":
+            view = EquilibriumStateView(nodes, node_index, self.xyz)
+
+        elif name == "trail_forces":
+            rows = onp.full(structure.number_of_edges(), -1, dtype=int)
+            rows[walked] = walked
+            view = EquilibriumStateView(edges, edge_index, self.forces, rows)
+
+        elif name == "trail_directions":
+            from compas_cem.equilibrium.force_numpy import normalize_vectors_numpy
+
+            # the residual vector that leaves a node points to the next one
+            next_nodes = onp.roll(structure.sequences, -1, axis=0)[active]
+            directions = normalize_vectors_numpy(self.residuals[next_nodes])
+
+            rows = onp.full(structure.number_of_edges(), -1, dtype=int)
+            rows[walked] = onp.arange(walked.size)
+            view = EquilibriumStateView(edges, edge_index, directions, rows)
+
+        elif name == "reaction_forces":
+            rows = onp.arange(structure.number_of_nodes())
+            rows = onp.where(structure.supports, rows, -1)
+            view = EquilibriumStateView(nodes, node_index, self.reactions, rows)
+
+        self._views[name] = view
+
+        return view
+
+    # ==============================================================================
+    # Counters
+    # ==============================================================================
+
+    def number_of_nodes(self):
+        """
+        The number of nodes in the state.
+        """
+        return self.structure.number_of_nodes()
+
+    def number_of_edges(self):
+        """
+        The number of edges in the state.
+        """
+        return self.structure.number_of_edges()
+
+    # ==============================================================================
+    # Magic methods
+    # ==============================================================================
+
+    def __getitem__(self, name):
+        if name not in STATE_NAMES:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __iter__(self):
+        return iter(STATE_NAMES)
+
+    def __len__(self):
+        return len(STATE_NAMES)
+
+    def __repr__(self):
+        tpl = "{}(nodes={}, edges={}, iterations={})"
+        return tpl.format(
+            self.__class__.__name__,
+            self.number_of_nodes(),
+            self.number_of_edges(),
+            self.iterations,
+        )
+
+
+# ==============================================================================
+# Equilibrium State View
+# ==============================================================================
+
+
+class EquilibriumStateView(Mapping):
+    """
+    A read-only mapping from diagram keys to the rows of a state array.
+
+    Parameters
+    ----------
+    keys :
+        The keys of the rows, in structure order.
+    index :
+        A mapping from keys to their position in `keys`.
+    array :
+        The state array the view reads from.
+    rows :
+        The row of the array of every key, or `-1` for the keys the view
+        leaves out. If `None`, every key reads the row at its position.
+    """
+
+    def __init__(self, keys, index, array, rows=None):
+        self._keys = keys
+        self._index = index
+        self._array = array
+        self._rows = rows
+
+    def __getitem__(self, key):
+        i = self._index[key]
+        if self._rows is None:
+            return self._array[i]
+
+        row = self._rows[i]
+        if row < 0:
+            raise KeyError(key)
+        return self._array[row]
+
+    def __iter__(self):
+        keys = self._keys.tolist()
+        if self._rows is None:
+            positions = range(len(keys))
+        else:
+            positions = onp.flatnonzero(self._rows >= 0).tolist()
+
+        for i in positions:
+            key = keys[i]
+            yield tuple(key) if isinstance(key, list) else key
+
+    def __len__(self):
+        if self._rows is None:
+            return len(self._keys)
+        return int(onp.count_nonzero(self._rows >= 0))
+
+    def __contains__(self, key):
+        try:
+            i = self._index[key]
+        except (KeyError, TypeError):
+            return False
+        return self._rows is None or self._rows[i] >= 0
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, dict(self.items()))
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,170 @@
+from threading import local
+from timeit import default_timer as timer
+
+__all__ = ["SolveStats"]
+
+# the phases of a solve, in the order they are reported
+PHASES = (
+    "structure",
+    "deviation_resultants",
+    "node_equilibrium",
+    "plane_intersections",
+    "convergence",
+    "form",
+)
+
+# the stats recording in the current thread, if any
+_recording = local()
+
+# ==============================================================================
+# Solve Stats
+# ==============================================================================
+
+
+class SolveStats(object):
+    """
+    The wall time and the number of calls of every phase of a solve.
+
+    The phases are:
+
+    - structure: compiling the structure and reading the parameters.
+    - deviation_resultants: adding up the deviation forces at the nodes.
+    - node_equilibrium: equilibrating the nodes and advancing the trails.
+    - plane_intersections: intersecting trail edges with their planes.
+    - convergence: measuring residuals and mixing iterates.
+    - form: building the form diagram.
+
+    Notes
+    -----
+    A stats object records while it is used as a context manager, from every
+    solve run in the same thread. The solvers check for it once per sequence
+    and per iteration, so they pay nothing else when no stats are recording.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.calls = {}
+        self.iterations = None
+        self.residual_history = []
+        self._previous = None
+
+    # ==============================================================================
+    # Recording
+    # ==============================================================================
+
+    def lap(self, phase, start, count=True):
+        """
+        Record the time elapsed since a start time against a phase.
+
+        Parameters
+        ----------
+        phase :
+            The name of the phase.
+        start :
+            The start time, as returned by `SolveStats.clock`.
+        count :
+            If `False`, the time is added to the last call of the phase
+            instead of counting as a new one.
+
+        Returns
+        -------
+        now :
+            The current time, to start the next lap from.
+        """
+        now = timer()
+        self.times[phase] = self.times.get(phase, 0.0) + now - start
+        self.calls[phase] = self.calls.get(phase, 0) + int(count)
+        return now
+
+    def converged(self, iterations, residual_history):
+        """
+        Record how the outer iterations of a solve converged.
+
+        Parameters
+        ----------
+        iterations :
+            The number of iterations run.
+        residual_history :
+            The residual of every iteration that measured one.
+        """
+        self.iterations = iterations
+        self.residual_history = [float(r) for r in residual_history]
+
+    @staticmethod
+    def clock():
+        """
+        The current time of the clock the stats are recorded with.
+        """
+        return timer()
+
+    @staticmethod
+    def recording():
+        """
+        The stats recording in the current thread.
+
+        Returns
+        -------
+        stats :
+            The stats, or `None` if none are recording.
+        """
+        return getattr(_recording, "stats", None)
+
+    # ==============================================================================
+    # Queries
+    # ==============================================================================
+
+    def total(self):
+        """
+        The wall time of all the phases, added up.
+        """
+        return sum(self.times.values())
+
+    def summary(self):
+        """
+        A table with the time, the share and the calls of every phase.
+
+        Returns
+        -------
+        summary :
+            The table, as a string.
+        """
+        total = self.total() or 1.0
+        phases = [phase for phase in PHASES if phase in self.times]
+        phases += sorted(phase for phase in self.times if phase not in PHASES)
+
+        lines = ["{:<22}{:>12}{:>8}{:>10}".format("phase", "time [ms]", "%", "calls")]
+        for phase in phases:
+            time = self.times[phase]
+            line = "{:<22}{:>12.3f}{:>8.1f}{:>10}".format(
+                phase, 1e3 * time, 100.0 * time / total, self.calls[phase]
+            )
+            lines.append(line)
+        lines.append("iterations: {}".format(self.iterations))
+
+        return "\n".join(lines)
+
+    # ==============================================================================
+    # Magic methods
+    # ==============================================================================
+
+    def __enter__(self):
+        self._previous = SolveStats.recording()
+        _recording.stats = self
+        return self
+
+    def __exit__(self, *args):
+        _recording.stats = self._previous
+        self._previous = None
+
+    def __repr__(self):
+        tpl = "{}(total={:.6f}, iterations={})"
+        return tpl.format(self.__class__.__name__, self.total(), self.iterations)
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,339 @@
+import numpy as np
+
+__all__ = ["EquilibriumStructure"]
+
+
+# ==============================================================================
+# Equilibrium Structure
+# ==============================================================================
+
+
+class EquilibriumStructure(object):
+    """
+    The connectivity of a topology diagram, compiled into integer index arrays.
+
+    A structure holds everything the form-finding algorithm needs to know about
+    a topology diagram that does not change from one solve to the next: which
+    node sits at every sequence of every trail, which trail edge leaves it,
+    which deviation edges meet at it and whether they are direct or indirect.
+    It holds no coordinates, lengths, forces or loads, so one structure can be
+    compiled once and reused by any solver across many solves.
+
+    Parameters
+    ----------
+    nodes :
+        The node keys, in the order the node arrays of a solver follow.
+    edges :
+        The edge keys as pairs of node keys, in the order the edge arrays of a
+        solver follow.
+    sequences :
+        A sequence by trail matrix with the index of the node that every trail
+        visits at every sequence. Slots a trail does not visit hold `-1`.
+    trail_edges :
+        A sequence by trail matrix with the index of the trail edge that leaves
+        the node at every slot towards the next sequence. Slots without an
+        outgoing trail edge hold `-1`.
+    supports :
+        A boolean mask over the nodes that marks the support nodes.
+    trail_mask :
+        A boolean mask over the edges that marks the trail edges.
+    indirect_mask :
+        A boolean mask over the edges that marks the indirect deviation edges.
+    plane_mask :
+        A boolean mask over the edges that marks the trail edges with a plane.
+    plane_origins :
+        The origin of the plane of every edge. Zero where an edge has no plane.
+    plane_normals :
+        The normal of the plane of every edge. Zero where an edge has no plane.
+    trails :
+        The keys of the trails, in the order of the columns of `sequences`.
+        Defaults to the key of the first node every trail visits, which for a
+        trail that starts at a later sequence is not in the first row.
+
+    Notes
+    -----
+    A structure is immutable. Its arrays are read-only and its attributes
+    cannot be reassigned. A topology diagram that changes must be compiled
+    into a new structure.
+    """
+
+    def __init__(
+        self,
+        nodes,
+        edges,
+        sequences,
+        trail_edges,
+        supports,
+        trail_mask,
+        indirect_mask,
+        plane_mask,
+        plane_origins,
+        plane_normals,
+        trails=None,
+    ):
+        nodes = np.asarray(nodes, dtype=int)
+        edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+        sequences = np.asarray(sequences, dtype=int)
+        trail_edges = np.asarray(trail_edges, dtype=int)
+
+        if trails is None:
+            trails = []
+            if sequences.size:
+                first = np.argmax(sequences >= 0, axis=0)
+                trails = nodes[sequences[first, np.arange(sequences.shape[1])]]
+
+        attrs = {}
+        attrs["nodes"] = nodes
+        attrs["edges"] = edges
+        attrs["trails"] = np.asarray(trails, dtype=int)
+        attrs["sequences"] = sequences
+        attrs["trail_edges"] = trail_edges
+        attrs["supports"] = np.asarray(supports, dtype=bool)
+        attrs["trail_mask"] = np.asarray(trail_mask, dtype=bool)
+        attrs["indirect_mask"] = np.asarray(indirect_mask, dtype=bool)
+        attrs["plane_mask"] = np.asarray(plane_mask, dtype=bool)
+        attrs["plane_origins"] = np.asarray(plane_origins, dtype=float).reshape(-1, 3)
+        attrs["plane_normals"] = np.asarray(plane_normals, dtype=float).reshape(-1, 3)
+
+        # where every node sits in the sequence by trail matrix
+        num_nodes = nodes.size
+        node_sequence = np.full(num_nodes, -1, dtype=int)
+        node_trail = np.full(num_nodes, -1, dtype=int)
+        ks, ts = np.nonzero(sequences >= 0)
+        node_sequence[sequences[ks, ts]] = ks
+        node_trail[sequences[ks, ts]] = ts
+        attrs["node_sequence"] = node_sequence
+        attrs["node_trail"] = node_trail
+
+        # a slot advances its trail when it has a trail edge and is no support
+        slots = np.where(sequences >= 0, sequences, 0)
+        attrs["active"] = (trail_edges >= 0) & ~attrs["supports"][slots]
+
+        # the indices of the nodes at the ends of every edge
+        index = {int(key): i for i, key in enumerate(nodes)}
+        edge_nodes = [[index[u], index[v]] for u, v in edges.tolist()]
+        attrs["edge_nodes"] = np.array(edge_nodes, dtype=int).reshape(-1, 2)
+
+        # deviation incidence, twice per edge so it reaches both of its nodes
+        deviation_edges = np.flatnonzero(~attrs["trail_mask"])
+        dev_u = attrs["edge_nodes"][deviation_edges, 0]
+        dev_v = attrs["edge_nodes"][deviation_edges, 1]
+
+        incidence_node = np.concatenate([dev_u, dev_v])
+        incidence_other = np.concatenate([dev_v, dev_u])
+        incidence_edge = np.concatenate([deviation_edges, deviation_edges])
+
+        # sort incidences by the sequence of the node they act on
+        order = np.argsort(node_sequence[incidence_node], kind="stable")
+        incidence_node = incidence_node[order]
+        incidence_other = incidence_other[order]
+        incidence_edge = incidence_edge[order]
+
+        num_sequences = sequences.shape[0]
+        counts = np.bincount(
+            node_sequence[incidence_node], minlength=num_sequences
+        ).astype(int)
+
+        attrs["deviation_edges"] = deviation_edges
+        attrs["incidence_node"] = incidence_node
+        attrs["incidence_other"] = incidence_other
+        attrs["incidence_edge"] = incidence_edge
+        attrs["incidence_indirect"] = attrs["indirect_mask"][incidence_edge]
+        attrs["incidence_trail"] = node_trail[incidence_node]
+        attrs["incidence_offsets"] = np.concatenate([[0], np.cumsum(counts)])
+
+        for name, value in attrs.items():
+            value.setflags(write=False)
+            object.__setattr__(self, name, value)
+
+        object.__setattr__(self, "node_index", index)
+        object.__setattr__(
+            self,
+            "edge_index",
+            {(int(u), int(v)): i for i, (u, v) in enumerate(edges)},
+        )
+
+        # arrays a backend derives from the structure, kept as long as it lives
+        object.__setattr__(self, "_derived", {})
+
+    # ==============================================================================
+    # Constructors
+    # ==============================================================================
+
+    @classmethod
+    def from_topology_diagram(cls, topology):
+        """
+        Compile a topology diagram into an equilibrium structure.
+
+        Parameters
+        ----------
+        topology :
+            A topology diagram with trails already built.
+
+        Returns
+        -------
+        structure :
+            The compiled equilibrium structure.
+        """
+        assert topology.number_of_trails() > 0, "No trails in the diagram!"
+
+        csr = topology.csr
+        nodes = csr.nodes
+        edges = csr.edges
+        node_index = csr.node_index
+        edge_index = csr.edge_index
+
+        trails = []
+        num_sequences = topology.number_of_sequences()
+        num_trails = topology.number_of_trails()
+        sequences = np.full((num_sequences, num_trails), -1, dtype=int)
+        trail_edges = np.full((num_sequences, num_trails), -1, dtype=int)
+
+        for t, (key, trail) in enumerate(topology.trails(keys=True)):
+            trails.append(key)
+            for node, next_node in zip(trail, trail[1:] + (None,)):
+                k = topology.node_sequence(node)
+                sequences[k, t] = node_index[node]
+                if next_node is None:
+                    continue
+                edge = (node, next_node)
+                if edge not in edge_index:
+                    edge = (next_node, node)
+                trail_edges[k, t] = edge_index[edge]
+
+        supports = [topology.is_node_support(node) for node in nodes]
+
+        trail_mask = []
+        indirect_mask = []
+        plane_mask = []
+        plane_origins = []
+        plane_normals = []
+
+        for edge in edges:
+            is_trail = topology.is_trail_edge(edge)
+            trail_mask.append(is_trail)
+
+            indirect = False
+            if not is_trail:
+                a, b = topology.edge_sequence(edge)
+                indirect = a != b
+            indirect_mask.append(indirect)
+
+            plane = topology.edge_plane(edge) if is_trail else None
+            if plane:
+                origin, normal = plane
+                plane_mask.append(True)
+                plane_origins.append(list(origin))
+                plane_normals.append(list(normal))
+            else:
+                plane_mask.append(False)
+                plane_origins.append([0.0, 0.0, 0.0])
+                plane_normals.append([0.0, 0.0, 0.0])
+
+        return cls(
+            nodes=nodes,
+            edges=edges,
+            sequences=sequences,
+            trail_edges=trail_edges,
+            supports=supports,
+            trail_mask=trail_mask,
+            indirect_mask=indirect_mask,
+            plane_mask=plane_mask,
+            plane_origins=plane_origins,
+            plane_normals=plane_normals,
+            trails=trails,
+        )
+
+    # ==============================================================================
+    # Properties
+    # ==============================================================================
+
+    @property
+    def support_nodes(self):
+        """
+        The keys of the support nodes.
+        """
+        return self.nodes[self.supports]
+
+    @property
+    def origin_nodes(self):
+        """
+        The keys of the first node of every trail.
+        """
+        return self.trails
+
+    @property
+    def shape(self):
+        """
+        The number of sequences and the number of trails.
+        """
+        return self.sequences.shape
+
+    # ==============================================================================
+    # Counters
+    # ==============================================================================
+
+    def number_of_nodes(self):
+        """
+        The number of nodes in the structure.
+        """
+        return self.nodes.size
+
+    def number_of_edges(self):
+        """
+        The number of edges in the structure.
+        """
+        return self.edges.shape[0]
+
+    def number_of_sequences(self):
+        """
+        The number of sequences in the structure.
+        """
+        return self.sequences.shape[0]
+
+    def number_of_trails(self):
+        """
+        The number of trails in the structure.
+        """
+        return self.sequences.shape[1]
+
+    def number_of_deviation_edges(self):
+        """
+        The number of deviation edges in the structure.
+        """
+        return self.deviation_edges.size
+
+    def number_of_indirect_deviation_edges(self):
+        """
+        The number of indirect deviation edges in the structure.
+        """
+        return int(np.sum(self.indirect_mask))
+
+    # ==============================================================================
+    # Magic methods
+    # ==============================================================================
+
+    def __setattr__(self, name, value):
+        raise AttributeError("An equilibrium structure is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("An equilibrium structure is immutable")
+
+    def __repr__(self):
+        tpl = "{}(nodes={}, edges={}, sequences={}, trails={})"
+        return tpl.format(
+            self.__class__.__name__,
+            self.number_of_nodes(),
+            self.number_of_edges(),
+            self.number_of_sequences(),
+            self.number_of_trails(),
+        )
+
+
+# ==============================================================================
+# Main
+# ==============================================================================
+
+
+if __name__ == "__main__":
+    pass
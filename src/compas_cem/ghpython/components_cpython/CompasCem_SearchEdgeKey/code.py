@@ -10,7 +10,6 @@ from typing import Any
 import Grasshopper
 import Rhino
 
-from compas.tolerance import TOL
 from compas_rhino.conversions import line_to_compas
 
 
@@ -21,10 +20,10 @@ class SearchEdgeKeyComponent(Grasshopper.Kernel.GH_ScriptInstance):
 
         segment = line_to_compas(line)
 
-        eg = []
-        for point in (segment.start, segment.end):
-            gkey = TOL.geometric_key(point, diagram.tol)
-            node = diagram.gkey_node[gkey]
-            eg.append(node)
+        points = [segment.start, segment.end]
+        eg = diagram.node_keys(points)
+        for point, node in zip(points, eg):
+            if node is None:
+                raise KeyError("No node found at {}".format(point))
 
         return [tuple(eg)]
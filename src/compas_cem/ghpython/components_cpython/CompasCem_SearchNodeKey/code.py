@@ -10,7 +10,6 @@ from typing import Any
 import Grasshopper
 import Rhino
 
-from compas.tolerance import TOL
 from compas_rhino.conversions import point_to_compas
 
 
@@ -20,6 +19,9 @@ class SearchNodeKeyComponent(Grasshopper.Kernel.GH_ScriptInstance):
             return
 
         pt = point_to_compas(point)
-        gkey = TOL.geometric_key(pt, diagram.tol)
 
-        return diagram.gkey_node[gkey]
+        node = diagram.node_key(pt)
+        if node is None:
+            raise KeyError("No node found at {}".format(pt))
+
+        return node
@@ -18,6 +18,10 @@ if not compas.IPY:
     from .nlopt import *  # noqa F403
     from .objective_func import *  # noqa F403
     from .grad import *  # noqa F403
+    from .cache import *  # noqa F403
+    from .goalset import *  # noqa F403
+    from .pool import *  # noqa F403
+    from .multistart import *  # noqa F403
     from .optimizer import *  # noqa F403
 
 
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+
+import numpy as np
+
+__all__ = ["EvaluationCache"]
+
+# ------------------------------------------------------------------------------
+# Evaluation cache
+# ------------------------------------------------------------------------------
+
+
+class EvaluationCache(object):
+    """
+    A bounded least-recently-used cache of objective function evaluations.
+
+    Parameters
+    ----------
+    maxsize : ``int``, optional
+        The maximum number of evaluations to keep. Once full, the evaluation
+        that was used the longest time ago is dropped to make room. A cache
+        of size ``0`` keeps nothing, and every lookup misses.
+        Defaults to ``128``.
+
+    Notes
+    -----
+    Evaluations are keyed on the raw bytes of the parameter vector, so only
+    bitwise-identical parameter vectors hit the cache.
+    """
+
+    def __init__(self, maxsize=128):
+        if maxsize < 0:
+            msg = "The cache size must not be negative, got {}"
+            raise ValueError(msg.format(maxsize))
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    # ------------------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------------------
+
+    @staticmethod
+    def key(parameters):
+        """
+        The hashable key of a parameter vector.
+        """
+        return np.ascontiguousarray(parameters, dtype=float).tobytes()
+
+    # ------------------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------------------
+
+    def get(self, parameters, gradient=False):
+        """
+        Fetch the evaluation of a parameter vector and count a hit or a miss.
+
+        Parameters
+        ----------
+        parameters : ``array``
+            The parameter vector.
+        gradient : ``bool``, optional
+            If ``True``, an evaluation stored without a ``gradient`` misses.
+            Defaults to ``False``.
+
+        Returns
+        -------
+        entry : ``dict`` or ``None``
+            The cached evaluation, or ``None`` if there is none.
+        """
+        key = self.key(parameters)
+        entry = self._entries.get(key)
+        if entry is not None and gradient and entry.get("gradient") is None:
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+
+        return entry
+
+    def peek(self, parameters):
+        """
+        Fetch the evaluation of a parameter vector without counting it.
+        """
+        return self._entries.get(self.key(parameters))
+
+    def put(self, parameters, entry):
+        """
+        Store the evaluation of a parameter vector.
+        """
+        key = self.key(parameters)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every evaluation and reset the statistics.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------------------
+
+    def stats(self):
+        """
+        The hit and miss statistics of the cache.
+
+        Returns
+        -------
+        stats : ``dict``
+            The number of ``hits`` and ``misses``, the ``hit_rate``, and the
+            current ``size`` and ``maxsize`` of the cache.
+        """
+        lookups = self.hits + self.misses
+
+        stats = {}
+        stats["hits"] = self.hits
+        stats["misses"] = self.misses
+        stats["hit_rate"] = self.hits / lookups if lookups else 0.0
+        stats["size"] = len(self)
+        stats["maxsize"] = self.maxsize
+
+        return stats
+
+    # ------------------------------------------------------------------------------
+    # Magic methods
+    # ------------------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, parameters):
+        return self.key(parameters) in self._entries
+
+    def __repr__(self):
+        tpl = "{}(size={}, maxsize={}, hits={}, misses={})"
+        return tpl.format(
+            self.__class__.__name__, len(self), self.maxsize, self.hits, self.misses
+        )
+
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+
+
+if __name__ == "__main__":
+    pass
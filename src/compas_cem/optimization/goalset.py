@@ -0,0 +1,326 @@
+import autograd.numpy as np
+import numpy as onp
+
+from compas_cem.optimization.goals import DeviationEdgeLengthGoal
+from compas_cem.optimization.goals import EdgeDirectionGoal
+from compas_cem.optimization.goals import LineGoal
+from compas_cem.optimization.goals import PlaneGoal
+from compas_cem.optimization.goals import PointGoal
+from compas_cem.optimization.goals import ReactionForceGoal
+from compas_cem.optimization.goals import TrailEdgeForceGoal
+
+__all__ = ["GoalSet", "compile_goals"]
+
+# ------------------------------------------------------------------------------
+# Goal Set
+# ------------------------------------------------------------------------------
+
+
+class GoalSet(object):
+    """
+    Goals of the same class, compiled into stacked arrays.
+
+    Parameters
+    ----------
+    goal_type :
+        The class of the goals.
+    keys :
+        The node or edge key of every goal.
+    indices :
+        A goals by k array with the rows of the state arrays every goal reads.
+    targets :
+        The targets of the goals, stacked along the first axis.
+    weights :
+        The weight of every goal.
+
+    Notes
+    -----
+    The penalty of all the goals in a set is one array expression over the
+    arrays of an equilibrium state, so it is differentiable and records a
+    handful of operations on an autograd tape instead of a few per goal.
+    """
+
+    def __init__(self, goal_type, keys, indices, targets, weights):
+        self.goal_type = goal_type
+        self.keys = keys
+        self.indices = indices
+        self.targets = targets
+        self.weights = weights
+        self._penalty = _KERNELS[goal_type][1]
+
+    # ------------------------------------------------------------------------------
+    # Constructors
+    # ------------------------------------------------------------------------------
+
+    @classmethod
+    def from_goals(cls, goals, structure):
+        """
+        Compile goals of the same class against an equilibrium structure.
+
+        Parameters
+        ----------
+        goals :
+            The goals, all of the same class.
+        structure :
+            The equilibrium structure the states to penalize are computed on.
+
+        Returns
+        -------
+        goalset :
+            The goal set.
+        """
+        goals = list(goals)
+        goal_types = {type(goal) for goal in goals}
+        if len(goal_types) != 1:
+            msg = "Expected goals of one class, got {}"
+            names = sorted(goal_type.__name__ for goal_type in goal_types)
+            raise ValueError(msg.format(names))
+
+        goal_type = goal_types.pop()
+        if goal_type not in _KERNELS:
+            msg = "Goals of class {} cannot be compiled"
+            raise TypeError(msg.format(goal_type.__name__))
+
+        keys = [goal.key() for goal in goals]
+        indices, targets = _KERNELS[goal_type][0](goals, structure)
+        weights = onp.array([goal.weight for goal in goals], dtype=float)
+
+        return cls(goal_type, keys, indices, targets, weights)
+
+    @staticmethod
+    def supports(goal):
+        """
+        Whether a goal can be compiled into a goal set.
+        """
+        return type(goal) in _KERNELS
+
+    # ------------------------------------------------------------------------------
+    # Penalty
+    # ------------------------------------------------------------------------------
+
+    def penalty(self, state):
+        """
+        The penalty of all the goals in the set.
+
+        Parameters
+        ----------
+        state :
+            An equilibrium state computed on the structure the set was compiled
+            against.
+
+        Returns
+        -------
+        penalty :
+            The weighted sum of the squared errors of the goals.
+        """
+        return np.sum(self.weights * self._penalty(self, state))
+
+    # ------------------------------------------------------------------------------
+    # Magic methods
+    # ------------------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __repr__(self):
+        tpl = "{}(goal_type={}, goals={})"
+        return tpl.format(self.__class__.__name__, self.goal_type.__name__, len(self))
+
+
+# ------------------------------------------------------------------------------
+# Compilation
+# ------------------------------------------------------------------------------
+
+
+def compile_goals(goals, structure):
+    """
+    Group goals by class and compile every group into a goal set.
+
+    Parameters
+    ----------
+    goals :
+        The goals to compile.
+    structure :
+        The equilibrium structure the states to penalize are computed on.
+
+    Returns
+    -------
+    goalsets :
+        A goal set per class of goals that compiles, in the order the classes
+        first appear.
+    goals :
+        The goals of the classes that do not compile, like polyline goals, or
+        of subclasses of the classes that do.
+    """
+    groups = {}
+    others = []
+    for goal in goals:
+        if GoalSet.supports(goal):
+            groups.setdefault(type(goal), []).append(goal)
+        else:
+            others.append(goal)
+
+    goalsets = [GoalSet.from_goals(group, structure) for group in groups.values()]
+
+    return goalsets, others
+
+
+# ------------------------------------------------------------------------------
+# Kernels
+# ------------------------------------------------------------------------------
+
+
+def _node_rows(goals, structure):
+    """
+    The state rows of the nodes of node goals.
+    """
+    return onp.array([[structure.node_index[goal.key()]] for goal in goals], dtype=int)
+
+
+def _node_pair_rows(goals, structure):
+    """
+    The state rows of the two nodes of edge goals.
+    """
+    rows = [[structure.node_index[u], structure.node_index[v]] for u, v in _keys(goals)]
+    return onp.array(rows, dtype=int)
+
+
+def _keys(goals):
+    """
+    The keys of a list of goals.
+    """
+    return [goal.key() for goal in goals]
+
+
+def _vectors(values):
+    """
+    Stack vectors into a goals by 3 array.
+    """
+    return onp.array([list(value) for value in values], dtype=float).reshape(-1, 3)
+
+
+def _compile_point(goals, structure):
+    return _node_rows(goals, structure), _vectors(goal._target for goal in goals)
+
+
+def _compile_reaction(goals, structure):
+    rows = _node_rows(goals, structure)
+    for key, row in zip(_keys(goals), rows[:, 0]):
+        if not structure.supports[row]:
+            raise KeyError(key)
+
+    return rows, _vectors(goal._target for goal in goals)
+
+
+def _compile_trail_force(goals, structure):
+    walked = set(structure.trail_edges[structure.active].tolist())
+
+    rows = []
+    for key in _keys(goals):
+        row = structure.edge_index[key]
+        if row not in walked:
+            raise KeyError(key)
+        rows.append([row])
+
+    targets = onp.array([goal._target for goal in goals], dtype=float)
+
+    return onp.array(rows, dtype=int), targets
+
+
+def _compile_length(goals, structure):
+    targets = onp.array([goal._target for goal in goals], dtype=float)
+    return _node_pair_rows(goals, structure), targets
+
+
+def _compile_direction(goals, structure):
+    targets = _vectors(goal._target for goal in goals)
+    targets = targets / onp.linalg.norm(targets, axis=1, keepdims=True)
+    return _node_pair_rows(goals, structure), targets
+
+
+def _compile_plane(goals, structure):
+    targets = []
+    for goal in goals:
+        base, normal = goal._target
+        normal = onp.array(list(normal), dtype=float)
+        targets.append([list(base), normal / onp.linalg.norm(normal)])
+
+    return _node_rows(goals, structure), onp.array(targets, dtype=float)
+
+
+def _compile_line(goals, structure):
+    targets = [[list(point) for point in goal._target] for goal in goals]
+    return _node_rows(goals, structure), onp.array(targets, dtype=float)
+
+
+def _penalty_point(goalset, state):
+    difference = state.xyz[goalset.indices[:, 0]] - goalset.targets
+    return np.sum(difference * difference, axis=1)
+
+
+def _penalty_reaction(goalset, state):
+    difference = state.reactions[goalset.indices[:, 0]] - goalset.targets
+    return np.sum(difference * difference, axis=1)
+
+
+def _penalty_trail_force(goalset, state):
+    difference = state.forces[goalset.indices[:, 0]] - goalset.targets
+    return difference * difference
+
+
+def _penalty_length(goalset, state):
+    u, v = goalset.indices.T
+    vectors = state.xyz[u] - state.xyz[v]
+    difference = np.sqrt(np.sum(vectors * vectors, axis=1)) - goalset.targets
+    return difference * difference
+
+
+def _penalty_direction(goalset, state):
+    u, v = goalset.indices.T
+    vectors = state.xyz[v] - state.xyz[u]
+    directions = vectors / np.sqrt(np.sum(vectors * vectors, axis=1, keepdims=True))
+
+    # the target flips to point the same way as the edge
+    targets = goalset.targets
+    dots = np.sum(directions * targets, axis=1, keepdims=True)
+    difference = directions - np.where(dots < 0.0, -targets, targets)
+
+    return np.sum(difference * difference, axis=1)
+
+
+def _penalty_plane(goalset, state):
+    points = state.xyz[goalset.indices[:, 0]]
+    bases = goalset.targets[:, 0]
+    normals = goalset.targets[:, 1]
+    distances = np.sum((points - bases) * normals, axis=1)
+    return distances * distances
+
+
+def _penalty_line(goalset, state):
+    points = state.xyz[goalset.indices[:, 0]]
+    starts = goalset.targets[:, 0]
+    lines = goalset.targets[:, 1] - starts
+    vectors = points - starts
+    scales = np.sum(vectors * lines, axis=1) / np.sum(lines * lines, axis=1)
+    difference = vectors - scales[:, None] * lines
+    return np.sum(difference * difference, axis=1)
+
+
+# how to compile, and then penalize, every class of goals that compiles
+_KERNELS = {
+    PointGoal: (_compile_point, _penalty_point),
+    ReactionForceGoal: (_compile_reaction, _penalty_reaction),
+    TrailEdgeForceGoal: (_compile_trail_force, _penalty_trail_force),
+    DeviationEdgeLengthGoal: (_compile_length, _penalty_length),
+    EdgeDirectionGoal: (_compile_direction, _penalty_direction),
+    PlaneGoal: (_compile_plane, _penalty_plane),
+    LineGoal: (_compile_line, _penalty_line),
+}
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+
+
+if __name__ == "__main__":
+    pass
@@ -1,6 +1,11 @@
 import numpy as np
 
-__all__ = ["grad_finite_differences", "grad_autograd"]
+__all__ = [
+    "grad_finite_differences",
+    "grad_autograd",
+    "value_grad_finite_differences",
+    "finite_difference_points",
+]
 
 # ------------------------------------------------------------------------------
 # Gradient calculation with finite differences
@@ -22,26 +27,63 @@ def grad_autograd(x, grad, grad_func, **kwargs):
 # ------------------------------------------------------------------------------
 
 
-def grad_finite_differences(x, grad, x_func, step_size, **kwargs):
+def grad_finite_differences(x, grad, x_func, step_size, scheme="forward", **kwargs):
     """
-    Approximate the gradient of a blackbox function using forward finite differences.
+    Approximate the gradient of a blackbox function using finite differences.
     This function updates grad in place.
     """
-    fx0 = x_func(x)
-    # NOTE: We make an editable copy of x because NLOpt makes x a read-only vector
-    _x = np.copy(x)
+    _, grad[:] = value_grad_finite_differences(x, x_func, step_size, scheme)
 
-    for i in range(len(x)):
-        _xi = _x[i]
-        _x[i] += step_size
+    return grad
 
-        fx1 = x_func(_x)
 
-        delta_fx = (fx1 - fx0) / step_size
-        grad[i] = delta_fx
-        _x[i] = _xi
+def value_grad_finite_differences(
+    x, x_func, step_size, scheme="forward", map_func=None, **kwargs
+):
+    """
+    Evaluate a blackbox function and approximate its gradient using finite
+    differences, reusing the evaluation at x for every difference.
+
+    Forward differences take ``len(x) + 1`` evaluations. Central differences
+    take ``2 * len(x) + 1``, and their error shrinks with the square of the step
+    size instead of with the step size. The evaluations run one after the other
+    through ``x_func``, unless a ``map_func`` is given. It takes all of them at
+    once, as a stack of points whose first row is x, and returns their values.
+    """
+    points = finite_difference_points(x, step_size, scheme)
 
-    return grad
+    if map_func is None:
+        values = np.array([x_func(point) for point in points])
+    else:
+        values = np.asarray(map_func(points), dtype=float)
+
+    num_x = len(x)
+    if scheme == "forward":
+        grad = (values[1:] - values[0]) / step_size
+    else:
+        grad = (values[1 : num_x + 1] - values[num_x + 1 :]) / (2.0 * step_size)
+
+    return values[0], grad
+
+
+def finite_difference_points(x, step_size, scheme="forward"):
+    """
+    Stack the points a finite-difference gradient evaluates a function at.
+
+    The first row is x. The next ``len(x)`` rows step every parameter forward
+    in turn and, for central differences, the last ``len(x)`` rows step every
+    parameter backward.
+    """
+    if scheme not in ("forward", "central"):
+        raise ValueError(f"Finite difference scheme {scheme} is not supported!")
+
+    # NOTE: We copy x because NLOpt makes x a read-only vector
+    x = np.array(x, dtype=float)
+    steps = step_size * np.eye(len(x))
+    if scheme == "forward":
+        return np.vstack((x, x + steps))
+
+    return np.vstack((x, x + steps, x - steps))
 
 
 # ------------------------------------------------------------------------------
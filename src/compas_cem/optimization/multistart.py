@@ -0,0 +1,194 @@
+from timeit import default_timer as timer
+
+import numpy as np
+
+from compas_cem.optimization.pool import process_pool
+
+__all__ = ["sample_uniform", "sample_latin_hypercube", "SAMPLERS"]
+
+# the problem held by a worker process of a multistart optimization
+_problem = {}
+
+# ------------------------------------------------------------------------------
+# Samplers
+# ------------------------------------------------------------------------------
+
+
+def sample_uniform(num_samples, bounds_low, bounds_up, rng):
+    """
+    Draw parameter vectors uniformly at random within their bounds.
+
+    Parameters
+    ----------
+    num_samples :
+        The number of parameter vectors to draw.
+    bounds_low :
+        The lower bound of every parameter.
+    bounds_up :
+        The upper bound of every parameter.
+    rng :
+        A numpy random number generator.
+
+    Returns
+    -------
+    samples :
+        A samples by parameters array.
+    """
+    bounds_low = np.asarray(bounds_low, dtype=float)
+    bounds_up = np.asarray(bounds_up, dtype=float)
+    unit = rng.random((num_samples, len(bounds_low)))
+
+    return bounds_low + unit * (bounds_up - bounds_low)
+
+
+def sample_latin_hypercube(num_samples, bounds_low, bounds_up, rng):
+    """
+    Draw parameter vectors within their bounds by latin hypercube sampling.
+
+    Parameters
+    ----------
+    num_samples :
+        The number of parameter vectors to draw.
+    bounds_low :
+        The lower bound of every parameter.
+    bounds_up :
+        The upper bound of every parameter.
+    rng :
+        A numpy random number generator.
+
+    Returns
+    -------
+    samples :
+        A samples by parameters array.
+
+    Notes
+    -----
+    The range of every parameter is split into as many strata as samples, and
+    every stratum is drawn from once. The samples cover the bounds more evenly
+    than uniform ones do.
+    """
+    bounds_low = np.asarray(bounds_low, dtype=float)
+    bounds_up = np.asarray(bounds_up, dtype=float)
+    num_parameters = len(bounds_low)
+
+    strata = np.argsort(rng.random((num_samples, num_parameters)), axis=0)
+    unit = (strata + rng.random((num_samples, num_parameters))) / num_samples
+
+    return bounds_low + unit * (bounds_up - bounds_low)
+
+
+# the samplers a multistart optimization takes by name
+SAMPLERS = {"uniform": sample_uniform, "lhs": sample_latin_hypercube}
+
+# ------------------------------------------------------------------------------
+# Starts
+# ------------------------------------------------------------------------------
+
+
+def run_starts(optimizer, topology, starts, workers, options):
+    """
+    Run one optimization from every start point, in worker processes.
+
+    Returns one record per start, in the order of the starts. If there is a
+    single worker, the optimizations run in this process.
+    """
+    problem = (optimizer.parameters, optimizer.goals, topology, options)
+
+    if workers == 1:
+        return [_run_start(*problem, x0=x0) for x0 in starts]
+
+    with process_pool(workers, _start_worker, problem) as executor:
+        return list(executor.map(_solve_start, starts))
+
+
+def format_starts(records, best=None):
+    """
+    Format the records of a multistart optimization as a table.
+    """
+    lines = [
+        "{:>6}{:>16}{:>8}{:>10}  {}".format(
+            "start", "penalty", "evals", "time [s]", "status"
+        )
+    ]
+
+    for record in records:
+        if "error" in record:
+            penalty, evals, status = "-", "-", "failed: " + record["error"]
+        else:
+            penalty = "{:.6e}".format(record["penalty"])
+            evals, status = record["evals"], record["status"]
+        line = "{:>6}{:>16}{:>8}{:>10.3f}  {}".format(
+            record["start"], penalty, evals, record["time"], status
+        )
+        if record["start"] == best:
+            line += "  *"
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+# ------------------------------------------------------------------------------
+# Workers
+# ------------------------------------------------------------------------------
+
+
+def _start_worker(parameters, goals, topology, options):
+    """
+    Keep the problem of a multistart optimization in a worker process.
+    """
+    _problem["problem"] = (parameters, goals, topology, options)
+
+
+def _solve_start(x0):
+    """
+    Run the optimization from one start point in a worker process.
+    """
+    return _run_start(*_problem["problem"], x0=x0)
+
+
+def _run_start(parameters, goals, topology, options, x0):
+    """
+    Run the optimization from one start point and record how it ended.
+
+    A failed optimization is recorded with its error, so it does not take the
+    other starts down with it.
+    """
+    from compas_cem.optimization import Optimizer
+
+    optimizer = Optimizer()
+    optimizer.parameters = parameters
+    optimizer.goals = goals
+
+    record = {"x0": np.array(x0)}
+    start = timer()
+    try:
+        optimizer.solve(topology.copy(), x0=x0, verbose=False, **options)
+    except Exception as error:
+        record["error"] = "{}: {}".format(type(error).__name__, error).rstrip(": ")
+    record["time"] = timer() - start
+
+    if "error" in record:
+        return record
+
+    # the runtime errors of the optimization algorithm end in a plain solve
+    if optimizer.x_opt is None:
+        record["error"] = "The optimization algorithm failed"
+        return record
+
+    record["x_opt"] = np.array(optimizer.x_opt)
+    record["penalty"] = float(optimizer.penalty)
+    record["status"] = optimizer.status
+    record["evals"] = optimizer.evals
+    record["gradient"] = np.array(optimizer.gradient)
+    record["state"] = optimizer._state_opt
+
+    return record
+
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+
+
+if __name__ == "__main__":
+    pass
@@ -1,4 +1,4 @@
-__all__ = ["objective_function_numpy"]
+__all__ = ["objective_function_numpy", "objective_function_value_grad"]
 
 
 def objective_function_numpy(x, grad, x_func, grad_func):
@@ -11,6 +11,23 @@ def objective_function_numpy(x, grad, x_func, grad_func):
     return fx
 
 
+def objective_function_value_grad(x, grad, value_grad_func, value_func=None):
+    """
+    Evaluate the objective function and its gradient from a single pass.
+    This function updates grad in place.
+    If no gradient is asked for, only value_func is evaluated, if given.
+    """
+    if grad.size == 0 and value_func is not None:
+        return value_func(x)
+
+    fx, gx = value_grad_func(x)
+
+    if grad.size > 0:
+        grad[:] = gx
+
+    return fx
+
+
 # ------------------------------------------------------------------------------
 # Main
 # ------------------------------------------------------------------------------
@@ -1,18 +1,32 @@
+import os
 from functools import partial
 from time import time
 
 import autograd.numpy as np
-from autograd import grad as agrad
+import numpy as onp
+from autograd import value_and_grad
+from autograd.tracer import getval
 from nlopt import RoundoffLimited
 
 from compas_cem.data import Data
+from compas_cem.diagrams import FormDiagram
+from compas_cem.equilibrium import EquilibriumState
+from compas_cem.equilibrium import EquilibriumStructure
 from compas_cem.equilibrium import static_equilibrium
-from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy
-from compas_cem.optimization import grad_autograd
-from compas_cem.optimization import grad_finite_differences
+from compas_cem.equilibrium.batch_numpy import equilibrium_arrays_batch_numpy
+from compas_cem.equilibrium.force_numpy import equilibrium_arrays_numpy
+from compas_cem.equilibrium.force_numpy import equilibrium_parameters_numpy
+from compas_cem.equilibrium.force_numpy import warm_start_numpy
+from compas_cem.optimization import EvaluationCache
+from compas_cem.optimization import EvaluationPool
+from compas_cem.optimization import compile_goals
 from compas_cem.optimization import nlopt_solver
 from compas_cem.optimization import nlopt_status
-from compas_cem.optimization import objective_function_numpy
+from compas_cem.optimization import objective_function_value_grad
+from compas_cem.optimization import value_grad_finite_differences
+from compas_cem.optimization.multistart import SAMPLERS
+from compas_cem.optimization.multistart import format_starts
+from compas_cem.optimization.multistart import run_starts
 from compas_cem.optimization.parameters import EdgeParameter
 from compas_cem.optimization.parameters import NodeParameter
 
@@ -41,9 +55,22 @@ class Optimizer(Data):
         self.gradient_norm = None
         self.status = None
 
+        self.cache = None
+        self.cache_hits = None
+        self.cache_misses = None
+
         self._gkey = -1
         self._pkey = -1
 
+        self._states = {}
+        self._initial_state = None
+        self._state_opt = None
+        self._warm_start = False
+
+        self.starts = None
+
+        self._goalsets = None
+
     # ------------------------------------------------------------------------------
     # Counters
     # ------------------------------------------------------------------------------
@@ -89,6 +116,7 @@ class Optimizer(Data):
         """
         self._gkey += 1
         self.goals[self._gkey] = goal
+        self._goalsets = None
 
     def remove_goal(self, gkey):
         """
@@ -97,29 +125,27 @@ class Optimizer(Data):
         if gkey not in self.goals:
             raise KeyError("Goals not found on object key: {}".format(gkey))
         del self.goals[gkey]
+        self._goalsets = None
 
     # ------------------------------------------------------------------------------
     # Objective Function
     # ------------------------------------------------------------------------------
 
-    def objective_func(self, topology, grad_func, tmax, eta):
+    def objective_func(self, topology, value_grad_func, value_func=None):
         """
         The objective function to minimize.
+        Its value and its gradient come out of a single evaluation.
+        If given, value_func evaluates the value alone when no gradient is asked.
         """
-        f = objective_function_numpy
-        x_func = partial(self._optimize_form, topology=topology, tmax=tmax, eta=eta)
-        return partial(f, x_func=x_func, grad_func=grad_func)
-
-    # ------------------------------------------------------------------------------
-    # Gradient Function
-    # ------------------------------------------------------------------------------
-
-    def gradient_func(self, grad_f, topology, tmax, eta, step_size):
-        """
-        The objective function to calculate gradients from.
-        """
-        x_func = partial(self._optimize_form, topology=topology, tmax=tmax, eta=eta)
-        return partial(grad_f, x_func=x_func, step_size=step_size)
+        f = objective_function_value_grad
+        value_grad_func = partial(
+            self._evaluate, topology=topology, value_grad_func=value_grad_func
+        )
+        if value_func is not None:
+            value_func = partial(
+                self._evaluate_value, topology=topology, value_func=value_func
+            )
+        return partial(f, value_grad_func=value_grad_func, value_func=value_func)
 
     # ---------------------- --------------------------------------------------------
     # Solver
@@ -137,6 +163,12 @@ class Optimizer(Data):
         tmax=100,
         eta=1e-6,
         verbose=False,
+        cache_size=128,
+        warm_start=True,
+        fd_scheme="forward",
+        fd_parallel=None,
+        fd_workers=None,
+        x0=None,
     ):
         """
         Solve a constrained form-finding problem using gradient-based optimization.
@@ -164,6 +196,12 @@ class Optimizer(Data):
 
             - AD: Automatic differentiation
             - FD: Finite differences
+            - JAX: Automatic differentiation through the compiled JAX backend.
+              It requires the optional ``jax`` extra.
+            - ADJOINT: Implicit differentiation of the converged equilibrium
+              with the JAX backend. Its cost does not grow with the number of
+              iterations the form-finding algorithm takes to converge.
+              It requires the optional ``jax`` extra.
 
             Defaults to "AD".
         iters : ``int``, optional
@@ -190,6 +228,48 @@ class Optimizer(Data):
         verbose : ``bool``, optional
             A flag to prints statistics of the optimization process.
             Defaults to ``True``.
+        cache_size : ``int``, optional
+            The number of evaluations of the objective function to memoize.
+            A parameter vector the optimization algorithm visits again is not
+            evaluated twice, and the form diagram of the optimum is built from
+            its memoized equilibrium state. The cache statistics are stored in
+            ``cache_hits`` and ``cache_misses`` after solving. If ``0``, nothing
+            is memoized, which bounds the memory of a long optimization, and
+            the optimum is evaluated once more for its gradient and its form.
+            Defaults to ``128``.
+        warm_start : ``bool``, optional
+            A flag to warm start the form-finding algorithm from the equilibrium
+            state of the previous evaluation. Small steps in the parameters then
+            take a handful of iterations to converge. Only the ``AD`` and ``FD``
+            gradient methods warm start.
+            Defaults to ``True``.
+        fd_scheme : ``str``, optional
+            The finite differences to approximate the gradient with if
+            ``grad="FD"``, either ``"forward"`` or ``"central"``. Central
+            differences take twice as many evaluations, and their error shrinks
+            with the square of the step size instead of with the step size.
+            Defaults to ``"forward"``.
+        fd_parallel : ``str``, optional
+            How to run the evaluations of a finite-difference gradient if
+            ``grad="FD"``:
+
+            - None: One after the other.
+            - batch: All at once, in a single call to the batched form-finding
+              algorithm.
+            - processes: Split across a pool of worker processes that hold the
+              problem for as long as the optimization runs.
+
+            The batched and the parallel evaluations start the form-finding
+            cold, so they do not warm start.
+            Defaults to ``None``.
+        fd_workers : ``int``, optional
+            The number of worker processes if ``fd_parallel="processes"``.
+            Defaults to one per processor.
+        x0 : ``list``, optional
+            The parameter vector to start the optimization from. The bounds of
+            the parameters stay relative to their values in the topology
+            diagram, and the start point must lie within them. Defaults to
+            those values.
 
         Returns
         -------
@@ -207,36 +287,125 @@ class Optimizer(Data):
         self.check_optimization_sanity()
 
         # compose gradient and objective functions
-        if grad not in ("AD", "FD"):
+        if grad not in ("AD", "FD", "JAX", "ADJOINT"):
             raise ValueError(f"Gradient method {grad} is not supported!")
+        structure = EquilibriumStructure.from_topology_diagram(topology)
+        pool = None
         if grad == "AD":
             if verbose:
                 print("Computing gradients using automatic differentiation!")
             x_func = partial(
-                self._optimize_form, topology=topology.copy(), tmax=tmax, eta=eta
+                self._optimize_form,
+                topology=topology.copy(),
+                structure=structure,
+                tmax=tmax,
+                eta=eta,
             )
-            grad_func = partial(
-                grad_autograd, grad_func=agrad(x_func)
-            )  # x, grad, x_func
+            value_grad_func = value_and_grad(x_func)
+            value_func = x_func
 
         elif grad == "FD":
+            if fd_scheme not in ("forward", "central"):
+                raise ValueError(
+                    f"Finite difference scheme {fd_scheme} is not supported!"
+                )
+            if fd_parallel not in (None, "batch", "processes"):
+                raise ValueError(f"Parallel evaluation {fd_parallel} is not supported!")
             if verbose:
-                print(
-                    f"Warning: Calculating gradients using finite differences with step size {step_size}. This may take a while..."
+                if fd_parallel is None:
+                    print(
+                        f"Warning: Calculating gradients using {fd_scheme} finite differences with step size {step_size}. This may take a while..."
+                    )
+                else:
+                    print(
+                        f"Calculating gradients using {fd_scheme} finite differences with step size {step_size}, evaluated by {fd_parallel}!"
+                    )
+            x_func = partial(
+                self._optimize_form,
+                topology=topology.copy(),
+                structure=structure,
+                tmax=tmax,
+                eta=eta,
+            )
+            map_func = None
+            if fd_parallel == "batch":
+                map_func = partial(
+                    self._optimize_form_batch,
+                    topology=topology.copy(),
+                    structure=structure,
+                    tmax=tmax,
+                    eta=eta,
                 )
-            grad_func = self.gradient_func(
-                grad_finite_differences, topology.copy(), tmax, eta, step_size
+            elif fd_parallel == "processes":
+                pool = EvaluationPool(
+                    self, topology, structure, tmax, eta, workers=fd_workers
+                )
+                map_func = partial(self._optimize_form_pool, pool=pool)
+            value_grad_func = partial(
+                value_grad_finite_differences,
+                x_func=x_func,
+                step_size=step_size,
+                scheme=fd_scheme,
+                map_func=map_func,
+            )
+            value_func = x_func
+
+        elif grad in ("JAX", "ADJOINT"):
+            if verbose:
+                if grad == "JAX":
+                    print("Computing gradients using the JAX backend!")
+                else:
+                    print("Computing gradients using implicit differentiation!")
+            value_grad_func = partial(
+                self._optimize_form_jax,
+                topology=topology.copy(),
+                structure=structure,
+                tmax=tmax,
+                eta=eta,
+                gradient=True,
+                implicit=grad == "ADJOINT",
+            )
+            value_func = partial(
+                self._optimize_form_jax,
+                topology=topology.copy(),
+                structure=structure,
+                tmax=tmax,
+                eta=eta,
             )
 
-        # grad_func = self.gradient_func(grad_func, topology.copy(), tmax, eta, step_size)
-        obj_func = self.objective_func(topology, grad_func, tmax, eta)
+        self.cache = EvaluationCache(cache_size)
+        self._warm_start = warm_start
+        self._initial_state = None
+        obj_func = self.objective_func(topology, value_grad_func, value_func)
 
         # generate optimization variables
         x = self.optimization_parameters(topology)
+        if x0 is not None:
+            x = np.array(x0, dtype=float)
+            if x.shape != (self.number_of_parameters(),):
+                msg = "Expected a start point with {} parameters, got shape {}"
+                raise ValueError(msg.format(self.number_of_parameters(), x.shape))
 
         # extract the lower and upper bounds to optimization variables
         bounds_low, bounds_up = self.optimization_bounds(topology)
 
+        if x0 is not None:
+            outside = np.flatnonzero((x < bounds_low) | (x > bounds_up))
+            if outside.size:
+                tpl = "{} {!r}: {} not in [{}, {}]"
+                misses = [
+                    tpl.format(
+                        self.parameters[pkey].__class__.__name__,
+                        self.parameters[pkey].key(),
+                        x[pkey],
+                        bounds_low[pkey],
+                        bounds_up[pkey],
+                    )
+                    for pkey in outside
+                ]
+                msg = "The start point is out of the bounds of the parameters: {}"
+                raise ValueError(msg.format("; ".join(misses)))
+
         # stack keyword arguments
         hyper_parameters = {
             "f": obj_func,
@@ -253,38 +422,48 @@ class Optimizer(Data):
         solver = nlopt_solver(**hyper_parameters)
 
         # solve optimization problem
-        x_opt = None
-        start = time()
         try:
-            x_opt = solver.optimize(x)
-            if verbose:
-                print("Optimization ended correctly!")
-        except RoundoffLimited:
-            print("Optimization was halted because roundoff errors limited progress")
-            print("Results may still be useful though!")
-            x_opt = self.optimization_parameters(topology)
-        except RuntimeError:
-            print("Optimization failed due to a runtime error!")
-            print(f"Optimization total runtime: {round(time() - start, 4)} seconds")
-            return static_equilibrium(topology)
-
-        # fetch last optimum value of loss function
-        time_opt = time() - start
-        loss_opt = solver.last_optimum_value()
-        evals = solver.get_numevals()
-        status = nlopt_status(solver.last_optimize_result())
-
-        # set optimizer attributes
-        self.time_opt = time_opt
-        self.x_opt = x_opt
-        self.penalty = loss_opt
-        self.evals = evals
-        self.status = status
-
-        # set norm of the gradient
-        # NOTE: np.zeros is a dummy array (signature requirement set by nlopt)
-        self.gradient = grad_func(x_opt, np.zeros(x_opt.size))
-        self.gradient_norm = np.linalg.norm(self.gradient)
+            x_opt = None
+            start = time()
+            try:
+                x_opt = solver.optimize(x)
+                if verbose:
+                    print("Optimization ended correctly!")
+            except RoundoffLimited:
+                print(
+                    "Optimization was halted because roundoff errors limited progress"
+                )
+                print("Results may still be useful though!")
+                x_opt = self.optimization_parameters(topology)
+            except RuntimeError:
+                print("Optimization failed due to a runtime error!")
+                print(f"Optimization total runtime: {round(time() - start, 4)} seconds")
+                return static_equilibrium(topology)
+
+            # fetch last optimum value of loss function
+            time_opt = time() - start
+            loss_opt = solver.last_optimum_value()
+            evals = solver.get_numevals()
+            status = nlopt_status(solver.last_optimize_result())
+
+            # set optimizer attributes
+            self.time_opt = time_opt
+            self.x_opt = x_opt
+            self.penalty = loss_opt
+            self.evals = evals
+            self.status = status
+
+            # set norm of the gradient, reusing the evaluation at x_opt if cached
+            optimum = self._evaluate_entry(x_opt, topology, value_grad_func)
+            self.gradient = optimum["gradient"]
+            self._state_opt = optimum["state"]
+            self.gradient_norm = np.linalg.norm(self.gradient)
+            self.cache_hits = self.cache.hits
+            self.cache_misses = self.cache.misses
+        finally:
+            # the worker processes live as long as the optimization
+            if pool is not None:
+                pool.close()
 
         if verbose:
             print(f"Optimization total runtime: {round(time_opt, 6)} seconds")
@@ -294,10 +473,144 @@ class Optimizer(Data):
                 f"Norm of the gradient of the objective function: {round(self.gradient_norm, 6)}"
             )
             print(f"Optimization status: {status}".format(status))
+            msg = "Evaluation cache: {} hits, {} misses"
+            print(msg.format(self.cache_hits, self.cache_misses))
             print("----------")
 
-        # exit like a champion
-        return static_equilibrium(topology)
+        # exit like a champion, with the form of the optimum state
+        state = EquilibriumState.from_arrays(self._state_opt, structure)
+        form = FormDiagram.from_equilibrium_state(state, structure, topology)
+
+        return form
+
+    def solve_multistart(
+        self,
+        topology,
+        n_starts,
+        sampler="uniform",
+        workers=None,
+        seed=None,
+        verbose=False,
+        **kwargs,
+    ):
+        """
+        Solve a constrained form-finding problem from many start points at once.
+
+        Parameters
+        ----------
+        topology : :class:`compas_cem.diagrams.TopologyDiagram`
+            A topology diagram.
+        n_starts : ``int``
+            The number of optimizations to run. The first one starts from the
+            values of the parameters in the topology diagram, and the others
+            from points drawn within the bounds of the parameters.
+        sampler : ``str`` or ``callable``, optional
+            How to draw the start points:
+
+            - uniform: Uniformly at random.
+            - lhs: By latin hypercube sampling.
+
+            A callable is called as ``sampler(n, bounds_low, bounds_up, rng)``
+            with a numpy random number generator, and returns an ``n`` by
+            parameters array.
+            Defaults to "uniform".
+        workers : ``int``, optional
+            The number of worker processes to run the optimizations in. If
+            ``1``, they run one after the other in this process.
+            Defaults to one per processor.
+        seed : ``int``, optional
+            The seed of the random number generator of the sampler.
+            Defaults to ``None``.
+        verbose : ``bool``, optional
+            A flag to print the summary of the optimizations.
+            Defaults to ``False``.
+        kwargs : ``dict``, optional
+            The options of every optimization, as taken by ``solve``.
+
+        Returns
+        -------
+        form : :class:`compas_cem.diagrams.FormDiagram`
+            The form diagram of the optimization with the lowest penalty.
+        summary : ``str``
+            A table with the penalty, the number of evaluations, the runtime and
+            the status of every optimization.
+
+        Notes
+        -----
+        The attributes of the optimizer and the parameters in the topology
+        diagram are set from the best optimization, as ``solve`` would. The
+        record of every optimization is stored in ``starts``, with its start
+        point ``x0`` and, unless it failed with an ``error``, its ``x_opt``,
+        ``penalty``, ``status`` and ``evals``.
+
+        The workers are started as for finite differences in parallel, so the
+        same constraints on pickling apply. An optimization that fails is
+        recorded with its error instead of stopping the others.
+        """
+        self.check_optimization_sanity()
+
+        if n_starts < 1:
+            raise ValueError(f"Expected at least one start, got {n_starts}")
+        if not callable(sampler):
+            if sampler not in SAMPLERS:
+                raise ValueError(f"Sampler {sampler} is not supported!")
+            sampler = SAMPLERS[sampler]
+        for option in ("x0", "verbose"):
+            if option in kwargs:
+                raise ValueError(f"Option {option} is set per start!")
+
+        x = self.optimization_parameters(topology)
+        bounds_low, bounds_up = self.optimization_bounds(topology)
+
+        starts = [x]
+        if n_starts > 1:
+            if not np.all(np.isfinite(bounds_low) & np.isfinite(bounds_up)):
+                raise ValueError("Sampling start points needs bounded parameters")
+            rng = onp.random.default_rng(seed)
+            samples = sampler(n_starts - 1, bounds_low, bounds_up, rng)
+            starts.extend(onp.clip(samples, bounds_low, bounds_up))
+
+        workers = min(workers or os.cpu_count() or 1, n_starts)
+        records = run_starts(self, topology, starts, workers, kwargs)
+
+        best = None
+        for i, record in enumerate(records):
+            record["start"] = i
+            if "error" in record:
+                continue
+            if best is None or record["penalty"] < records[best]["penalty"]:
+                best = i
+
+        self.starts = records
+        summary = format_starts(records, best)
+
+        if verbose:
+            print("----------")
+            print(
+                f"Multistart optimization with {n_starts} starts on {workers} workers"
+            )
+            print(summary)
+            print("----------")
+
+        if best is None:
+            msg = "All {} optimizations failed. The first one with: {}"
+            raise ValueError(msg.format(n_starts, records[0]["error"]))
+
+        record = records[best]
+        self.x_opt = record["x_opt"]
+        self.penalty = record["penalty"]
+        self.evals = record["evals"]
+        self.status = record["status"]
+        self.time_opt = record["time"]
+        self.gradient = record["gradient"]
+        self.gradient_norm = np.linalg.norm(self.gradient)
+        self._update_parameters(topology, self.x_opt)
+
+        structure = EquilibriumStructure.from_topology_diagram(topology)
+        state = EquilibriumState.from_arrays(record["state"], structure)
+        form = FormDiagram.from_equilibrium_state(state, structure, topology)
+
+        return form, summary
 
     # ------------------------------------------------------------------------------
     # Optimization parameters
@@ -351,29 +664,277 @@ class Optimizer(Data):
                 msg = "Parameter {} is neither a node nor an edge parameter! {}"
                 raise TypeError(msg.format(type(parameter)))
 
+    # ------------------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------------------
+
+    def _evaluate(self, parameters, topology, value_grad_func):
+        """
+        Evaluate the penalty and its gradient, memoized in the evaluation cache.
+        """
+        entry = self._evaluate_entry(parameters, topology, value_grad_func)
+
+        return entry["penalty"], entry["gradient"]
+
+    def _evaluate_value(self, parameters, topology, value_func):
+        """
+        Evaluate the penalty alone, memoized in the evaluation cache.
+        """
+        entry = self._evaluate_entry(parameters, topology, value_func=value_func)
+
+        return entry["penalty"]
+
+    def _evaluate_entry(
+        self, parameters, topology, value_grad_func=None, value_func=None
+    ):
+        """
+        Evaluate the penalty, its gradient and the equilibrium state, memoized.
+
+        The parameters are also written to the topology diagram, so that it
+        always holds the design that was last evaluated.
+
+        If only a value_func is given, the gradient is not evaluated and is
+        stored as ``None``. A later evaluation at the same parameters with a
+        value_grad_func misses the cache and replaces that entry.
+        """
+        self._update_parameters(topology, parameters)
+
+        with_gradient = value_grad_func is not None
+        entry = self.cache.get(parameters, gradient=with_gradient)
+        if entry is None:
+            self._states = {}
+            if with_gradient:
+                penalty, gradient = value_grad_func(parameters)
+                gradient = np.array(gradient)
+            else:
+                penalty, gradient = value_func(parameters), None
+
+            entry = {}
+            entry["penalty"] = penalty
+            entry["gradient"] = gradient
+            entry["state"] = self._states[EvaluationCache.key(parameters)]
+            self.cache.put(parameters, entry)
+            self._states = {}
+
+            # the next evaluation starts where this one converged
+            if self._warm_start:
+                self._initial_state = entry["state"]
+
+        return entry
+
+    def _record_state(self, parameters, state):
+        """
+        Record the equilibrium state found for a parameter vector, unboxed.
+        """
+        names = ("xyz", "forces", "reactions", "residuals")
+        state = {name: np.array(getval(state[name])) for name in names}
+        self._states[EvaluationCache.key(getval(parameters))] = state
+
     # ------------------------------------------------------------------------------
     # Penalty function
     # ------------------------------------------------------------------------------
 
     def _calculate_penalty(self, eq_state):
-        """ """
+        """
+        Add up the penalties of the goals, a goal set at a time where they compile.
+        """
+        goalsets, goals = self._compiled_goals(eq_state)
+
         penalty = 0.0
-        for goal in self.goals.values():
+        for goalset in goalsets:
+            penalty += goalset.penalty(eq_state)
+        for goal in goals:
             penalty += goal.penalty(eq_state)
 
         return penalty
 
+    def _compiled_goals(self, eq_state):
+        """
+        The goals compiled into goal sets against the structure of a state.
+
+        The goal sets are compiled once per structure, and again after a goal
+        is added or removed.
+        """
+        structure = getattr(eq_state, "structure", None)
+        if structure is None:
+            return [], list(self.goals.values())
+
+        if self._goalsets is None or self._goalsets[0] is not structure:
+            goalsets, goals = compile_goals(self.goals.values(), structure)
+            self._goalsets = (structure, goalsets, goals)
+
+        return self._goalsets[1], self._goalsets[2]
+
     # ------------------------------------------------------------------------------
     # Optimization
     # ------------------------------------------------------------------------------
 
-    def _optimize_form(self, parameters, topology, tmax, eta):
+    def _optimize_form(self, parameters, topology, structure, tmax, eta):
         """ """
         self._update_parameters(topology, parameters)
 
-        eq_state = equilibrium_state_numpy(topology, tmax, eta)
+        xyz, lengths, forces, loads, residuals = equilibrium_parameters_numpy(
+            topology, structure
+        )
+
+        # all passes of an evaluation share the same initial state
+        initial_state = self._initial_state
+        if initial_state is not None:
+            xyz, residuals = warm_start_numpy(structure, xyz, residuals, initial_state)
+
+        state = equilibrium_arrays_numpy(
+            structure,
+            xyz,
+            lengths,
+            forces,
+            loads,
+            residuals,
+            tmax=tmax,
+            eta=eta,
+            warm=initial_state is not None,
+        )
+        self._record_state(parameters, state)
+
+        return self._calculate_penalty(EquilibriumState.from_arrays(state, structure))
+
+    def _optimize_form_batch(self, points, topology, structure, tmax, eta):
+        """
+        Calculate the penalty at a stack of parameter vectors at once.
+
+        The forms are found in one call to the batched form-finding kernel. The
+        equilibrium state at the first parameter vector is recorded.
+        """
+        points = np.asarray(points, dtype=float)
+        num_points = len(points)
+
+        self._update_parameters(topology, points[0])
+        xyz, lengths, forces, loads, residuals = equilibrium_parameters_numpy(
+            topology, structure
+        )
+
+        arrays = {}
+        arrays["xyz"] = onp.tile(xyz, (num_points, 1, 1))
+        arrays["lengths"] = onp.tile(lengths, (num_points, 1))
+        arrays["forces"] = onp.tile(forces, (num_points, 1))
+        arrays["loads"] = onp.tile(loads, (num_points, 1, 1))
+
+        for pkey, (name, index) in self._parameter_slots(structure).items():
+            index = index if isinstance(index, tuple) else (index,)
+            arrays[name][(slice(None),) + index] = points[:, pkey]
+
+        state = equilibrium_arrays_batch_numpy(
+            structure,
+            arrays["xyz"],
+            arrays["lengths"],
+            arrays["forces"],
+            arrays["loads"],
+            onp.tile(residuals, (num_points, 1, 1)),
+            tmax=tmax,
+            eta=eta,
+        )
+
+        names = ("xyz", "forces", "reactions", "residuals")
+        penalties = onp.zeros(num_points)
+        for i in range(num_points):
+            state_i = {name: state[name][i] for name in names}
+            if i == 0:
+                self._record_state(points[0], state_i)
+            penalties[i] = self._calculate_penalty(
+                EquilibriumState.from_arrays(state_i, structure)
+            )
+
+        return penalties
+
+    def _optimize_form_pool(self, points, pool):
+        """
+        Calculate the penalty at a stack of parameter vectors in worker processes.
+
+        The equilibrium state at the first parameter vector is recorded.
+        """
+        penalties, state = pool.evaluate(points)
+        self._record_state(points[0], state)
+
+        return penalties
+
+    def _optimize_form_jax(
+        self, parameters, topology, structure, tmax, eta, gradient=False, implicit=False
+    ):
+        """
+        Calculate the penalty of a set of parameters with the JAX backend.
+
+        The form is found by the compiled JAX kernel, and the goals are
+        evaluated with autograd on its output. If ``gradient`` is ``True``,
+        the gradient of the penalty is returned instead, chaining the autograd
+        gradient of the goals into the JAX vector-Jacobian product of the solve.
+        If ``implicit`` is ``True``, that product differentiates the converged
+        equilibrium implicitly.
+        """
+        import jax
+
+        from compas_cem.equilibrium.force_jax import equilibrium_arrays_jax
+        from compas_cem.equilibrium.force_jax import equilibrium_vjp_jax
+
+        self._update_parameters(topology, parameters)
+        arrays = equilibrium_parameters_numpy(topology, structure)
+
+        # the kernels run on 64-bit floats, enabled only while they run
+        with jax.enable_x64(True):
+            if gradient:
+                state, vjp = equilibrium_vjp_jax(
+                    structure, *arrays, tmax=tmax, eta=eta, implicit=implicit
+                )
+            else:
+                state = equilibrium_arrays_jax(structure, *arrays, tmax=tmax, eta=eta)
+
+            names = ("xyz", "forces", "reactions", "residuals")
+            state = {name: np.asarray(state[name]) for name in names}
+        self._record_state(parameters, state)
+
+        def penalty(state):
+            return self._calculate_penalty(
+                EquilibriumState.from_arrays(state, structure)
+            )
+
+        if not gradient:
+            return penalty(state)
+
+        value, cotangents = value_and_grad(penalty)(state)
+        with jax.enable_x64(True):
+            pullbacks = [np.asarray(pullback) for pullback in vjp(cotangents)]
+        gradients = dict(zip(("xyz", "lengths", "forces", "loads"), pullbacks))
+
+        grad = np.zeros(self.number_of_parameters())
+        for pkey, (name, index) in self._parameter_slots(structure).items():
+            grad[pkey] = gradients[name][index]
+
+        return value, grad
+
+    def _parameter_slots(self, structure):
+        """
+        Locate every optimization parameter in the arrays of a structure.
+        """
+        slots = {}
+        for pkey, parameter in self.parameters.items():
+            name = parameter.attr_name()
+            key = parameter.key()
+
+            if isinstance(parameter, NodeParameter):
+                node = structure.node_index[key]
+                if name in ("x", "y", "z"):
+                    slots[pkey] = ("xyz", (node, "xyz".index(name)))
+                else:
+                    slots[pkey] = ("loads", (node, ("qx", "qy", "qz").index(name)))
+            elif isinstance(parameter, EdgeParameter):
+                u, v = key
+                edge = structure.edge_index.get((u, v))
+                if edge is None:
+                    edge = structure.edge_index[(v, u)]
+                slots[pkey] = ({"length": "lengths", "force": "forces"}[name], edge)
+            else:
+                msg = "Parameter {} is neither a node nor an edge parameter! {}"
+                raise TypeError(msg.format(type(parameter)))
 
-        return self._calculate_penalty(eq_state)
+        return slots
 
     # ------------------------------------------------------------------------------
     # Sanity Check
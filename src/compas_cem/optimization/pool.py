@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+__all__ = ["EvaluationPool"]
+
+# the optimization problem held by a worker process
+_problem = {}
+
+# ------------------------------------------------------------------------------
+# Evaluation pool
+# ------------------------------------------------------------------------------
+
+
+class EvaluationPool(object):
+    """
+    Worker processes that evaluate the penalty of an optimization problem.
+
+    Parameters
+    ----------
+    optimizer :
+        The optimizer with the parameters and the goals of the problem.
+    topology :
+        The topology diagram the problem is posed on.
+    structure :
+        The equilibrium structure of the topology diagram.
+    tmax :
+        Maximum number of iterations of the form-finding algorithm.
+    eta :
+        Distance threshold that marks equilibrium convergence.
+    workers :
+        The number of worker processes. If `None`, one per processor.
+
+    Notes
+    -----
+    Every worker receives the problem once, when it starts, and keeps it for
+    as long as the pool lives. Only the points to evaluate and their penalties
+    travel between processes after that.
+
+    The workers are forked where the platform can. Elsewhere, they are spawned,
+    so the parameters and the goals must pickle and the script that optimizes
+    must guard its entry point with ``if __name__ == "__main__":``. The workers
+    run the numpy form-finding only, so they are safe to fork once JAX, which
+    warns against forking, has been imported.
+
+    Every evaluation starts the form-finding from the topology diagram, so the
+    penalties of a point do not depend on the worker that evaluates it.
+    """
+
+    def __init__(
+        self, optimizer, topology, structure, tmax=100, eta=1e-6, workers=None
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = process_pool(
+            self.workers,
+            _start_worker,
+            (
+                optimizer.parameters,
+                optimizer.goals,
+                topology.copy(),
+                structure,
+                tmax,
+                eta,
+            ),
+        )
+
+    def evaluate(self, points):
+        """
+        Evaluate the penalty at every point, split across the workers.
+
+        Parameters
+        ----------
+        points :
+            A stack of parameter vectors, one per row.
+
+        Returns
+        -------
+        penalties :
+            The penalty at every point.
+        state :
+            The equilibrium state at the first point, as arrays.
+        """
+        points = np.asarray(points, dtype=float)
+        chunks = np.array_split(points, min(self.workers, len(points)))
+
+        futures = []
+        for i, chunk in enumerate(chunks):
+            futures.append(self._executor.submit(_evaluate_points, chunk, i == 0))
+
+        penalties = []
+        state = None
+        for future in futures:
+            chunk_penalties, chunk_state = future.result()
+            penalties.extend(chunk_penalties)
+            if chunk_state is not None:
+                state = chunk_state
+
+        return np.array(penalties), state
+
+    def close(self):
+        """
+        Stop the worker processes.
+        """
+        self._executor.shutdown()
+
+    # ------------------------------------------------------------------------------
+    # Magic methods
+    # ------------------------------------------------------------------------------
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return "{}(workers={})".format(self.__class__.__name__, self.workers)
+
+
+# ------------------------------------------------------------------------------
+# Process pools
+# ------------------------------------------------------------------------------
+
+
+def process_pool(workers, initializer, initargs):
+    """
+    Start worker processes that each run an initializer once.
+
+    The workers are forked where the platform can, and spawned elsewhere.
+    """
+    if workers < 1:
+        raise ValueError("A pool needs at least one worker, got {}".format(workers))
+
+    context = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+# ------------------------------------------------------------------------------
+# Workers
+# ------------------------------------------------------------------------------
+
+
+def _start_worker(parameters, goals, topology, structure, tmax, eta):
+    """
+    Keep the optimization problem in a worker process.
+    """
+    from compas_cem.optimization import Optimizer
+
+    # every evaluation in a worker starts cold
+    optimizer = Optimizer()
+    optimizer.parameters = parameters
+    optimizer.goals = goals
+
+    _problem["optimizer"] = optimizer
+    _problem["topology"] = topology
+    _problem["structure"] = structure
+    _problem["tmax"] = tmax
+    _problem["eta"] = eta
+
+
+def _evaluate_points(points, first):
+    """
+    Evaluate the penalty at a chunk of points in a worker process.
+
+    If the chunk is the first one, the equilibrium state at its first point is
+    returned too.
+    """
+    optimizer = _problem["optimizer"]
+
+    penalties = []
+    state = None
+    for i, point in enumerate(points):
+        optimizer._states = {}
+        penalty = optimizer._optimize_form(
+            point,
+            _problem["topology"],
+            _problem["structure"],
+            _problem["tmax"],
+            _problem["eta"],
+        )
+        penalties.append(float(penalty))
+        if first and i == 0:
+            state = optimizer._states.popitem()[1]
+
+    optimizer._states = {}
+
+    return penalties, state
+
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+
+
+if __name__ == "__main__":
+    pass
@@ -624,7 +624,7 @@ class TopologyPlotterObject(DiagramPlotterObject):
         colors = {}
 
         for edge in topology.edges():
-            if topology.is_auxiliary_trail_edge(edge):
+            if topology.edge_class(edge) == "auxiliary_trail":
                 colors[edge] = cmap["auxiliary_trail"]
                 continue
 
@@ -643,16 +643,16 @@ class TopologyPlotterObject(DiagramPlotterObject):
         have been built, because the distinction is drawn from the sequence the
         two end nodes belong to.
         """
-        topology = self.topology
         cmap = self.edge_typecolors
+        edge_class = self.topology.edge_class(edge)
 
-        if topology.is_auxiliary_trail_edge(edge):
+        if edge_class == "auxiliary_trail":
             return cmap["auxiliary_trail"]
 
-        if topology.is_trail_edge(edge):
+        if edge_class == "trail":
             return cmap["edge_trail"]
 
-        if topology.has_trails() and topology.is_indirect_deviation_edge(edge):
+        if edge_class == "indirect_deviation":
             return cmap["edge_deviation_indirect"]
 
         return cmap["edge_deviation"]
@@ -540,11 +540,12 @@ class TopologyDiagramObject(DiagramObject):
         colors = {}
 
         for edge in topology.edges():
-            if topology.is_auxiliary_trail_edge(edge):
+            edge_class = topology.edge_class(edge)
+            if edge_class == "auxiliary_trail":
                 colors[edge] = self.edgecolor_auxiliary
-            elif topology.is_trail_edge(edge):
+            elif edge_class == "trail":
                 colors[edge] = self.edgecolor_trail
-            elif topology.has_trails() and topology.is_indirect_deviation_edge(edge):
+            elif edge_class == "indirect_deviation":
                 colors[edge] = self.edgecolor_deviation_indirect
             else:
                 colors[edge] = self.edgecolor_deviation
@@ -22,17 +22,54 @@ Two environment variables support comparison runs:
 
 Solver returns are intercepted rather than read out of each example's globals,
 because several examples rebind `form` to a translated copy before plotting.
+
+Performance is captured alongside on request. `--perf` times every example
+`--repeat` times and writes a performance baseline to `perf/<label>.json`,
+labelled by the package version and the commit it was measured on, like
+`0.8.6+g1a2b3c4`, unless `--label` says otherwise. The label ends in `.dirty`
+if the package or the examples have uncommitted changes:
+
+    PYTHONPATH=src MPLBACKEND=Agg python tests/baseline/capture.py --perf
+
+A performance baseline holds, per example:
+
+    time          the best wall time of the whole example, in seconds
+    solve_time    the best time spent in `static_equilibrium` and
+                  `Optimizer.solve`, the part a backend change moves
+    evals         the evaluations of every optimization, added up
+    iterations    the iterations of every form-finding, added up, including
+                  the ones an optimization runs per evaluation
+    peak_memory   the peak of the memory traced by `tracemalloc`, in bytes,
+                  measured in a run of its own so it does not slow the timings
+
+`--compare` captures both again and checks them against the committed
+fixtures and a performance baseline, without writing anything:
+
+    PYTHONPATH=src MPLBACKEND=Agg python tests/baseline/capture.py --compare <baseline>
+
+A metric regresses when it grows by more than `--threshold`, relative to the
+baseline, and by more than the noise floor of its kind. A fixture deviates when
+any number in it moves by more than `--atol`. Either exits with status 1. Timings
+only compare across runs on the same machine; the counts compare anywhere.
 """
 
+import argparse
 import json
 import os
+import platform
 import runpy
+import subprocess
 import sys
 import traceback
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+from timeit import default_timer as timer
 
 HERE = os.path.dirname(os.path.abspath(__file__))
 REPO = os.path.dirname(os.path.dirname(HERE))
 EXAMPLES = os.path.join(REPO, "examples")
+PERF = os.path.join(HERE, "perf")
 
 SCRIPTS = [
     "01_quick_start.py",
@@ -42,6 +79,18 @@ SCRIPTS = [
     "05_tensegrity_wheel_2d.py",
 ]
 
+# bumped whenever the layout of a performance baseline changes
+PERF_FORMAT = 1
+
+# the performance metrics, with the change below which they count as noise
+METRICS = {
+    "time": 1e-3,
+    "solve_time": 1e-3,
+    "evals": 0,
+    "iterations": 0,
+    "peak_memory": 64 * 1024,
+}
+
 
 def form_state(form):
     """
@@ -95,10 +144,29 @@ def originals():
     # examples end in plotter.show(), which would block
     Plotter.show = lambda self, *args, **kwargs: None
 
-    return eq, Optimizer, eq.static_equilibrium, Optimizer.solve
-
-
-def install_probes(captured, eq, optimizer_cls, real_static, real_solve):
+    # the optimizer solves once per evaluation through its own import
+    optimizer_module = sys.modules[Optimizer.__module__]
+
+    return (
+        eq,
+        Optimizer,
+        optimizer_module,
+        eq.static_equilibrium,
+        Optimizer.solve,
+        optimizer_module.equilibrium_arrays_numpy,
+    )
+
+
+def install_probes(
+    captured,
+    perf,
+    eq,
+    optimizer_cls,
+    optimizer_module,
+    real_static,
+    real_solve,
+    real_arrays,
+):
     """
     Wrap the solver entry points so their results are recorded on the way out.
 
@@ -106,7 +174,10 @@ def install_probes(captured, eq, optimizer_cls, real_static, real_solve):
     """
 
     def static_equilibrium(topology, *args, **kwargs):
+        start = timer()
         form = real_static(topology, *args, **kwargs)
+        perf["solve_time"] += timer() - start
+        perf["iterations"] += form.attributes["iterations"]
         captured.setdefault("static_equilibrium", []).append(form_state(form))
 
         return form
@@ -115,59 +186,383 @@ def install_probes(captured, eq, optimizer_cls, real_static, real_solve):
         forced = os.environ.get("COMPAS_CEM_FORCE_EPS")
         if forced is not None:
             kwargs["eps"] = float(forced)
+        start = timer()
         form = real_solve(self, *args, **kwargs)
+        perf["solve_time"] += timer() - start
+        perf["evals"] += getattr(self, "evals", 0) or 0
         captured.setdefault("solve", []).append(
             {"form": form_state(form), "optimizer": optimizer_state(self)}
         )
 
         return form
 
+    def equilibrium_arrays_numpy(*args, **kwargs):
+        state = real_arrays(*args, **kwargs)
+        perf["iterations"] += state["iterations"]
+
+        return state
+
     eq.static_equilibrium = static_equilibrium
     optimizer_cls.solve = solve
+    optimizer_module.equilibrium_arrays_numpy = equilibrium_arrays_numpy
+
 
+def run_example(script, pristine, quiet=False, trace=False):
+    """
+    Run one example with probes installed.
+
+    Returns its status, its error, what the probes captured and its raw
+    performance counters.
+    """
+    captured = {}
+    perf = {"time": 0.0, "solve_time": 0.0, "evals": 0, "iterations": 0}
+    install_probes(captured, perf, *pristine)
+
+    # examples resolve their data files relative to their own location
+    cwd = os.getcwd()
+    os.chdir(EXAMPLES)
+    if trace:
+        tracemalloc.start()
+    start = timer()
+    try:
+        with redirect_stdout(StringIO() if quiet else sys.stdout):
+            runpy.run_path(os.path.join(EXAMPLES, script), run_name="__main__")
+        status, error = "ok", None
+    except Exception:
+        status = "error"
+        error = traceback.format_exc().splitlines()[-1]
+    finally:
+        perf["time"] = timer() - start
+        if trace:
+            perf["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        os.chdir(cwd)
+
+    return status, error, captured, perf
+
+
+def measure(script, pristine, repeat):
+    """
+    Run one example `repeat` times for its timings, and once more for its memory.
+
+    Only the first run prints. The counts and the captured output are the ones
+    of the last timed run.
+    """
+    runs = [run_example(script, pristine, quiet=i > 0) for i in range(repeat)]
+    status, error, captured, perf = runs[-1]
+
+    metrics = {}
+    metrics["time"] = min(run[3]["time"] for run in runs)
+    metrics["solve_time"] = min(run[3]["solve_time"] for run in runs)
+    metrics["evals"] = perf["evals"]
+    metrics["iterations"] = perf["iterations"]
+
+    traced = run_example(script, pristine, quiet=True, trace=True)
+    metrics["peak_memory"] = traced[3]["peak_memory"]
+
+    return status, error, captured, metrics
+
+
+# ------------------------------------------------------------------------------
+# Performance baselines
+# ------------------------------------------------------------------------------
+
+
+def environment():
+    """
+    Describe the machine and the packages a performance baseline was taken with.
+    """
+    import numpy
+
+    import compas_cem
+
+    return {
+        "compas_cem": compas_cem.__version__,
+        "commit": revision(),
+        "numpy": numpy.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def revision():
+    """
+    The commit the repository is at, marked dirty if the package or the
+    examples have uncommitted changes, or `None` outside of a git checkout.
+    """
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO, text=True
+        ).strip()
+        changes = subprocess.check_output(
+            ["git", "status", "--porcelain", "--", "src", "examples"],
+            cwd=REPO,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return commit + (".dirty" if changes else "")
+
+
+def default_label():
+    """
+    The label of a performance baseline: the package version and the commit.
+    """
+    import compas_cem
+
+    commit = revision()
+    if commit is None:
+        return compas_cem.__version__
+
+    return "{}+g{}".format(compas_cem.__version__, commit)
+
+
+def write_perf(path, label, repeat, examples):
+    """
+    Write a versioned performance baseline.
+    """
+    payload = {
+        "format": PERF_FORMAT,
+        "label": label,
+        "repeat": repeat,
+        "environment": environment(),
+        "examples": examples,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def read_perf(path):
+    """
+    Read a performance baseline, refusing the layouts this script cannot read.
+    """
+    with open(path) as f:
+        payload = json.load(f)
+
+    if payload.get("format") != PERF_FORMAT:
+        msg = "{} has format {}, expected {}"
+        raise ValueError(msg.format(path, payload.get("format"), PERF_FORMAT))
+
+    return payload
+
+
+# ------------------------------------------------------------------------------
+# Comparisons
+# ------------------------------------------------------------------------------
+
+
+def deviation(reference, captured, path=""):
+    """
+    The largest absolute difference between the numbers of two fixtures.
+
+    Returns the difference and the path to the value it was found at.
+    Structural mismatches, like a missing key, a list of another length, a
+    differing string or a number that is NaN in only one of them, count as an
+    infinite deviation. Numbers that are NaN in both are equal.
+    """
+    if isinstance(reference, dict) and isinstance(captured, dict):
+        if set(reference) != set(captured):
+            return float("inf"), path
+        pairs = [(reference[k], captured[k], path + "/" + k) for k in reference]
+    elif isinstance(reference, list) and isinstance(captured, list):
+        if len(reference) != len(captured):
+            return float("inf"), path
+        pairs = [
+            (a, b, "{}[{}]".format(path, i))
+            for i, (a, b) in enumerate(zip(reference, captured))
+        ]
+    else:
+        numbers = (int, float)
+        if isinstance(reference, numbers) and isinstance(captured, numbers):
+            if reference != reference and captured != captured:
+                return 0.0, path
+            difference = abs(reference - captured)
+            if difference != difference:
+                return float("inf"), path
+            return difference, path
+        return (0.0 if reference == captured else float("inf")), path
+
+    deviations = [deviation(a, b, p) for a, b, p in pairs]
+    return max(deviations, key=lambda item: item[0], default=(0.0, path))
+
+
+def compare_perf(baseline, examples, threshold):
+    """
+    Compare the metrics of every example with a performance baseline.
+
+    Returns one row per example and metric, with the baseline value, the new
+    value, their ratio and whether the new value regressed.
+    """
+    rows = []
+    for script, metrics in examples.items():
+        reference = baseline["examples"].get(script)
+        if reference is None:
+            continue
+        for name, floor in METRICS.items():
+            old, new = reference.get(name), metrics.get(name)
+            if old is None or new is None:
+                continue
+            ratio = new / old if old else (1.0 if not new else float("inf"))
+            regressed = new > old * (1.0 + threshold) and new - old > floor
+            rows.append((script, name, old, new, ratio, regressed))
+
+    return rows
+
+
+def format_value(name, value):
+    """
+    Format a metric in its unit.
+    """
+    if name in ("time", "solve_time"):
+        return "{:.2f} ms".format(1e3 * value)
+    if name == "peak_memory":
+        return "{:.1f} KiB".format(value / 1024.0)
+    return str(value)
+
+
+# ------------------------------------------------------------------------------
+# Main
+# ------------------------------------------------------------------------------
+
+
+def parse_args(argv=None):
+    """
+    Parse the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Capture, or compare against, the baselines of the examples."
+    )
+    parser.add_argument(
+        "--perf",
+        action="store_true",
+        help="also write a performance baseline to perf/<label>.json",
+    )
+    parser.add_argument(
+        "--label",
+        default=None,
+        help="the label of the performance baseline, the version and commit by default",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="the number of timed runs of every example",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        default=None,
+        help="compare against the fixtures and this performance baseline instead",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="the relative growth of a metric that counts as a regression",
+    )
+    parser.add_argument(
+        "--atol",
+        type=float,
+        default=1e-6,
+        help="the absolute deviation of a fixture number that counts as a change",
+    )
+
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
-def main():
     sys.path.insert(0, os.path.join(REPO, "src"))
     suffix = os.environ.get("COMPAS_CEM_SUFFIX", "")
     pristine = originals()
 
+    baseline = read_perf(args.compare) if args.compare else None
+    timed = args.perf or baseline is not None
+    forced = "_forced" if os.environ.get("COMPAS_CEM_FORCE_EPS") is not None else ""
+
     failed = []
+    deviations = {}
+    examples = {}
     for script in SCRIPTS:
-        captured = {}
-        install_probes(captured, *pristine)
-
-        # examples resolve their data files relative to their own location
-        cwd = os.getcwd()
-        os.chdir(EXAMPLES)
-        try:
-            runpy.run_path(os.path.join(EXAMPLES, script), run_name="__main__")
-            status, error = "ok", None
-        except Exception:
-            status = "error"
-            error = traceback.format_exc().splitlines()[-1]
+        if timed:
+            status, error, captured, metrics = measure(script, pristine, args.repeat)
+            examples[script] = metrics
+        else:
+            status, error, captured, _ = run_example(script, pristine)
+        if status != "ok":
             failed.append(script)
-        finally:
-            os.chdir(cwd)
 
-        name = os.path.splitext(script)[0] + suffix
+        name = os.path.splitext(script)[0]
         payload = {
             "example": script,
             "status": status,
             "error": error,
             "captured": captured,
         }
-        with open(os.path.join(HERE, name + ".json"), "w") as f:
-            json.dump(payload, f, indent=2, sort_keys=True)
-            f.write("\n")
+
+        if baseline is not None:
+            with open(os.path.join(HERE, name + forced + ".json")) as f:
+                reference = json.load(f)
+            # round trip, so tuples and keys compare as the fixture stores them
+            payload = json.loads(json.dumps(payload, sort_keys=True))
+            deviations[script] = deviation(reference, payload)
+        else:
+            with open(os.path.join(HERE, name + suffix + ".json"), "w") as f:
+                json.dump(payload, f, indent=2, sort_keys=True)
+                f.write("\n")
 
         counts = {k: len(v) for k, v in captured.items()}
         print(f"{script:34s} {status:6s} {counts} {error or ''}")
 
-    print(f"\nwrote {len(SCRIPTS)} fixtures to {HERE}")
+    if baseline is None:
+        print(f"\nwrote {len(SCRIPTS)} fixtures to {HERE}")
+
+    if args.perf:
+        label = args.label or default_label()
+        path = os.path.join(PERF, label + ".json")
+        write_perf(path, label, args.repeat, examples)
+        print(f"wrote performance baseline {label} to {path}")
+
     if failed:
         print("FAILED:", failed)
 
-    return 1 if failed else 0
+    if baseline is None:
+        return 1 if failed else 0
+
+    print(f"\nfixtures, against atol {args.atol:g}:")
+    deviated = []
+    for script, (value, path) in deviations.items():
+        flag = "DEVIATES at " + path if value > args.atol else ""
+        print(f"{script:34s} {value:12.3g}  {flag}")
+        if flag:
+            deviated.append(script)
+
+    print(f"\nperformance, against {baseline['label']} at +{args.threshold:.0%}:")
+    regressions = []
+    for script, name, old, new, ratio, regressed in compare_perf(
+        baseline, examples, args.threshold
+    ):
+        flag = "REGRESSION" if regressed else ""
+        old, new = format_value(name, old), format_value(name, new)
+        print(f"{script:34s} {name:12s} {old:>14s} {new:>14s} {ratio:8.2f}x  {flag}")
+        if regressed:
+            regressions.append((script, name))
+
+    if deviated:
+        print("\nDEVIATED:", deviated)
+    if regressions:
+        print("REGRESSED:", regressions)
+
+    return 1 if failed or deviated or regressions else 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+import numpy as np
+
+from compas_cem.benchmarks import BENCHMARKS
+from compas_cem.benchmarks import OPERATIONS
+from compas_cem.benchmarks import benchmark_optimizer
+from compas_cem.benchmarks import braced_tower
+from compas_cem.benchmarks import gridshell
+from compas_cem.benchmarks import run_benchmarks
+from compas_cem.benchmarks import tensegrity_wheel
+from compas_cem.benchmarks import tree
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium import static_equilibrium_numpy
+
+# ==============================================================================
+# Tests - Generators
+# ==============================================================================
+
+
+@pytest.mark.parametrize(
+    "generator, size, num_nodes, auxiliary_trails",
+    [
+        (braced_tower, 5, 12, False),
+        (gridshell, 4, 25, False),
+        (tree, 3, 2 + 2 + 4 + 8, True),
+        (tensegrity_wheel, 6, 12, True),
+    ],
+)
+def test_generators_equilibrate(generator, size, num_nodes, auxiliary_trails):
+    """
+    The generated topologies have the documented size and solve alike in both
+    solvers.
+    """
+    topology = generator(size)
+    assert topology.number_of_nodes() == num_nodes
+
+    topology.build_trails(auxiliary_trails=auxiliary_trails)
+    form = static_equilibrium(topology)
+    form_numpy = static_equilibrium_numpy(topology)
+
+    for node in form.nodes():
+        assert np.allclose(
+            form.node_coordinates(node), form_numpy.node_coordinates(node), atol=1e-5
+        )
+
+
+def test_gridshell_trails_span_from_midspan():
+    """
+    The trails of a gridshell run from midspan to the supports at either end.
+    """
+    topology = gridshell(2, 5)
+    topology.build_trails()
+
+    assert topology.number_of_trails() == 2 * 3
+    assert topology.number_of_indirect_deviation_edges() == 0
+    for trail in topology.trails():
+        assert len(trail) == 3
+
+
+def test_generators_reject_degenerate_sizes():
+    """
+    The generators refuse sizes that make no valid topology.
+    """
+    with pytest.raises(ValueError):
+        braced_tower(0)
+    with pytest.raises(ValueError):
+        gridshell(3, 2)
+    with pytest.raises(ValueError):
+        tree(0)
+    with pytest.raises(ValueError):
+        tensegrity_wheel(1)
+
+
+# ==============================================================================
+# Tests - Runner
+# ==============================================================================
+
+
+def test_benchmark_optimizer_has_a_solution():
+    """
+    The supports are pulled to where they land within the parameter bounds.
+    """
+    topology = braced_tower(3)
+    topology.build_trails()
+    optimizer = benchmark_optimizer(topology)
+
+    assert optimizer.number_of_parameters() == topology.number_of_deviation_edges()
+    assert optimizer.number_of_goals() == 2
+
+    optimizer.solve(topology.copy(), "LBFGS", iters=50)
+    assert optimizer.penalty < 1e-3
+
+
+def test_run_benchmarks(tmp_path):
+    """
+    The runner times every operation and writes its records as JSON.
+    """
+    path = tmp_path / "results.json"
+    results = run_benchmarks(
+        benchmarks=["tree", "braced_tower"],
+        sizes=[2],
+        repeat=2,
+        iters=3,
+        path=str(path),
+    )
+
+    records = results["results"]
+    assert len(records) == 2 * len(OPERATIONS)
+    for record in records:
+        assert "error" not in record
+        assert len(record["times"]) == 2
+        assert record["time"] == min(record["times"])
+
+    with open(path) as f:
+        assert json.load(f) == results
+
+    operations = {record["operation"]: record for record in records[: len(OPERATIONS)]}
+    assert operations["static_equilibrium_numpy"]["iterations"] == 1
+    assert operations["optimize"]["evals"] > 0
+    assert operations["gradient"]["parameters"] == operations["optimize"]["parameters"]
+
+
+def test_run_benchmarks_records_failures():
+    """
+    An operation that fails is recorded with its error, and the others still run.
+    """
+    results = run_benchmarks(
+        benchmarks=["braced_tower"],
+        sizes=[8],
+        operations=["static_equilibrium_numpy", "build_trails"],
+        repeat=1,
+        tmax=2,
+    )
+    failed, built = results["results"]
+
+    assert failed["error"].startswith("ValueError")
+    assert "time" not in failed
+    assert "error" not in built
+
+
+def test_run_benchmarks_rejects_unknown_names():
+    """
+    The runner refuses benchmarks and operations it does not know.
+    """
+    assert "tree" in BENCHMARKS
+    with pytest.raises(ValueError):
+        run_benchmarks(benchmarks=["dome"])
+    with pytest.raises(ValueError):
+        run_benchmarks(operations=["solve"])
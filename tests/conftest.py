@@ -160,6 +160,36 @@ def braced_tower_2d():
     return topology
 
 
+@pytest.fixture
+def stiff_braced_tower_2d():
+    """
+    A tall braced tower in 2d whose diagonals pull hard across sequences.
+    """
+    storeys = 12
+
+    topology = TopologyDiagram()
+
+    for i in range(storeys + 1):
+        topology.add_node(Node(2 * i, [0.0, float(i), 0.0]))
+        topology.add_node(Node(2 * i + 1, [1.0, float(i), 0.0]))
+
+    for i in range(storeys):
+        a, b, c, d = 2 * i, 2 * i + 1, 2 * i + 2, 2 * i + 3
+        topology.add_edge(TrailEdge(a, c, length=-1.0))
+        topology.add_edge(TrailEdge(b, d, length=-1.0))
+        topology.add_edge(DeviationEdge(c, d, force=-1.0))
+        topology.add_edge(DeviationEdge(a, d, force=2.0))
+        topology.add_edge(DeviationEdge(b, c, force=2.0))
+
+    topology.add_support(NodeSupport(0))
+    topology.add_support(NodeSupport(1))
+
+    topology.add_load(NodeLoad(2 * storeys, [0.3, -1.0, 0.0]))
+    topology.add_load(NodeLoad(2 * storeys + 1, [0.0, -1.0, 0.0]))
+
+    return topology
+
+
 @pytest.fixture
 def tree_2d_needs_auxiliary_trails():
     """
@@ -0,0 +1,73 @@
+import pytest
+from pytest_lazy_fixtures import lf
+
+from compas_cem.diagrams import AdjacencyCSR
+from compas_cem.diagrams import FormDiagram
+from compas_cem.elements import DeviationEdge
+from compas_cem.equilibrium import static_equilibrium
+
+# ==============================================================================
+# Tests - Adjacency CSR
+# ==============================================================================
+
+
+@pytest.mark.parametrize(
+    "diagram",
+    [(lf("compression_strut")), (lf("threebar_funicular")), (lf("braced_tower_2d"))],
+)
+def test_csr_matches_the_graph(diagram):
+    """
+    Checks the compressed incidence against the neighbors and edges of the graph.
+    """
+    csr = diagram.csr
+    assert isinstance(csr, AdjacencyCSR)
+    assert csr.degrees().sum() == 2 * diagram.number_of_edges()
+
+    for node in diagram.nodes():
+        assert csr.node_neighbors(node) == diagram.neighbors(node)
+
+        node_slice = csr.node_slice(node)
+        edge_indices = csr.edge_indices[node_slice]
+        signs = csr.signs[node_slice]
+
+        for neighbor, edge_index, sign in zip(
+            csr.node_neighbors(node), edge_indices, signs
+        ):
+            edge = csr.edges[edge_index]
+            assert diagram.has_edge(edge)
+            assert edge == ((node, neighbor) if sign == 1 else (neighbor, node))
+
+
+def test_csr_rebuilt_after_edits(braced_tower_2d):
+    """
+    Checks that the adjacency is kept until the graph changes.
+    """
+    topology = braced_tower_2d
+    csr = topology.csr
+    assert topology.csr is csr
+
+    topology.node_attribute(0, "qx", 1.0)
+    assert topology.csr is csr
+
+    topology.add_edge(DeviationEdge(0, 5, force=1.0))
+    assert topology.csr is not csr
+    assert (0, 5) in topology.node_connected_edges(5)
+
+    csr = topology.csr
+    topology.delete_edge((0, 5))
+    assert topology.csr is not csr
+    assert (0, 5) not in topology.node_connected_edges(5)
+
+
+def test_csr_on_a_form_diagram(braced_tower_2d):
+    """
+    Checks that form diagrams share the compressed adjacency.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    form = static_equilibrium(topology)
+
+    assert isinstance(form, FormDiagram)
+    for node in form.nodes():
+        edges = set(topology.node_connected_edges(node))
+        assert set(form.node_connected_edges(node)) == edges
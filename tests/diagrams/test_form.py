@@ -0,0 +1,104 @@
+import pytest
+from pytest_lazy_fixtures import lf
+
+import numpy as np
+
+from compas_cem.diagrams import FormDiagram
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+
+def assert_forms_match(form, other):
+    """
+    Checks that two forms share nodes, supports, coordinates, forces and lengths.
+    """
+    assert set(form.nodes()) == set(other.nodes())
+    assert set(form.edges()) == set(other.edges())
+
+    for node in form.nodes():
+        assert np.allclose(form.node_coordinates(node), other.node_coordinates(node))
+        assert np.allclose(form.reaction_force(node), other.reaction_force(node))
+        assert form.is_node_support(node) == other.is_node_support(node)
+
+    for edge in form.edges():
+        assert np.allclose(form.edge_force(edge), other.edge_force(edge))
+        length = form.edge_attribute(edge, "length")
+        assert np.allclose(length, other.edge_attribute(edge, "length"))
+
+
+# ==============================================================================
+# Tests - Form Diagram
+# ==============================================================================
+
+
+def test_form_from_topology_diagram(braced_tower_2d):
+    """
+    A form copies the attributes of a topology, but not its trails.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    form = FormDiagram.from_topology_diagram(topology)
+
+    assert "_trails" not in form.attributes
+    assert form.node == {key: dict(attr) for key, attr in topology.node.items()}
+    assert form.edge == topology.edge
+    assert form.adjacency == topology.adjacency
+    assert form.number_of_edges() == topology.number_of_edges()
+
+    form.node_attribute(0, "x", 10.0)
+    form.edge_attribute((0, 1), "force", 10.0)
+    assert topology.node_attribute(0, "x") != 10.0
+    assert topology.edge_attribute((0, 1), "force") != 10.0
+
+
+@pytest.mark.parametrize(
+    "topology",
+    [(lf("threebar_funicular")), (lf("braced_tower_2d")), (lf("tension_chain"))],
+)
+def test_form_from_equilibrium_state(topology):
+    """
+    A form built from the arrays of a state matches the one of the reference solver.
+    """
+    topology.build_trails()
+    eq_state = equilibrium_state_numpy(topology, eta=1e-9)
+    structure = eq_state.structure
+
+    form = FormDiagram.from_equilibrium_state(eq_state, structure, topology)
+    assert_forms_match(form, static_equilibrium(topology, eta=1e-9))
+    assert form.attributes["iterations"] == eq_state.iterations
+    assert form.node_load(0) == topology.node_load(0)
+
+    # without a topology, only the supports are marked
+    bare = FormDiagram.from_equilibrium_state(eq_state, structure)
+    assert_forms_match(bare, form)
+
+
+def test_form_lazy(braced_tower_2d):
+    """
+    A lazy form builds its nodes and edges on first read.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    eq_state = equilibrium_state_numpy(topology, eta=1e-9)
+    structure = eq_state.structure
+
+    form = FormDiagram.from_equilibrium_state(eq_state, structure, topology, lazy=True)
+    assert form._pending is not None
+    assert form.attributes["iterations"] == eq_state.iterations
+    assert form._pending is not None
+
+    assert form.number_of_nodes() == topology.number_of_nodes()
+    assert form._pending is None
+
+    eager = FormDiagram.from_equilibrium_state(eq_state, structure, topology)
+    assert_forms_match(form, eager)
+    assert form.__data__ == eager.__data__
+
+    # a lazy form that is cleared is never built
+    form = FormDiagram.from_equilibrium_state(eq_state, structure, lazy=True)
+    form.clear()
+    assert form.number_of_nodes() == 0
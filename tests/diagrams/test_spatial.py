@@ -0,0 +1,149 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.diagrams import SpatialHash
+from compas_cem.diagrams import TopologyDiagram
+from compas_cem.elements import Node
+from compas_cem.elements import TrailEdge
+
+# ==============================================================================
+# Tests - Spatial Hash
+# ==============================================================================
+
+
+def test_spatial_hash_nearest():
+    """
+    Checks that the closest point within the tolerance is found.
+    """
+    spatial_hash = SpatialHash(0.1)
+    spatial_hash.add(0, [0.0, 0.0, 0.0])
+    spatial_hash.add(1, [0.08, 0.0, 0.0])
+
+    assert spatial_hash.nearest([0.03, 0.0, 0.0], 0.1) == 0
+    assert spatial_hash.nearest([0.05, 0.0, 0.0], 0.1) == 1
+    assert spatial_hash.nearest([0.0, 0.0, 0.2], 0.1) is None
+
+
+def test_spatial_hash_edits():
+    """
+    Checks that moved and removed points are found where they are.
+    """
+    spatial_hash = SpatialHash(1.0)
+    spatial_hash.add(0, [0.0, 0.0, 0.0])
+    spatial_hash.add(0, [5.0, 0.0, 0.0])
+
+    assert len(spatial_hash) == 1
+    assert spatial_hash.nearest([0.0, 0.0, 0.0], 1.0) is None
+    assert spatial_hash.nearest([5.0, 0.0, 0.0], 1.0) == 0
+
+    spatial_hash.remove(0)
+    assert 0 not in spatial_hash
+    assert spatial_hash.nearest([5.0, 0.0, 0.0], 1.0) is None
+
+
+@pytest.mark.parametrize("radius", [0.05, 0.25, 3.0])
+def test_spatial_hash_within(radius):
+    """
+    Checks a radius query against a scan over every point.
+    """
+    points = np.random.default_rng(0).random((200, 3))
+    spatial_hash = SpatialHash.from_points(range(200), points, 0.01)
+
+    center = [0.5, 0.5, 0.5]
+    distances = np.linalg.norm(points - center, axis=1)
+    expected = np.argsort(distances)[: np.sum(distances <= radius)]
+
+    assert spatial_hash.within(center, radius) == expected.tolist()
+
+
+def test_spatial_hash_cell_size_positive():
+    """
+    Checks that the cells of a spatial hash have a size.
+    """
+    with pytest.raises(ValueError):
+        SpatialHash(0.0)
+
+
+# ==============================================================================
+# Tests - Diagram Lookups
+# ==============================================================================
+
+
+def test_node_key_across_a_rounding_boundary():
+    """
+    Checks that points rounding to different geometric keys find the same node.
+    """
+    topology = TopologyDiagram()
+    topology.add_node(Node(0, [0.0004, 0.0, 0.0]))
+
+    assert topology.node_key([0.0006, 0.0, 0.0]) == 0
+    assert topology.node_key([0.002, 0.0, 0.0]) is None
+
+    edge = topology.add_edge(TrailEdge([0.0006, 0.0, 0.0], [1.0, 0.0, 0.0], -1.0))
+    assert edge == (0, 1)
+    assert topology.number_of_nodes() == 2
+
+
+def test_node_key_after_a_move():
+    """
+    Checks that a moved node is found at its new position only.
+    """
+    topology = TopologyDiagram()
+    topology.add_node(Node(0, [0.0, 0.0, 0.0]))
+    assert topology.node_key([0.0, 0.0, 0.0]) == 0
+
+    topology.update_node_xyz(0, [1.0, 1.0, 1.0])
+    assert topology.node_key([0.0, 0.0, 0.0]) is None
+    assert topology.node_key([1.0, 1.0, 1.0]) == 0
+    assert topology.gkey_node == {topology.gkey([1.0, 1.0, 1.0]): 0}
+
+    topology.delete_node(0)
+    assert topology.node_key([1.0, 1.0, 1.0]) is None
+
+
+def test_gkey_node_after_a_delete(braced_tower_2d):
+    """
+    Checks that a deleted node is gone from the geometric keys, and no other.
+    """
+    topology = braced_tower_2d
+    gkey = topology.gkey(topology.node_coordinates(1))
+    assert topology.gkey_node[gkey] == 1
+
+    topology.delete_node(1)
+    assert gkey not in topology.gkey_node
+    assert sorted(topology.gkey_node.values()) == [0, 2, 3, 4, 5]
+
+
+def test_node_keys_batched(braced_tower_2d):
+    """
+    Checks that a batch of points resolves like one point at a time.
+    """
+    topology = braced_tower_2d
+    points = np.array([topology.node_coordinates(node) for node in topology.nodes()])
+    points[:, 0] += 1e-4
+    points = np.vstack([points, [[9.0, 9.0, 9.0]]])
+
+    keys = topology.node_keys(points)
+    assert keys == list(topology.nodes()) + [None]
+    assert keys == [topology.node_key(point) for point in points.tolist()]
+
+
+def test_nodes_within(braced_tower_2d):
+    """
+    Checks that a radius query returns the closest nodes first.
+    """
+    topology = braced_tower_2d
+
+    assert topology.nodes_within([0.0, 0.0, 0.0], 0.5) == [0]
+    assert topology.nodes_within([0.1, 0.0, 0.0], 1.05) == [0, 3, 1]
+
+
+def test_node_key_on_array_topology(braced_tower_2d):
+    """
+    Checks that nodes built in bulk from arrays are found by coordinates.
+    """
+    topology = TopologyDiagram.from_arrays(**braced_tower_2d.to_arrays())
+
+    for node in braced_tower_2d.nodes():
+        assert topology.node_key(braced_tower_2d.node_coordinates(node)) == node
@@ -3,9 +3,12 @@ from compas.data import json_dumps
 from compas.data import json_loads
 from pytest_lazy_fixtures import lf
 
+from compas_cem.diagrams import Diagram
 from compas_cem.diagrams import TopologyDiagram
+from compas_cem.elements import DeviationEdge
 from compas_cem.elements import Node
 from compas_cem.elements import TrailEdge
+from compas_cem.equilibrium import static_equilibrium
 
 
 # ==============================================================================
@@ -337,3 +340,185 @@ def test_diagram_survives_a_copy(topology):
 
     assert other.number_of_nodes() == topology.number_of_nodes()
     assert other.number_of_edges() == topology.number_of_edges()
+
+
+# ==============================================================================
+# Topology Index
+# ==============================================================================
+
+
+@pytest.mark.parametrize(
+    "topology",
+    [
+        (lf("threebar_funicular")),
+        (lf("braced_tower_2d")),
+        (lf("tree_2d_needs_auxiliary_trails")),
+    ],
+)
+def test_index_matches_a_scan(topology):
+    """
+    Checks the indexed queries against a scan over the whole diagram.
+    """
+    topology.build_trails(auxiliary_trails=True)
+
+    klast = max(topology.node_sequence(node) for node in topology.nodes())
+    assert topology.sequence_last() == klast
+
+    for k, sequence in topology.sequences(keys=True):
+        nodes = [node for node in topology.nodes() if topology.node_sequence(node) == k]
+        assert sequence == tuple(nodes)
+
+    for key, trail in topology.trails(keys=True):
+        assert topology.trail_sequences(key) == {
+            topology.node_sequence(node): node for node in trail
+        }
+        for node in trail:
+            assert topology.node_trail(node) == key
+
+    for node in topology.nodes():
+        assert topology.index.node_edges[node] == tuple(
+            Diagram.node_connected_edges(topology, node)
+        )
+
+
+def test_index_invalidated_by_edits(braced_tower_2d):
+    """
+    Checks that editing the diagram discards a stale index.
+    """
+    topology = braced_tower_2d
+    assert topology.number_of_deviation_edges() == 5
+
+    topology.add_edge(DeviationEdge(0, 5, force=1.0))
+    assert topology.number_of_deviation_edges() == 6
+
+    topology.build_trails()
+    assert topology.number_of_sequences() == 3
+
+    topology.shift_trail(5, 2)
+    assert topology.number_of_sequences() == 5
+    assert topology.sequence_last() == 4
+    assert topology.trail_sequences(5) == {2: 5, 3: 4, 4: 3}
+    assert list(topology.sequences()) == [(2,), (1,), (0, 5), (4,), (3,)]
+
+    topology.add_node(Node(6, [2.0, 0.0, 0.0]))
+    assert topology.node_trail(6) is None
+    with pytest.raises(ValueError):
+        topology.sequence_last()
+
+
+@pytest.mark.parametrize(
+    "topology",
+    [(lf("braced_tower_2d")), (lf("tree_2d_needs_auxiliary_trails"))],
+)
+def test_edge_classes_match_the_predicates(topology):
+    """
+    Checks the looked up edge classes against the sequences of the edge nodes.
+    """
+    topology.build_trails(auxiliary_trails=True)
+    auxiliary_edges = set(tuple(edge) for edge in topology.auxiliary_trails())
+
+    for edge in topology.edges():
+        if edge in auxiliary_edges:
+            edge_class = "auxiliary_trail"
+        elif topology.is_trail_edge(edge):
+            edge_class = "trail"
+        else:
+            u, v = topology.edge_sequence(edge)
+            edge_class = "direct_deviation" if u == v else "indirect_deviation"
+
+        assert topology.edge_class(edge) == edge_class
+        assert topology.is_auxiliary_trail_edge(edge) == (edge in auxiliary_edges)
+
+    edges = set(topology.direct_deviation_edges()) | set(
+        topology.indirect_deviation_edges()
+    )
+    assert edges == set(topology.deviation_edges())
+    assert set(topology.auxiliary_trail_edges()) == auxiliary_edges
+    assert dict(topology.indirect_deviation_edges(data=True)).keys() == set(
+        topology.indirect_deviation_edges()
+    )
+
+
+def test_deviation_edges_unclassified_before_trails(braced_tower_2d):
+    """
+    Checks that deviation edges are only split once the trails are built.
+    """
+    topology = braced_tower_2d
+    assert topology.edge_class((1, 3)) == "deviation"
+
+    with pytest.raises(ValueError):
+        list(topology.direct_deviation_edges())
+
+    topology.build_trails()
+    assert topology.edge_class((1, 3)) == "indirect_deviation"
+    assert topology.edge_class((1, 4)) == "direct_deviation"
+
+
+# ==============================================================================
+# Array Conversion
+# ==============================================================================
+
+
+@pytest.mark.parametrize(
+    "topology",
+    [(lf("compression_strut")), (lf("threebar_funicular")), (lf("braced_tower_2d"))],
+)
+def test_arrays_roundtrip(topology):
+    """
+    Checks that a topology diagram survives a conversion to arrays and back.
+    """
+    other = TopologyDiagram.from_arrays(**topology.to_arrays())
+
+    assert other.number_of_nodes() == topology.number_of_nodes()
+    assert set(other.trail_edges()) == set(topology.trail_edges())
+    assert set(other.deviation_edges()) == set(topology.deviation_edges())
+    assert set(other.support_nodes()) == set(topology.support_nodes())
+
+    for node in topology.nodes():
+        assert other.node_coordinates(node) == topology.node_coordinates(node)
+        assert other.node_load(node) == topology.node_load(node)
+
+    for edge in topology.edges():
+        assert other.edge_attributes(edge) == topology.edge_attributes(edge)
+
+
+def test_arrays_solve_like_elements(braced_tower_2d):
+    """
+    Checks that a topology diagram built from arrays solves like the original.
+    """
+    topology = braced_tower_2d
+    other = TopologyDiagram.from_arrays(**topology.to_arrays())
+
+    topology.build_trails()
+    other.build_trails()
+    form = static_equilibrium(topology)
+    form_other = static_equilibrium(other)
+
+    for node in form.nodes():
+        xyz = form.node_coordinates(node)
+        assert form_other.node_coordinates(node) == pytest.approx(xyz)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"trail_lengths": [-1.0, -1.0]},
+        {"trail_edges": [(0, 3)]},
+        {"supports": [4]},
+        {"loads": [[0.0, -1.0, 0.0]]},
+        {"trail_planes": []},
+    ],
+)
+def test_arrays_mismatched(kwargs):
+    """
+    Checks that arrays of mismatched sizes are rejected.
+    """
+    arrays = {
+        "xyz": [[0.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 2.0, 0.0]],
+        "trail_edges": [(0, 1)],
+        "trail_lengths": [-1.0],
+    }
+    arrays.update(kwargs)
+
+    with pytest.raises(ValueError):
+        TopologyDiagram.from_arrays(**arrays)
@@ -3,6 +3,10 @@ from compas.data import json_dumps
 from compas.data import json_loads
 from pytest_lazy_fixtures import lf
 
+from compas_cem.elements import DeviationEdge
+from compas_cem.elements import TrailEdge
+from compas_cem.supports import NodeSupport
+
 # ==============================================================================
 # Tests
 # ==============================================================================
@@ -148,3 +152,94 @@ def test_auxiliary_trails_survive_json_roundtrip(tree_2d_needs_auxiliary_trails)
     )
     assert set(other.auxiliary_trails()) == set(topology.auxiliary_trails())
     assert set(other.auxiliary_trail_edges()) == set(topology.auxiliary_trail_edges())
+
+
+# ==============================================================================
+# Incremental Trails
+# ==============================================================================
+
+
+def _assert_same_trails(topology, other):
+    """
+    Checks that two topology diagrams have the same trails and sequences.
+    """
+    assert dict(topology.trails(keys=True)) == dict(other.trails(keys=True))
+    for node in topology.nodes():
+        assert topology.node_sequence(node) == other.node_sequence(node)
+        assert topology.is_node_origin(node) == other.is_node_origin(node)
+
+
+def test_incremental_trails_walk_edited_trails(braced_tower_2d, monkeypatch):
+    """
+    Checks that an incremental build only walks the trails of edited nodes.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    assert topology.check_trails() == []
+
+    topology.add_edge(TrailEdge([2.0, 0.0, 0.0], [2.0, 1.0, 0.0], length=-1.0))
+    topology.add_support(NodeSupport([2.0, 0.0, 0.0]))
+    topology.add_edge(DeviationEdge(7, 4, force=-1.0))
+    assert topology.check_trails() != []
+
+    walks = []
+    walk_trail = topology._walk_trail
+
+    def counted(support, incidence):
+        walks.append(support)
+        return walk_trail(support, incidence)
+
+    monkeypatch.setattr(topology, "_walk_trail", counted)
+    topology.build_trails(incremental=True)
+
+    assert sorted(walks) == [3, 6]
+    assert topology.check_trails() == []
+
+    other = topology.copy()
+    other.build_trails()
+    _assert_same_trails(topology, other)
+
+
+def test_incremental_trails_after_deleting_an_edge(braced_tower_2d):
+    """
+    Checks that deleting a trail edge re-walks the trail it was on.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    topology.delete_edge((1, 2))
+    with pytest.raises(AssertionError):
+        topology.build_trails(incremental=True)
+
+    topology.build_trails(auxiliary_trails=True, incremental=True)
+    assert topology.check_trails() == []
+    assert topology.trail(1) == (1, 0)
+    assert topology.trail(2) == (2, 6)
+    assert topology.attributes["_auxiliary_trails"] == {2: (2, 6)}
+
+
+def test_incremental_trails_without_trails(braced_tower_2d):
+    """
+    Checks that an incremental build builds all the trails the first time.
+    """
+    topology = braced_tower_2d
+    topology.build_trails(incremental=True)
+
+    other = braced_tower_2d.copy()
+    other.build_trails()
+    _assert_same_trails(topology, other)
+
+
+def test_check_trails_finds_inconsistencies(braced_tower_2d):
+    """
+    Checks that a stale trail is reported.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    topology.node_attribute(1, "_k", 5)
+    topology.invalidate_index()
+
+    errors = topology.check_trails()
+    assert len(errors) == 1
+    assert "sequences" in errors[0]
@@ -0,0 +1,102 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.equilibrium import static_equilibrium_batch
+from compas_cem.equilibrium import static_equilibrium_numpy
+
+
+# ==============================================================================
+# Tests - Batched Equilibrium
+# ==============================================================================
+
+
+def _parameter_sets(topology, num_batch):
+    """
+    Scale the trail lengths and deviation forces of a topology per set.
+    """
+    edges = list(topology.edges())
+    nodes = list(topology.nodes())
+
+    scales = np.linspace(0.5, 1.5, num_batch)
+    lengths = np.array([topology.edge_length_2(edge) for edge in edges])
+    forces = np.array([topology.edge_force(edge) for edge in edges])
+    loads = np.array([topology.node_load(node) for node in nodes])
+
+    lengths = scales[:, None] * lengths
+    forces = scales[::-1, None] * forces
+    loads = scales[:, None, None] * loads
+
+    return lengths, forces, loads
+
+
+def test_batch_matches_single_solves(braced_tower_2d):
+    """
+    Every parameter set of a batch solves to its own single solve.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    lengths, forces, loads = _parameter_sets(topology, 4)
+    state = static_equilibrium_batch(topology, lengths, forces, loads, eta=1e-9)
+
+    assert state["xyz"].shape == (4, topology.number_of_nodes(), 3)
+    assert state["forces"].shape == (4, topology.number_of_edges())
+    assert state["reactions"].shape == (4, topology.number_of_nodes(), 3)
+
+    edges = [tuple(edge) for edge in state["edges"].tolist()]
+    nodes = state["nodes"].tolist()
+
+    for b in range(4):
+        for i, edge in enumerate(edges):
+            topology.edge_attribute(edge, "length", lengths[b, i])
+            if topology.is_deviation_edge(edge):
+                topology.edge_attribute(edge, "force", forces[b, i])
+        for i, node in enumerate(nodes):
+            topology.node_attributes(node, ["qx", "qy", "qz"], loads[b, i])
+
+        form = static_equilibrium_numpy(topology, eta=1e-9)
+
+        for i, node in enumerate(nodes):
+            assert np.allclose(form.node_coordinates(node), state["xyz"][b, i])
+            if form.is_node_support(node):
+                assert np.allclose(form.reaction_force(node), state["reactions"][b, i])
+
+        for i, edge in enumerate(edges):
+            assert np.allclose(form.edge_force(edge), state["forces"][b, i])
+
+
+def test_batch_broadcasts_parameters(tension_chain):
+    """
+    Parameters left out or given without a batch dimension apply to every set.
+    """
+    topology = tension_chain
+    topology.build_trails()
+
+    lengths, _, _ = _parameter_sets(topology, 3)
+    state = static_equilibrium_batch(topology, lengths=lengths)
+    assert state["xyz"].shape[0] == 3
+
+    state = static_equilibrium_batch(topology)
+    form = static_equilibrium_numpy(topology)
+    assert state["xyz"].shape[0] == 1
+    assert state["iterations"] == 1
+    assert np.all(state["distance"] == 0.0)
+    for i, node in enumerate(state["nodes"].tolist()):
+        assert np.allclose(form.node_coordinates(node), state["xyz"][0, i])
+
+
+def test_batch_rejects_mismatched_shapes(tension_chain):
+    """
+    Batch sizes must agree and the trailing dimensions must fit the topology.
+    """
+    topology = tension_chain
+    topology.build_trails()
+
+    lengths, forces, _ = _parameter_sets(topology, 3)
+
+    with pytest.raises(ValueError):
+        static_equilibrium_batch(topology, lengths, forces[:2])
+
+    with pytest.raises(ValueError):
+        static_equilibrium_batch(topology, lengths[:, :-1])
@@ -136,7 +136,8 @@ def bt2_out():
         (lf("compression_chain"), cc_out()),
     ],
 )
-def test_force_equilibrium_output(topology, output):
+@pytest.mark.parametrize("method", ["fixed_point", "anderson"])
+def test_force_equilibrium_output(topology, output, method):
     """
     Minute testing of forces and geometric outputs post force equilibrium.
     """
@@ -146,7 +147,12 @@ def test_force_equilibrium_output(topology, output):
     support_residual_out = output["residual"]
 
     topology.build_trails()
-    form = static_equilibrium(topology, eta=1e-5, tmax=100, verbose=False)
+    form = static_equilibrium(
+        topology, eta=1e-5, tmax=100, verbose=False, method=method
+    )
+
+    assert form.attributes["iterations"] >= 1
+    assert len(form.attributes["residual_history"]) <= form.attributes["iterations"]
 
     check_nodes_xyz(form, node_xyz_out)
     check_edges_forces(form, edge_force_out)
@@ -164,7 +170,8 @@ def test_force_equilibrium_output(topology, output):
         (lf("compression_chain"), cc_out()),
     ],
 )
-def test_force_equilibrium_numpy_output(topology, output):
+@pytest.mark.parametrize("method", ["fixed_point", "anderson"])
+def test_force_equilibrium_numpy_output(topology, output, method):
     """
     Minute testing of forces and geometric outputs post force equilibrium.
     """
@@ -174,7 +181,12 @@ def test_force_equilibrium_numpy_output(topology, output):
     support_residual_out = output["residual"]
 
     topology.build_trails()
-    form = static_equilibrium_numpy(topology, eta=1e-5, tmax=100, verbose=False)
+    form = static_equilibrium_numpy(
+        topology, eta=1e-5, tmax=100, verbose=False, method=method
+    )
+
+    assert form.attributes["iterations"] >= 1
+    assert len(form.attributes["residual_history"]) <= form.attributes["iterations"]
 
     check_nodes_xyz(form, node_xyz_out)
     check_edges_forces(form, edge_force_out)
@@ -182,6 +194,33 @@ def test_force_equilibrium_numpy_output(topology, output):
     check_nodes_reactions(form, support_residual_out)
 
 
+@pytest.mark.parametrize(
+    "topology, exact",
+    [
+        (lf("compression_strut"), True),
+        (lf("threebar_funicular"), True),
+        (lf("tension_chain"), True),
+        (lf("braced_tower_2d"), False),
+    ],
+)
+@pytest.mark.parametrize("solver", [static_equilibrium, static_equilibrium_numpy])
+def test_force_equilibrium_single_sweep(topology, exact, solver):
+    """
+    Topologies without indirect deviation edges are solved in a single sweep.
+    """
+    topology.build_trails()
+    calls = []
+
+    form = solver(topology, callback=lambda: calls.append(1))
+
+    if exact:
+        assert form.attributes["iterations"] == 1
+        assert form.attributes["residual_history"] == []
+        assert 1 <= len(calls) <= topology.number_of_nodes()
+    else:
+        assert form.attributes["iterations"] > 1
+
+
 # ==============================================================================
 # Tests - Force Equilibrium Queries
 # ==============================================================================
@@ -0,0 +1,224 @@
+import pytest
+
+from pytest_lazy_fixtures import lf
+
+import numpy as np
+
+jax = pytest.importorskip("jax")
+pytest.importorskip("equinox")
+
+from autograd import grad  # noqa: E402
+
+from compas_cem.equilibrium import EquilibriumStructure  # noqa: E402
+from compas_cem.equilibrium.force_jax import _equilibrium_jit  # noqa: E402
+from compas_cem.equilibrium.force_jax import equilibrium_arrays_jax  # noqa: E402
+from compas_cem.equilibrium.force_jax import equilibrium_state_jax  # noqa: E402
+from compas_cem.equilibrium.force_jax import equilibrium_vjp_jax  # noqa: E402
+from compas_cem.equilibrium.force_jax import static_equilibrium_jax  # noqa: E402
+from compas_cem.equilibrium.force_jax import structure_arrays_jax  # noqa: E402
+from compas_cem.equilibrium.force_numpy import equilibrium_arrays_numpy  # noqa: E402
+from compas_cem.equilibrium.force_numpy import equilibrium_parameters_numpy  # noqa: E402
+from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy  # noqa: E402
+from compas_cem.equilibrium.force_numpy import static_equilibrium_numpy  # noqa: E402
+
+# ==============================================================================
+# Fixtures
+# ==============================================================================
+
+
+@pytest.fixture(autouse=True)
+def x64():
+    """
+    Enable 64-bit floats in JAX, which the functions on JAX arrays need.
+    """
+    with jax.enable_x64(True):
+        yield
+
+
+# ==============================================================================
+# Tests - JAX Backend
+# ==============================================================================
+
+
+@pytest.mark.parametrize(
+    "topology, auxiliary_trails",
+    [
+        (lf("compression_strut"), False),
+        (lf("threebar_funicular"), False),
+        (lf("braced_tower_2d"), False),
+        (lf("tension_chain"), False),
+        (lf("compression_chain"), False),
+        (lf("tree_2d_needs_auxiliary_trails"), True),
+    ],
+)
+def test_equilibrium_state_matches_numpy(topology, auxiliary_trails):
+    """
+    The JAX backend reaches the state of the numpy backend.
+    """
+    topology.build_trails(auxiliary_trails=auxiliary_trails)
+
+    state = equilibrium_state_numpy(topology, eta=1e-9)
+    state_jax = equilibrium_state_jax(topology, eta=1e-9)
+
+    for name in ("node_xyz", "trail_forces", "reaction_forces", "trail_directions"):
+        assert state[name].keys() == state_jax[name].keys()
+        for key, value in state[name].items():
+            assert np.allclose(value, state_jax[name][key])
+
+
+def test_static_equilibrium_jax(braced_tower_2d):
+    """
+    The form diagram of the JAX backend matches that of the numpy backend.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    form = static_equilibrium_numpy(topology)
+    form_jax = static_equilibrium_jax(topology)
+
+    for node in form.nodes():
+        assert np.allclose(form.node_coordinates(node), form_jax.node_coordinates(node))
+    for edge in form.edges():
+        assert np.allclose(form.edge_force(edge), form_jax.edge_force(edge))
+
+
+def test_equilibrium_compiles_once_per_shape(braced_tower_2d):
+    """
+    Solving the same structure under new parameters reuses the compiled kernel.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    xyz, lengths, forces, loads, _ = equilibrium_parameters_numpy(topology, structure)
+
+    equilibrium_arrays_jax(structure, xyz, lengths, forces, loads)
+    size = _equilibrium_jit._cache_size()
+
+    for scale in (0.5, 1.5, 2.0):
+        equilibrium_arrays_jax(structure, xyz, scale * lengths, forces, loads)
+
+    assert _equilibrium_jit._cache_size() == size
+
+    # the padded arrays are kept on the structure, a new one is padded anew
+    assert structure_arrays_jax(structure) is structure_arrays_jax(structure)
+    other = EquilibriumStructure.from_topology_diagram(topology)
+    assert structure_arrays_jax(other) is not structure_arrays_jax(structure)
+    equilibrium_arrays_jax(other, xyz, lengths, forces, loads)
+    assert _equilibrium_jit._cache_size() == size
+
+
+def test_equilibrium_raises_without_convergence(braced_tower_2d):
+    """
+    A solve that misses the threshold within tmax iterations raises an error.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    with pytest.raises(ValueError):
+        equilibrium_state_jax(topology, tmax=3, eta=1e-16)
+
+
+def test_equilibrium_vjp_matches_autograd(braced_tower_2d):
+    """
+    The pullback of the JAX backend matches the autograd gradient of numpy.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    xyz, lengths, forces, loads, _ = equilibrium_parameters_numpy(topology, structure)
+    target = np.array([0.5, 0.0, 0.0])
+
+    def loss(forces):
+        state = equilibrium_arrays_numpy(
+            structure, xyz, lengths, forces, loads, eta=1e-12
+        )
+        return np.sum(np.square(state["xyz"][0] - target))
+
+    state, vjp = equilibrium_vjp_jax(structure, xyz, lengths, forces, loads, eta=1e-12)
+    cotangent = np.zeros_like(xyz)
+    cotangent[0] = 2.0 * (np.asarray(state["xyz"][0]) - target)
+    _, _, gradient, _ = vjp({"xyz": cotangent})
+
+    assert np.allclose(gradient, grad(loss)(forces))
+
+
+# ==============================================================================
+# Tests - Implicit Differentiation
+# ==============================================================================
+
+
+def test_implicit_equilibrium_matches_iterations(braced_tower_2d):
+    """
+    Solving for the fixed point reaches the state the iterations reach.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    parameters = equilibrium_parameters_numpy(topology, structure)
+
+    state = equilibrium_arrays_jax(structure, *parameters, eta=1e-10)
+    state_implicit = equilibrium_arrays_jax(
+        structure, *parameters, eta=1e-10, implicit=True
+    )
+
+    for name in ("xyz", "forces", "reactions", "residuals"):
+        assert np.allclose(state[name], state_implicit[name])
+
+
+def test_implicit_vjp_matches_finite_differences(braced_tower_2d):
+    """
+    The implicit gradient is finite at the pinned origin nodes and correct.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    xyz, lengths, forces, loads, _ = equilibrium_parameters_numpy(topology, structure)
+    cotangents = {"xyz": np.ones_like(xyz), "forces": np.ones_like(forces)}
+
+    def loss(xyz, forces):
+        state = equilibrium_arrays_jax(
+            structure, xyz, lengths, forces, loads, eta=1e-13, tmax=300
+        )
+        return float(np.sum(state["xyz"]) + np.sum(state["forces"]))
+
+    _, vjp = equilibrium_vjp_jax(
+        structure, xyz, lengths, forces, loads, eta=1e-10, implicit=True
+    )
+    grad_xyz, _, grad_forces, _ = vjp(cotangents)
+
+    assert np.all(np.isfinite(grad_xyz))
+
+    step = 1e-6
+    for i in range(forces.size):
+        delta = np.zeros(forces.size)
+        delta[i] = step
+        fd = (loss(xyz, forces + delta) - loss(xyz, forces - delta)) / (2.0 * step)
+        assert np.allclose(grad_forces[i], fd, atol=1e-6)
+
+    for node in structure.origin_nodes:
+        i = structure.node_index[int(node)]
+        delta = np.zeros_like(xyz)
+        delta[i, 0] = step
+        fd = (loss(xyz + delta, forces) - loss(xyz - delta, forces)) / (2.0 * step)
+        assert np.allclose(grad_xyz[i, 0], fd, atol=1e-6)
+
+
+def test_x64_only_while_solving(braced_tower_2d):
+    """
+    The backend leaves 64-bit floats as it found them, and the functions on JAX
+    arrays refuse to run without them.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    arrays = equilibrium_parameters_numpy(topology, structure)[:4]
+
+    with jax.enable_x64(False):
+        state = equilibrium_state_jax(topology, structure=structure)
+        assert state.xyz.dtype == np.float64
+        assert not jax.config.jax_enable_x64
+
+        with pytest.raises(RuntimeError, match="64-bit"):
+            equilibrium_arrays_jax(structure, *arrays)
+        with pytest.raises(RuntimeError, match="64-bit"):
+            equilibrium_vjp_jax(structure, *arrays)
@@ -0,0 +1,470 @@
+import json
+import os
+import runpy
+from itertools import islice
+
+import pytest
+
+from pytest_lazy_fixtures import lf
+
+import numpy as np
+
+from autograd import grad
+
+import compas_cem.equilibrium as equilibrium
+
+from compas_cem.equilibrium import EquilibriumStructure
+from compas_cem.equilibrium.force import equilibrium_state
+from compas_cem.equilibrium.force_numpy import equilibrium_arrays_numpy
+from compas_cem.equilibrium.force_numpy import equilibrium_parameters_numpy
+from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy
+from compas_cem.equilibrium.force_numpy import fixed_point_numpy
+from compas_cem.equilibrium.force_numpy import iter_equilibrium
+from compas_cem.equilibrium.force_numpy import segment_sum
+from compas_cem.equilibrium.force_numpy import sequence_plan
+from compas_cem.equilibrium.force_numpy import scatter
+from compas_cem.equilibrium.force_numpy import static_equilibrium_numpy
+from compas_cem.equilibrium.force_numpy import warm_start_numpy
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(os.path.dirname(HERE), "baseline")
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(HERE)), "examples")
+
+SCRIPTS = [
+    "01_quick_start",
+    "02_braced_tower_2d",
+    "03_bridge_2d",
+    "04_tree_2d",
+    "05_tensegrity_wheel_2d",
+]
+
+
+# ==============================================================================
+# Tests - Vectorized Kernel
+# ==============================================================================
+
+
+@pytest.mark.parametrize(
+    "topology",
+    [
+        (lf("compression_strut")),
+        (lf("threebar_funicular")),
+        (lf("braced_tower_2d")),
+        (lf("tension_chain")),
+        (lf("compression_chain")),
+    ],
+)
+def test_equilibrium_state_matches_reference_solver(topology):
+    """
+    The vectorized kernel reaches the state of the pure python solver.
+    """
+    topology.build_trails()
+
+    state = equilibrium_state(topology, tmax=100, eta=1e-9)
+    state_numpy = equilibrium_state_numpy(topology, tmax=100, eta=1e-9)
+
+    for name in ("node_xyz", "trail_forces", "reaction_forces", "trail_directions"):
+        assert state[name].keys() == state_numpy[name].keys()
+        for key, value in state[name].items():
+            assert np.allclose(value, state_numpy[name][key])
+
+
+def test_equilibrium_state_reuses_structure(braced_tower_2d):
+    """
+    A structure compiled once solves the same topology under new parameters.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    for length in (-1.0, -1.5, -2.0):
+        for edge in topology.trail_edges():
+            topology.edge_attribute(edge, "length", length)
+
+        state = equilibrium_state(topology, eta=1e-9)
+        state_numpy = equilibrium_state_numpy(topology, eta=1e-9, structure=structure)
+
+        for node, xyz in state["node_xyz"].items():
+            assert np.allclose(xyz, state_numpy["node_xyz"][node])
+
+
+def test_equilibrium_arrays_gradient(braced_tower_2d):
+    """
+    The kernel is differentiable with respect to the edge forces.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    xyz, lengths, forces, loads, _ = equilibrium_parameters_numpy(topology, structure)
+
+    def loss(forces):
+        state = equilibrium_arrays_numpy(
+            structure, xyz, lengths, forces, loads, eta=1e-12
+        )
+        return np.sum(np.square(state["xyz"][0] - np.array([0.5, 0.0, 0.0])))
+
+    gradient = grad(loss)(forces)
+
+    step = 1e-6
+    for i in range(forces.size):
+        delta = np.zeros(forces.size)
+        delta[i] = step
+        fd = (loss(forces + delta) - loss(forces - delta)) / (2.0 * step)
+        assert np.allclose(gradient[i], fd, atol=1e-6)
+
+
+def test_warm_start_converges_faster(braced_tower_2d):
+    """
+    A previous state seeds an equilibrium that converges in fewer iterations.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    xyz, lengths, forces, loads, residuals = equilibrium_parameters_numpy(
+        topology, structure
+    )
+    previous = equilibrium_arrays_numpy(
+        structure, xyz, lengths, forces, loads, residuals, eta=1e-9
+    )
+
+    forces = forces * 1.01
+    cold = equilibrium_arrays_numpy(
+        structure, xyz, lengths, forces, loads, residuals, eta=1e-9
+    )
+    xyz, residuals = warm_start_numpy(structure, xyz, residuals, previous)
+    warm = equilibrium_arrays_numpy(
+        structure, xyz, lengths, forces, loads, residuals, eta=1e-9, warm=True
+    )
+
+    assert warm["iterations"] < cold["iterations"]
+    for name in ("xyz", "forces", "reactions"):
+        assert np.allclose(warm[name], cold[name], atol=1e-8)
+
+
+def test_warm_start_state_dicts(braced_tower_2d):
+    """
+    Both solvers warm start from a dictionary state, to the same equilibrium.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    previous = equilibrium_state(topology)
+
+    topology.edge_attribute((1, 4), "force", -1.1)
+    cold = equilibrium_state(topology)
+    warm = equilibrium_state(topology, initial_state=previous)
+    warm_numpy = equilibrium_state_numpy(topology, initial_state=previous)
+
+    for node, xyz in cold["node_xyz"].items():
+        assert np.allclose(warm["node_xyz"][node], xyz, atol=1e-5)
+        assert np.allclose(warm_numpy["node_xyz"][node], xyz, atol=1e-5)
+
+
+def test_warm_start_gradient(braced_tower_2d):
+    """
+    A warm started equilibrium differentiates like a cold started one.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    xyz, lengths, forces, loads, residuals = equilibrium_parameters_numpy(
+        topology, structure
+    )
+    previous = equilibrium_arrays_numpy(
+        structure, xyz, lengths, forces, loads, residuals, eta=1e-12
+    )
+    weights = np.linspace(-1.0, 1.0, xyz.size).reshape(xyz.shape)
+
+    def loss(parameters, warm):
+        xyz, lengths, forces = parameters
+        _xyz, _residuals = xyz, residuals
+        if warm:
+            _xyz, _residuals = warm_start_numpy(structure, xyz, residuals, previous)
+        state = equilibrium_arrays_numpy(
+            structure,
+            _xyz,
+            lengths,
+            forces * 1.05,
+            loads,
+            _residuals,
+            eta=1e-12,
+            warm=warm,
+        )
+        penalty = np.sum(weights * state["xyz"]) + np.sum(weights * state["reactions"])
+        return penalty + np.sum(np.square(state["forces"]))
+
+    parameters = (xyz, lengths * 1.02, forces)
+    gradient_cold = grad(loss)(parameters, False)
+    gradient_warm = grad(loss)(parameters, True)
+
+    assert np.allclose(loss(parameters, True), loss(parameters, False))
+    for warm, cold in zip(gradient_warm, gradient_cold):
+        assert np.allclose(warm, cold, atol=1e-9)
+
+
+def test_anderson_converges_stiff_topology(stiff_braced_tower_2d):
+    """
+    Anderson acceleration converges where the plain fixed-point iteration stalls.
+    """
+    topology = stiff_braced_tower_2d
+    topology.build_trails()
+
+    with pytest.raises(ValueError):
+        equilibrium_state_numpy(topology, method="fixed_point")
+
+    eq_state = equilibrium_state_numpy(topology, method="anderson")
+
+    assert eq_state["iterations"] < 100
+    assert len(eq_state["residual_history"]) == eq_state["iterations"] - 1
+    assert eq_state["residual_history"][-1] < 1e-6
+
+    # a plain sweep from the accelerated state stays put, it is a fixed point
+    check = equilibrium_state_numpy(topology, tmax=1, initial_state=eq_state)
+    assert check["residual_history"][0] < 1e-5
+
+
+def test_anderson_gradient(braced_tower_2d):
+    """
+    Anderson acceleration differentiates like the plain fixed-point iteration.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    xyz, lengths, forces, loads, _ = equilibrium_parameters_numpy(topology, structure)
+
+    def loss(forces, method):
+        state = equilibrium_arrays_numpy(
+            structure, xyz, lengths, forces, loads, eta=1e-12, method=method
+        )
+        return np.sum(np.square(state["xyz"][0] - np.array([0.5, 0.0, 0.0])))
+
+    assert np.allclose(loss(forces, "anderson"), loss(forces, "fixed_point"))
+    assert np.allclose(
+        grad(loss)(forces, "anderson"), grad(loss)(forces, "fixed_point"), atol=1e-9
+    )
+
+
+def test_implicit_gradient_not_converged(braced_tower_2d):
+    """
+    A gradient whose adjoint iteration runs out of iterations raises.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    arrays = equilibrium_parameters_numpy(topology, structure)
+    plan = sequence_plan(structure)
+    x = equilibrium_arrays_numpy(structure, *arrays[:4], eta=1e-12)["xyz"]
+
+    def loss(forces, tmax):
+        xyz, lengths, _, loads, residuals = arrays
+        x_star = fixed_point_numpy(
+            x,
+            xyz,
+            lengths,
+            forces,
+            loads,
+            residuals,
+            structure=structure,
+            plan=plan,
+            tmax=tmax,
+            eta=1e-12,
+        )
+        return np.sum(np.square(x_star))
+
+    grad(loss)(arrays[2], 100)
+    with pytest.raises(ValueError, match="Adjoint"):
+        grad(loss)(arrays[2], 1)
+
+
+def test_unsupported_method(braced_tower_2d):
+    """
+    An unknown iteration scheme is refused.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    with pytest.raises(ValueError):
+        equilibrium_state_numpy(topology, method="newton")
+
+
+# ==============================================================================
+# Tests - Iterator
+# ==============================================================================
+
+
+@pytest.mark.parametrize("method", ["fixed_point", "anderson"])
+def test_iter_equilibrium_ends_at_the_solver_state(braced_tower_2d, method):
+    """
+    The last state of the iterator is the one the solver returns.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    eq_states = list(iter_equilibrium(topology, eta=1e-9, method=method))
+    eq_state = equilibrium_state_numpy(topology, eta=1e-9, method=method)
+
+    assert [state.iterations for state in eq_states] == list(
+        range(1, eq_state.iterations + 1)
+    )
+    assert eq_states[0].distance is None
+    assert [state.distance for state in eq_states[1:]] == eq_state.residual_history
+    assert np.allclose(eq_states[-1].xyz, eq_state.xyz)
+    assert np.allclose(eq_states[-1].forces, eq_state.forces)
+
+
+def test_iter_equilibrium_stops_early(braced_tower_2d):
+    """
+    Consuming part of the iterator runs only that many iterations.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    first, second, third = islice(iter_equilibrium(topology, eta=1e-9), 3)
+
+    assert third.iterations == 3
+    assert third.distance < second.distance
+    assert not np.allclose(first.xyz, third.xyz)
+    assert np.allclose(third["node_xyz"][0], third.xyz[third.structure.node_index[0]])
+
+    # the states of earlier iterations are left as they were
+    cold = next(iter_equilibrium(topology, eta=1e-9))
+    assert np.all(first.xyz == cold.xyz)
+
+
+def test_iter_equilibrium_single_sweep(threebar_funicular):
+    """
+    A topology without indirect deviation edges is solved in one iteration.
+    """
+    topology = threebar_funicular
+    topology.build_trails()
+
+    eq_states = list(iter_equilibrium(topology))
+    eq_state = equilibrium_state_numpy(topology)
+
+    assert len(eq_states) == 1
+    assert np.allclose(eq_states[0].xyz, eq_state.xyz)
+
+
+def test_iter_equilibrium_not_converged(braced_tower_2d):
+    """
+    An iterator that runs out of iterations raises after its last state.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    eq_states = []
+    with pytest.raises(ValueError):
+        for eq_state in iter_equilibrium(topology, tmax=3, eta=1e-12):
+            eq_states.append(eq_state)
+
+    assert len(eq_states) == 3
+
+
+# ==============================================================================
+# Tests - Array Primitives
+# ==============================================================================
+
+
+def test_segment_sum_and_scatter():
+    """
+    The two array primitives add up and replace rows, and differentiate.
+    """
+    data = np.arange(12.0).reshape(4, 3)
+    ids = np.array([0, 2, 0, 1])
+
+    sums = segment_sum(data, ids, 3)
+    assert np.allclose(sums, [data[0] + data[2], data[3], data[1]])
+
+    array = np.zeros((3, 3))
+    updated = scatter(array, np.array([2, 0]), data[:2])
+    assert np.allclose(updated, [data[1], np.zeros(3), data[0]])
+    assert np.allclose(array, 0.0)
+
+    weights = np.arange(9.0).reshape(3, 3)
+    assert np.allclose(
+        grad(lambda d: np.sum(segment_sum(d, ids, 3) * weights))(data), weights[ids]
+    )
+    assert np.allclose(
+        grad(lambda d: np.sum(scatter(array, [2, 0], d) * weights))(data[:2]),
+        weights[[2, 0]],
+    )
+
+
+# ==============================================================================
+# Tests - Regression Baselines
+# ==============================================================================
+
+
+class _Captured(Exception):
+    pass
+
+
+@pytest.mark.parametrize("script", SCRIPTS)
+def test_static_equilibrium_numpy_matches_baseline(script, monkeypatch):
+    """
+    The vectorized kernel reproduces the form diagram of every example baseline.
+    """
+    with open(os.path.join(BASELINE, script + ".json")) as f:
+        expected = json.load(f)["captured"]["static_equilibrium"][0]
+
+    captured = {}
+
+    def probe(topology, *args, **kwargs):
+        captured["topology"] = topology
+        captured["kwargs"] = kwargs
+        raise _Captured
+
+    monkeypatch.setattr(equilibrium, "static_equilibrium", probe)
+    monkeypatch.chdir(EXAMPLES)
+
+    with pytest.raises(_Captured):
+        runpy.run_path(os.path.join(EXAMPLES, script + ".py"), run_name="__main__")
+
+    kwargs = captured["kwargs"]
+    kwargs.pop("verbose", None)
+    form = static_equilibrium_numpy(captured["topology"], **kwargs)
+
+    for node in form.nodes():
+        xyz = expected["xyz"][str(node)]
+        reaction = expected["reaction"][str(node)]
+        assert np.allclose(form.node_coordinates(node), xyz, atol=1e-5)
+        assert np.allclose(form.reaction_force(node), reaction, atol=1e-5)
+
+    for edge in form.edges():
+        assert np.allclose(
+            form.edge_force(edge), expected["force"][str(edge)], atol=1e-5
+        )
+        assert np.allclose(
+            form.edge_length_2(edge), expected["length"][str(edge)], atol=1e-5
+        )
+
+
+@pytest.mark.parametrize("script", SCRIPTS[2:])
+def test_optimizer_gradient_matches_baseline(script, monkeypatch):
+    """
+    The gradient an optimization ends with is finite and matches the baseline,
+    also where trails carry no force.
+    """
+    with open(os.path.join(BASELINE, script + ".json")) as f:
+        expected = json.load(f)["captured"]["solve"][0]["optimizer"]
+
+    from compas_cem.optimization import Optimizer
+
+    solve = Optimizer.solve
+    captured = {}
+
+    def probe(optimizer, *args, **kwargs):
+        kwargs["verbose"] = False
+        solve(optimizer, *args, **kwargs)
+        captured["optimizer"] = optimizer
+        raise _Captured
+
+    monkeypatch.setattr(Optimizer, "solve", probe)
+    monkeypatch.chdir(EXAMPLES)
+
+    with pytest.raises(_Captured):
+        runpy.run_path(os.path.join(EXAMPLES, script + ".py"), run_name="__main__")
+
+    optimizer = captured["optimizer"]
+    assert np.all(np.isfinite(optimizer.gradient))
+    assert np.allclose(optimizer.gradient, expected["gradient"], atol=1e-6)
+    assert np.isclose(optimizer.penalty, expected["penalty"], atol=1e-6)
@@ -0,0 +1,96 @@
+import pytest
+from pytest_lazy_fixtures import lf
+
+import numpy as np
+
+from compas.geometry import Point
+
+from compas_cem.equilibrium import EquilibriumState
+from compas_cem.equilibrium import EquilibriumStructure
+from compas_cem.equilibrium import static_equilibrium_numpy
+from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy
+from compas_cem.optimization import PointGoal
+from compas_cem.optimization import ReactionForceGoal
+from compas_cem.optimization import TrailEdgeForceGoal
+
+# ==============================================================================
+# Tests - Equilibrium State
+# ==============================================================================
+
+
+@pytest.mark.parametrize(
+    "topology",
+    [(lf("threebar_funicular")), (lf("braced_tower_2d")), (lf("tension_chain"))],
+)
+def test_state_views_index_the_arrays(topology):
+    """
+    The keyed views of a state read the rows of its arrays without copying them.
+    """
+    topology.build_trails()
+    state = equilibrium_state_numpy(topology, eta=1e-9)
+    structure = state.structure
+
+    assert isinstance(state, EquilibriumState)
+    assert state.xyz.shape == (structure.number_of_nodes(), 3)
+    assert state.forces.shape == (structure.number_of_edges(),)
+
+    node_xyz = state["node_xyz"]
+    assert len(node_xyz) == topology.number_of_nodes()
+    for node in topology.nodes():
+        xyz = node_xyz[node]
+        assert np.shares_memory(xyz, state.xyz)
+        assert np.all(xyz == state.xyz[structure.node_index[node]])
+
+    assert set(state["trail_forces"]) == set(topology.trail_edges())
+    assert set(state["trail_directions"]) == set(topology.trail_edges())
+    assert set(state["reaction_forces"]) == set(topology.support_nodes())
+
+    for edge in topology.deviation_edges():
+        assert edge not in state["trail_forces"]
+        with pytest.raises(KeyError):
+            state["trail_forces"][edge]
+
+    for edge, direction in state["trail_directions"].items():
+        assert np.allclose(np.linalg.norm(direction), 1.0)
+
+
+def test_state_lengths_match_form(braced_tower_2d):
+    """
+    The signed lengths of a state are those of the form diagram.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    state = equilibrium_state_numpy(topology, eta=1e-9, structure=structure)
+    form = static_equilibrium_numpy(topology, eta=1e-9)
+
+    for edge in form.edges():
+        length = state.lengths[structure.edge_index[edge]]
+        assert np.allclose(length, form.edge_attribute(edge, "length"))
+
+
+def test_state_reads_like_a_dictionary(braced_tower_2d):
+    """
+    Goals and warm starts read a state like the dictionaries solvers returned.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    state = equilibrium_state_numpy(topology, eta=1e-9)
+    names = ("node_xyz", "trail_forces", "trail_directions", "reaction_forces")
+    eq_state = {name: dict(state[name].items()) for name in names}
+
+    goals = [
+        PointGoal(3, Point(1.0, -1.0, 0.0)),
+        TrailEdgeForceGoal((1, 2), -1.0),
+        ReactionForceGoal(3, [0.0, 1.0, 0.0]),
+    ]
+    for goal in goals:
+        assert np.allclose(goal.penalty(state), goal.penalty(eq_state))
+
+    assert state["iterations"] == state.iterations
+    with pytest.raises(KeyError):
+        state["node_lengths"]
+
+    warm = equilibrium_state_numpy(topology, eta=1e-9, initial_state=eq_state)
+    assert np.allclose(warm.xyz, state.xyz)
@@ -0,0 +1,115 @@
+import pytest
+from pytest_lazy_fixtures import lf
+
+from compas_cem.equilibrium import SolveStats
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium import static_equilibrium_numpy
+from compas_cem.equilibrium.force import equilibrium_state
+from compas_cem.equilibrium.force_numpy import equilibrium_state_numpy
+
+# ==============================================================================
+# Tests - Solve Stats
+# ==============================================================================
+
+
+@pytest.mark.parametrize("solver", [static_equilibrium, static_equilibrium_numpy])
+def test_stats_time_every_phase(braced_tower_2d, solver):
+    """
+    A solve with stats times its phases and records how it converged.
+    """
+    braced_tower_2d.build_trails()
+    form = solver(braced_tower_2d, stats=True)
+    stats = form.stats
+
+    assert isinstance(stats, SolveStats)
+    for phase in (
+        "structure",
+        "deviation_resultants",
+        "node_equilibrium",
+        "convergence",
+        "form",
+    ):
+        assert stats.times[phase] >= 0.0
+        assert stats.calls[phase] > 0
+
+    assert stats.calls["structure"] == 1
+    assert stats.calls["form"] == 1
+    assert stats.total() == pytest.approx(sum(stats.times.values()))
+
+    assert stats.iterations == form.attributes["iterations"]
+    assert stats.residual_history == form.attributes["residual_history"]
+    assert "node_equilibrium" in stats.summary()
+
+
+@pytest.mark.parametrize("topology", [(lf("tension_chain")), (lf("compression_chain"))])
+@pytest.mark.parametrize("solver", [static_equilibrium, static_equilibrium_numpy])
+def test_stats_time_plane_intersections(topology, solver):
+    """
+    The trail edges pulled to planes are timed apart from the node equilibrium.
+    """
+    topology.build_trails()
+    stats = solver(topology, stats=True).stats
+
+    assert stats.calls["plane_intersections"] > 0
+    assert "convergence" not in stats.times
+
+
+@pytest.mark.parametrize("solver", [equilibrium_state, equilibrium_state_numpy])
+def test_stats_read_as_a_key(braced_tower_2d, solver):
+    """
+    The stats of an equilibrium state read like a key of a dictionary.
+    """
+    braced_tower_2d.build_trails()
+    eq_state = solver(braced_tower_2d, stats=True)
+
+    assert isinstance(eq_state["stats"], SolveStats)
+    assert eq_state["stats"].calls["structure"] == 1
+
+
+def test_stats_disabled(braced_tower_2d):
+    """
+    A solve without stats carries none and leaves none recording.
+    """
+    braced_tower_2d.build_trails()
+
+    assert static_equilibrium_numpy(braced_tower_2d).stats is None
+    assert static_equilibrium(braced_tower_2d).stats is None
+    assert equilibrium_state_numpy(braced_tower_2d).stats is None
+    assert "stats" not in equilibrium_state(braced_tower_2d)
+    assert SolveStats.recording() is None
+
+
+def test_stats_record_in_context(braced_tower_2d):
+    """
+    Stats used as a context manager record every solve run inside it.
+    """
+    braced_tower_2d.build_trails()
+
+    with SolveStats() as stats:
+        assert SolveStats.recording() is stats
+        static_equilibrium_numpy(braced_tower_2d)
+        calls = stats.calls["structure"]
+        state = equilibrium_state_numpy(braced_tower_2d, stats=True)
+        assert SolveStats.recording() is stats
+    assert SolveStats.recording() is None
+
+    assert calls == 1
+    assert stats.calls["structure"] == calls
+    assert state.stats is not stats
+    assert state.stats.calls["structure"] == 1
+    assert "form" not in state.stats.times
+
+
+def test_stats_record_until_a_solve_fails(stiff_braced_tower_2d):
+    """
+    A solve that does not converge records how far it got before raising.
+    """
+    stiff_braced_tower_2d.build_trails()
+
+    with SolveStats() as stats:
+        with pytest.raises(ValueError):
+            static_equilibrium_numpy(stiff_braced_tower_2d, tmax=5)
+
+    assert stats.iterations == 5
+    assert len(stats.residual_history) == 4
+    assert "form" not in stats.times
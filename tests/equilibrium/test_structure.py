@@ -0,0 +1,146 @@
+import pytest
+
+from pytest_lazy_fixtures import lf
+
+import numpy as np
+
+from compas_cem.equilibrium import EquilibriumStructure
+
+
+# ==============================================================================
+# Tests - Equilibrium Structure
+# ==============================================================================
+
+
+@pytest.mark.parametrize(
+    "topology",
+    [
+        (lf("compression_strut")),
+        (lf("threebar_funicular")),
+        (lf("braced_tower_2d")),
+        (lf("tension_chain")),
+    ],
+)
+def test_structure_sequences_match_trails(topology):
+    """
+    Every trail node sits at its sequence in the column of its trail.
+    """
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    assert structure.shape == (
+        topology.number_of_sequences(),
+        topology.number_of_trails(),
+    )
+
+    for t, (key, trail) in enumerate(topology.trails(keys=True)):
+        assert structure.trails[t] == key
+        for node in trail:
+            k = topology.node_sequence(node)
+            assert structure.nodes[structure.sequences[k, t]] == node
+
+
+def test_structure_origins_of_shifted_trails():
+    """
+    A trail that starts at a later sequence has its first node as its origin.
+    """
+    structure = EquilibriumStructure(
+        nodes=[10, 11, 12, 13],
+        edges=[(10, 11), (11, 13), (11, 12)],
+        sequences=[[0, -1], [1, 2], [3, -1]],
+        trail_edges=[[0, -1], [1, -1], [-1, -1]],
+        supports=[False, False, True, True],
+        trail_mask=[True, True, False],
+        indirect_mask=[False, False, False],
+        plane_mask=[False, False, False],
+        plane_origins=np.zeros((3, 3)),
+        plane_normals=np.zeros((3, 3)),
+    )
+
+    assert structure.origin_nodes.tolist() == [10, 12]
+
+
+def test_structure_trail_edges(braced_tower_2d):
+    """
+    The trail edge of a slot joins its node to the node of the next sequence.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    num_sequences, num_trails = structure.shape
+    for k in range(num_sequences):
+        for t in range(num_trails):
+            edge = structure.trail_edges[k, t]
+            if edge < 0:
+                assert k == num_sequences - 1
+                continue
+            u = structure.nodes[structure.sequences[k, t]]
+            v = structure.nodes[structure.sequences[k + 1, t]]
+            assert set(structure.edges[edge]) == {u, v}
+            assert structure.trail_mask[edge]
+
+
+def test_structure_deviation_incidence(braced_tower_2d):
+    """
+    Each deviation edge reaches both of its nodes, flagged direct or indirect.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    indirect = {structure.edge_index[e] for e in topology.indirect_deviation_edges()}
+    direct = {structure.edge_index[e] for e in topology.direct_deviation_edges()}
+
+    assert set(np.flatnonzero(structure.indirect_mask)) == indirect
+    assert set(structure.deviation_edges) == indirect | direct
+    assert structure.incidence_node.size == 2 * len(indirect | direct)
+
+    for node, other, edge in zip(
+        structure.incidence_node, structure.incidence_other, structure.incidence_edge
+    ):
+        u, v = structure.edges[edge]
+        pair = {structure.nodes[node], structure.nodes[other]}
+        assert pair == {u, v}
+
+    # incidences are grouped by the sequence of the node they act on
+    sequences = structure.node_sequence[structure.incidence_node]
+    offsets = structure.incidence_offsets
+    for k in range(structure.number_of_sequences()):
+        assert np.all(sequences[offsets[k] : offsets[k + 1]] == k)
+
+    # every edge knows the indices of its nodes
+    assert np.all(structure.nodes[structure.edge_nodes] == structure.edges)
+
+
+def test_structure_supports_and_planes(tension_chain):
+    """
+    The support mask and the plane arrays follow the topology diagram.
+    """
+    topology = tension_chain
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    assert list(structure.support_nodes) == list(topology.support_nodes())
+
+    for edge, index in structure.edge_index.items():
+        plane = topology.edge_plane(edge)
+        assert structure.plane_mask[index] == bool(plane)
+        if plane:
+            assert np.allclose(structure.plane_origins[index], plane[0])
+            assert np.allclose(structure.plane_normals[index], plane[1])
+
+
+def test_structure_is_immutable(compression_strut):
+    """
+    A structure refuses reassignment and in-place edits of its arrays.
+    """
+    topology = compression_strut
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+
+    with pytest.raises(AttributeError):
+        structure.nodes = None
+
+    with pytest.raises(ValueError):
+        structure.sequences[0, 0] = 1
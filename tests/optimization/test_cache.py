@@ -0,0 +1,96 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.optimization import EvaluationCache
+
+# ==============================================================================
+# Tests - Evaluation Cache
+# ==============================================================================
+
+
+def test_cache_hits_and_misses():
+    """
+    Lookups of a stored parameter vector hit, the others miss.
+    """
+    cache = EvaluationCache()
+    x = np.array([1.0, 2.0])
+
+    assert cache.get(x) is None
+    cache.put(x, {"penalty": 1.0})
+
+    assert cache.get(np.array([1.0, 2.0]))["penalty"] == 1.0
+    assert cache.get(np.array([1.0, 2.0 + 1e-12])) is None
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 2,
+        "hit_rate": 1.0 / 3.0,
+        "size": 1,
+        "maxsize": 128,
+    }
+
+
+def test_cache_gradient_lookup():
+    """
+    An evaluation stored without a gradient misses a lookup for a gradient.
+    """
+    cache = EvaluationCache()
+    x = np.array([1.0, 2.0])
+    cache.put(x, {"penalty": 1.0, "gradient": None})
+
+    assert cache.get(x)["penalty"] == 1.0
+    assert cache.get(x, gradient=True) is None
+
+    cache.put(x, {"penalty": 1.0, "gradient": np.zeros(2)})
+    assert cache.get(x, gradient=True)["penalty"] == 1.0
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    A full cache drops the evaluation that was used the longest time ago.
+    """
+    cache = EvaluationCache(maxsize=2)
+    a, b, c = np.eye(3)
+
+    cache.put(a, {})
+    cache.put(b, {})
+    cache.get(a)
+    cache.put(c, {})
+
+    assert len(cache) == 2
+    assert a in cache
+    assert b not in cache
+    assert c in cache
+
+
+def test_cache_peek_and_clear():
+    """
+    Peeking does not count, clearing resets the statistics.
+    """
+    cache = EvaluationCache()
+    cache.put([0.5], {})
+
+    assert cache.peek([0.5]) == {}
+    assert cache.hits == cache.misses == 0
+
+    cache.get([0.5])
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.hits == cache.misses == 0
+
+
+def test_cache_size_zero():
+    """
+    A cache of size zero keeps nothing, and a negative size is refused.
+    """
+    cache = EvaluationCache(maxsize=0)
+    cache.put([0.5], {})
+
+    assert len(cache) == 0
+    assert cache.get([0.5]) is None
+    assert cache.misses == 1
+
+    with pytest.raises(ValueError):
+        EvaluationCache(maxsize=-1)
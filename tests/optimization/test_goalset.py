@@ -0,0 +1,183 @@
+import pytest
+
+import numpy as np
+
+from autograd import grad
+
+from compas.geometry import Line
+from compas.geometry import Plane
+from compas.geometry import Polyline
+
+from compas_cem.equilibrium import EquilibriumState
+from compas_cem.equilibrium import EquilibriumStructure
+from compas_cem.equilibrium.force_numpy import equilibrium_arrays_numpy
+from compas_cem.equilibrium.force_numpy import equilibrium_parameters_numpy
+from compas_cem.optimization import DeviationEdgeLengthGoal
+from compas_cem.optimization import EdgeDirectionGoal
+from compas_cem.optimization import GoalSet
+from compas_cem.optimization import LineGoal
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import PlaneGoal
+from compas_cem.optimization import PointGoal
+from compas_cem.optimization import PolylineGoal
+from compas_cem.optimization import ReactionForceGoal
+from compas_cem.optimization import TrailEdgeForceGoal
+from compas_cem.optimization import compile_goals
+
+# ==============================================================================
+# Helpers
+# ==============================================================================
+
+
+def equilibrium_arrays(topology):
+    """
+    The equilibrium structure of a topology and the arrays of its state.
+    """
+    topology.build_trails()
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    state = equilibrium_arrays_numpy(
+        structure, *equilibrium_parameters_numpy(topology, structure)
+    )
+    names = ("xyz", "forces", "reactions", "residuals")
+
+    return structure, {name: np.array(state[name]) for name in names}
+
+
+GOALS = {
+    "point": lambda: [
+        PointGoal(2, [0.5, 2.5, 0.0], weight=2.0),
+        PointGoal(5, [1.5, 1.0, 0.3]),
+    ],
+    "reaction": lambda: [
+        ReactionForceGoal(0, [0.0, 1.0, 0.0]),
+        ReactionForceGoal(3, [0.2, 0.8, 0.0], weight=0.5),
+    ],
+    "trail force": lambda: [
+        TrailEdgeForceGoal((0, 1), -1.5),
+        TrailEdgeForceGoal((4, 5), 0.3, weight=3.0),
+    ],
+    "length": lambda: [
+        DeviationEdgeLengthGoal((1, 4), 1.5),
+        DeviationEdgeLengthGoal((1, 5), 0.7, weight=2.0),
+    ],
+    "direction": lambda: [
+        EdgeDirectionGoal((0, 1), [0.1, 1.0, 0.0]),
+        EdgeDirectionGoal((5, 4), [0.0, 2.0, 0.5], weight=2.0),
+    ],
+    "plane": lambda: [
+        PlaneGoal(2, Plane([0.0, 2.5, 0.0], [0.0, 3.0, 1.0])),
+        PlaneGoal(5, Plane([1.0, 0.0, 0.0], [1.0, 1.0, 0.0]), weight=0.1),
+    ],
+    "line": lambda: [
+        LineGoal(1, Line([0.0, 0.0, 0.0], [2.0, 2.0, 0.0])),
+        LineGoal(4, Line([1.0, 0.0, 1.0], [1.0, 3.0, 0.0]), weight=4.0),
+    ],
+}
+
+# ==============================================================================
+# Tests - Goal sets
+# ==============================================================================
+
+
+@pytest.mark.parametrize("name", sorted(GOALS))
+def test_goalset_matches_goals(braced_tower_2d, name):
+    """
+    A goal set penalizes a state, and differentiates, like its goals one by one.
+    """
+    structure, arrays = equilibrium_arrays(braced_tower_2d)
+    goals = GOALS[name]()
+    goalset = GoalSet.from_goals(goals, structure)
+    assert len(goalset) == len(goals)
+
+    def penalty_goals(arrays):
+        state = EquilibriumState.from_arrays(arrays, structure)
+        return sum(goal.penalty(state) for goal in goals)
+
+    def penalty_goalset(arrays):
+        state = EquilibriumState.from_arrays(arrays, structure)
+        return goalset.penalty(state)
+
+    arrays = {key: array + 0.1 for key, array in arrays.items()}
+    assert np.allclose(penalty_goalset(arrays), penalty_goals(arrays))
+
+    gradient = grad(penalty_goalset)(arrays)
+    expected = grad(penalty_goals)(arrays)
+    for key in arrays:
+        assert np.allclose(gradient[key], expected[key])
+
+
+def test_goalset_rejects_mixed_and_unsupported_goals(braced_tower_2d):
+    """
+    A goal set is made of goals of one class that compiles.
+    """
+    structure, _ = equilibrium_arrays(braced_tower_2d)
+
+    with pytest.raises(ValueError):
+        GoalSet.from_goals(GOALS["point"]() + GOALS["line"](), structure)
+
+    polyline = Polyline([[0.0, 0.0, 0.0], [1.0, 2.0, 0.0]])
+    with pytest.raises(TypeError):
+        GoalSet.from_goals([PolylineGoal(2, polyline)], structure)
+
+
+def test_goalset_rejects_goals_without_a_value(braced_tower_2d):
+    """
+    Reaction goals need a support and force goals need a trail edge.
+    """
+    structure, _ = equilibrium_arrays(braced_tower_2d)
+
+    with pytest.raises(KeyError):
+        GoalSet.from_goals([ReactionForceGoal(2, [0.0, 1.0, 0.0])], structure)
+    with pytest.raises(KeyError):
+        GoalSet.from_goals([TrailEdgeForceGoal((1, 4), 1.0)], structure)
+
+
+def test_compile_goals_groups_by_class(braced_tower_2d):
+    """
+    Goals are grouped by class, and those that do not compile are left aside.
+    """
+    structure, _ = equilibrium_arrays(braced_tower_2d)
+
+    class OffsetPointGoal(PointGoal):
+        pass
+
+    polyline = Polyline([[0.0, 0.0, 0.0], [1.0, 2.0, 0.0]])
+    others = [PolylineGoal(2, polyline), OffsetPointGoal(1, [0.0, 1.0, 0.0])]
+    goals = GOALS["line"]() + others[:1] + GOALS["point"]() + others[1:]
+
+    goalsets, remaining = compile_goals(goals, structure)
+
+    assert [goalset.goal_type for goalset in goalsets] == [LineGoal, PointGoal]
+    assert remaining == others
+
+
+# ==============================================================================
+# Tests - Optimizer
+# ==============================================================================
+
+
+def test_optimizer_recompiles_goals_when_they_change(braced_tower_2d):
+    """
+    The optimizer compiles its goals once, and again after they change.
+    """
+    structure, arrays = equilibrium_arrays(braced_tower_2d)
+    state = EquilibriumState.from_arrays(arrays, structure)
+
+    optimizer = Optimizer()
+    for goal in GOALS["point"]() + GOALS["direction"]():
+        optimizer.add_goal(goal)
+
+    penalty = optimizer._calculate_penalty(state)
+    expected = sum(goal.penalty(state) for goal in optimizer.goals.values())
+    assert np.allclose(penalty, expected)
+
+    goalsets = optimizer._goalsets
+    optimizer._calculate_penalty(state)
+    assert optimizer._goalsets is goalsets
+
+    goal = PointGoal(1, [0.0, 2.0, 0.0])
+    optimizer.add_goal(goal)
+    assert optimizer._goalsets is None
+    assert np.allclose(
+        optimizer._calculate_penalty(state), expected + goal.penalty(state)
+    )
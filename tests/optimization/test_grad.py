@@ -0,0 +1,68 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.optimization import finite_difference_points
+from compas_cem.optimization import value_grad_finite_differences
+
+# ==============================================================================
+# Tests - Finite Differences
+# ==============================================================================
+
+
+def cubic(x):
+    """
+    A function whose forward differences err by the step size.
+    """
+    return np.sum(x**3)
+
+
+def test_finite_difference_points():
+    """
+    The points start at x, step forward and, for central differences, back.
+    """
+    x = np.array([1.0, 2.0])
+
+    forward = finite_difference_points(x, 0.5)
+    assert np.allclose(forward, [[1.0, 2.0], [1.5, 2.0], [1.0, 2.5]])
+
+    central = finite_difference_points(x, 0.5, "central")
+    assert np.allclose(central[:3], forward)
+    assert np.allclose(central[3:], [[0.5, 2.0], [1.0, 1.5]])
+
+    with pytest.raises(ValueError):
+        finite_difference_points(x, 0.5, "backward")
+
+
+@pytest.mark.parametrize("scheme, error", [("forward", 1e-2), ("central", 1e-4)])
+def test_finite_difference_schemes(scheme, error):
+    """
+    Central differences are an order more accurate than forward ones.
+    """
+    x = np.array([1.0, -2.0, 0.5])
+    value, grad = value_grad_finite_differences(x, cubic, 1e-3, scheme)
+
+    assert value == cubic(x)
+    assert np.abs(grad - 3.0 * x**2).max() < error
+    assert np.abs(grad - 3.0 * x**2).max() > error / 100.0
+
+
+def test_finite_differences_map():
+    """
+    Mapping the points at once gives what evaluating them one by one does.
+    """
+    x = np.array([1.0, -2.0, 0.5])
+    calls = []
+
+    def map_func(points):
+        calls.append(len(points))
+        return [cubic(point) for point in points]
+
+    expected = value_grad_finite_differences(x, cubic, 1e-3, "central")
+    value, grad = value_grad_finite_differences(
+        x, cubic, 1e-3, "central", map_func=map_func
+    )
+
+    assert calls == [7]
+    assert value == expected[0]
+    assert np.allclose(grad, expected[1])
@@ -0,0 +1,49 @@
+import pytest
+
+import numpy as np
+
+from compas_cem.optimization import sample_latin_hypercube
+from compas_cem.optimization import sample_uniform
+
+# ==============================================================================
+# Tests - Samplers
+# ==============================================================================
+
+
+@pytest.mark.parametrize("sampler", [sample_uniform, sample_latin_hypercube])
+def test_samplers_stay_within_bounds(sampler):
+    """
+    The samples fall within the bounds of every parameter.
+    """
+    bounds_low = np.array([-1.0, 0.0, 10.0])
+    bounds_up = np.array([1.0, 0.5, 20.0])
+
+    samples = sampler(50, bounds_low, bounds_up, np.random.default_rng(0))
+
+    assert samples.shape == (50, 3)
+    assert np.all(samples >= bounds_low)
+    assert np.all(samples <= bounds_up)
+
+
+def test_latin_hypercube_covers_every_stratum():
+    """
+    Every parameter is drawn once from each of as many strata as samples.
+    """
+    bounds_low = np.zeros(4)
+    bounds_up = np.full(4, 2.0)
+
+    samples = sample_latin_hypercube(8, bounds_low, bounds_up, np.random.default_rng(1))
+    strata = np.floor(samples / 2.0 * 8).astype(int)
+
+    for column in strata.T:
+        assert sorted(column) == list(range(8))
+
+
+def test_samplers_are_seeded():
+    """
+    The same seed draws the same samples.
+    """
+    bounds = np.zeros(2), np.ones(2)
+
+    samples = sample_uniform(3, *bounds, np.random.default_rng(7))
+    assert np.allclose(samples, sample_uniform(3, *bounds, np.random.default_rng(7)))
@@ -0,0 +1,484 @@
+from functools import partial
+
+import pytest
+
+import numpy as np
+
+from autograd import grad
+from autograd import value_and_grad
+
+from compas.geometry import Point
+
+from compas_cem.equilibrium import EquilibriumStructure
+from compas_cem.equilibrium import static_equilibrium
+from compas_cem.equilibrium.force_numpy import equilibrium_arrays_numpy
+from compas_cem.optimization import DeviationEdgeParameter
+from compas_cem.optimization import EvaluationCache
+from compas_cem.optimization import EvaluationPool
+from compas_cem.optimization import NodeLoadYParameter
+from compas_cem.optimization import Optimizer
+from compas_cem.optimization import OriginNodeXParameter
+from compas_cem.optimization import PointGoal
+from compas_cem.optimization import ReactionForceGoal
+from compas_cem.optimization import TrailEdgeForceGoal
+from compas_cem.optimization import TrailEdgeParameter
+from compas_cem.optimization import objective_function_value_grad
+from compas_cem.optimization import value_grad_finite_differences
+
+# ==============================================================================
+# Fixtures
+# ==============================================================================
+
+
+@pytest.fixture
+def braced_tower_optimizer(braced_tower_2d):
+    """
+    An optimizer over every kind of parameter of the braced tower.
+    """
+    topology = braced_tower_2d
+    topology.build_trails()
+
+    optimizer = Optimizer()
+    optimizer.add_parameter(TrailEdgeParameter((0, 1), 1.0, 1.0))
+    optimizer.add_parameter(DeviationEdgeParameter((1, 4), 1.0, 1.0))
+    optimizer.add_parameter(DeviationEdgeParameter((1, 5), 1.0, 1.0))
+    optimizer.add_parameter(OriginNodeXParameter(2, 1.0, 1.0))
+    optimizer.add_parameter(NodeLoadYParameter(5, 1.0, 1.0))
+
+    optimizer.add_goal(PointGoal(0, Point(0.2, 0.0, 0.0)))
+    optimizer.add_goal(PointGoal(3, Point(1.2, 0.0, 0.0)))
+    optimizer.add_goal(TrailEdgeForceGoal((1, 2), -1.0))
+    optimizer.add_goal(ReactionForceGoal(3, [0.0, 1.0, 0.0]))
+
+    return topology, optimizer
+
+
+# ==============================================================================
+# Tests - Objective Function
+# ==============================================================================
+
+
+@pytest.mark.parametrize("grad_method", ["AD", "FD"])
+def test_solve_evaluates_once_per_step(
+    braced_tower_optimizer, grad_method, monkeypatch
+):
+    """
+    Every evaluation yields the value and the gradient from one pass.
+    """
+    from compas_cem.optimization import optimizer as module
+
+    topology, optimizer = braced_tower_optimizer
+    calls = []
+
+    def counted(*args, **kwargs):
+        calls.append(1)
+        return equilibrium_arrays_numpy(*args, **kwargs)
+
+    monkeypatch.setattr(module, "equilibrium_arrays_numpy", counted)
+    optimizer.solve(topology, "LBFGS", grad=grad_method, iters=20)
+
+    passes = 1
+    if grad_method == "FD":
+        passes += optimizer.number_of_parameters()
+
+    assert len(calls) == optimizer.cache_misses * passes
+    assert optimizer.cache_misses <= optimizer.evals + 1
+
+
+def test_solve_evaluates_value_alone(braced_tower_optimizer, monkeypatch):
+    """
+    An evaluation that asks for no gradient solves the form once, not once per
+    finite difference.
+    """
+    from compas_cem.optimization import optimizer as module
+
+    topology, optimizer = braced_tower_optimizer
+    calls = []
+    sizes = []
+
+    def counted(*args, **kwargs):
+        calls.append(1)
+        return equilibrium_arrays_numpy(*args, **kwargs)
+
+    def objective(x, grad, **kwargs):
+        sizes.append(grad.size)
+        return objective_function_value_grad(x, grad, **kwargs)
+
+    monkeypatch.setattr(module, "equilibrium_arrays_numpy", counted)
+    monkeypatch.setattr(module, "objective_function_value_grad", objective)
+    optimizer.solve(topology, "SLSQP", grad="FD", iters=50)
+
+    # the evaluations with a gradient, and the one at the optimum
+    passes = optimizer.number_of_parameters() + 1
+    values = sizes.count(0)
+    assert values > 0
+    assert len(calls) <= (len(sizes) - values + 1) * passes + values
+
+
+def test_solve_reuses_cached_evaluation(braced_tower_optimizer):
+    """
+    The gradient reported at the optimum comes from the evaluation there.
+    """
+    topology, optimizer = braced_tower_optimizer
+    optimizer.solve(topology, "LBFGS", grad="AD", iters=20)
+
+    x = optimizer.x_opt
+    entry = optimizer.cache.peek(x)
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    x_func = partial(optimizer._optimize_form, topology=topology.copy())
+
+    # both gradients are as accurate as the form-finding tolerance
+    gradient = grad(x_func)(x, structure=structure, tmax=100, eta=1e-6)
+    assert np.allclose(optimizer.gradient, gradient, atol=1e-6)
+    assert np.allclose(
+        entry["penalty"], x_func(x, structure=structure, tmax=100, eta=1e-6)
+    )
+    assert optimizer.cache_hits + optimizer.cache_misses == optimizer.evals + 1
+    assert optimizer.cache_hits >= 1
+
+
+@pytest.mark.parametrize("grad_method", ["AD", "FD"])
+def test_solve_warm_start(braced_tower_optimizer, grad_method):
+    """
+    Warm starting the form-finding does not change where an optimization lands.
+    """
+    topology, optimizer = braced_tower_optimizer
+
+    form_cold = optimizer.solve(
+        topology.copy(), "SLSQP", grad=grad_method, iters=50, warm_start=False
+    )
+    penalty = optimizer.penalty
+
+    form_warm = optimizer.solve(
+        topology.copy(), "SLSQP", grad=grad_method, iters=50, warm_start=True
+    )
+
+    assert np.allclose(optimizer.penalty, penalty, atol=1e-6)
+    for node in form_cold.nodes():
+        xyz = form_cold.node_coordinates(node)
+        assert np.allclose(form_warm.node_coordinates(node), xyz, atol=1e-3)
+
+
+def test_solve_builds_form_from_cache(braced_tower_optimizer, monkeypatch):
+    """
+    The form of the optimum is built from its cached state, without a re-solve.
+    """
+    from compas_cem.optimization import optimizer as module
+
+    topology, optimizer = braced_tower_optimizer
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The optimum was solved again")
+
+    monkeypatch.setattr(module, "static_equilibrium", fail)
+    form = optimizer.solve(topology, "LBFGS", grad="AD", iters=20)
+    monkeypatch.undo()
+
+    form_solved = static_equilibrium(topology)
+    for node in form.nodes():
+        xyz = form_solved.node_coordinates(node)
+        assert np.allclose(form.node_coordinates(node), xyz, atol=1e-5)
+    for edge in form.edges():
+        force = form_solved.edge_force(edge)
+        assert np.allclose(form.edge_force(edge), force, atol=1e-5)
+
+
+def test_solve_cache_size(braced_tower_optimizer):
+    """
+    The evaluation cache never outgrows its size.
+    """
+    topology, optimizer = braced_tower_optimizer
+    optimizer.solve(topology, "LBFGS", grad="AD", iters=20, cache_size=2)
+
+    assert len(optimizer.cache) <= 2
+    assert optimizer.cache.peek(optimizer.x_opt) is not None
+
+
+def test_solve_without_cache(braced_tower_optimizer):
+    """
+    A cache of size zero memoizes nothing, and the optimum is solved once more.
+    """
+    topology, optimizer = braced_tower_optimizer
+    form = optimizer.solve(topology.copy(), "LBFGS", grad="AD", iters=20)
+    gradient = optimizer.gradient
+
+    form_nocache = optimizer.solve(
+        topology.copy(), "LBFGS", grad="AD", iters=20, cache_size=0
+    )
+
+    assert len(optimizer.cache) == 0
+    assert optimizer.cache_hits == 0
+    assert np.allclose(optimizer.gradient, gradient, atol=1e-6)
+    for node in form.nodes():
+        xyz = form.node_coordinates(node)
+        assert np.allclose(form_nocache.node_coordinates(node), xyz, atol=1e-5)
+
+
+# ==============================================================================
+# Tests - JAX Backend
+# ==============================================================================
+
+
+@pytest.mark.parametrize("implicit", [False, True])
+def test_jax_gradient_matches_autograd(braced_tower_optimizer, implicit):
+    """
+    The gradients of the JAX backend match the autograd gradient.
+    """
+    pytest.importorskip("jax")
+    pytest.importorskip("equinox")
+
+    topology, optimizer = braced_tower_optimizer
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    x = optimizer.optimization_parameters(topology) + 0.1
+
+    def penalty(x):
+        return optimizer._optimize_form(x, topology.copy(), structure, 100, 1e-9)
+
+    value, gradient = optimizer._optimize_form_jax(
+        x, topology.copy(), structure, 100, 1e-9, gradient=True, implicit=implicit
+    )
+
+    assert np.allclose(value, penalty(x))
+    assert np.allclose(gradient, grad(penalty)(x), atol=1e-7)
+
+
+@pytest.mark.parametrize("grad_method", ["JAX", "ADJOINT"])
+def test_jax_solve_matches_autograd(braced_tower_optimizer, grad_method):
+    """
+    An optimization with the JAX backend lands where the autograd one does.
+    """
+    pytest.importorskip("jax")
+    pytest.importorskip("equinox")
+
+    topology, optimizer = braced_tower_optimizer
+
+    # the JAX backend does not warm start, neither does the reference
+    form = optimizer.solve(
+        topology.copy(), "LBFGS", grad="AD", iters=20, warm_start=False
+    )
+    penalty = optimizer.penalty
+
+    form_jax = optimizer.solve(topology.copy(), "LBFGS", grad=grad_method, iters=20)
+
+    assert np.allclose(optimizer.penalty, penalty, atol=1e-6)
+    for node in form.nodes():
+        xyz = form.node_coordinates(node)
+        assert np.allclose(form_jax.node_coordinates(node), xyz, atol=1e-4)
+
+
+# ==============================================================================
+# Tests - Finite Differences
+# ==============================================================================
+
+
+# the workers run no JAX, so forking them once it is imported is safe
+@pytest.mark.filterwarnings("ignore:os.fork")
+@pytest.mark.parametrize("scheme, atol", [("forward", 1e-5), ("central", 1e-8)])
+@pytest.mark.parametrize("parallel", [None, "batch", "processes"])
+def test_finite_differences_match_autograd(
+    braced_tower_optimizer, scheme, atol, parallel
+):
+    """
+    Finite differences approximate the autograd gradient, however they run.
+    """
+    topology, optimizer = braced_tower_optimizer
+    structure = EquilibriumStructure.from_topology_diagram(topology)
+    x = optimizer.optimization_parameters(topology) + 0.1
+
+    optimizer._initial_state = None
+    optimizer._states = {}
+    x_func = partial(
+        optimizer._optimize_form,
+        topology=topology.copy(),
+        structure=structure,
+        tmax=200,
+        eta=1e-12,
+    )
+    value, gradient = value_and_grad(x_func)(x)
+
+    pool = None
+    map_func = None
+    if parallel == "batch":
+        map_func = partial(
+            optimizer._optimize_form_batch,
+            topology=topology.copy(),
+            structure=structure,
+            tmax=200,
+            eta=1e-12,
+        )
+    elif parallel == "processes":
+        pool = EvaluationPool(optimizer, topology, structure, 200, 1e-12, workers=2)
+        map_func = partial(optimizer._optimize_form_pool, pool=pool)
+
+    try:
+        value_fd, gradient_fd = value_grad_finite_differences(
+            x, x_func, 1e-6, scheme=scheme, map_func=map_func
+        )
+    finally:
+        if pool is not None:
+            pool.close()
+
+    assert np.allclose(value_fd, value)
+    assert np.allclose(gradient_fd, gradient, atol=atol)
+    assert EvaluationCache.key(x) in optimizer._states
+
+
+@pytest.mark.filterwarnings("ignore:os.fork")
+@pytest.mark.parametrize("parallel", ["batch", "processes"])
+def test_solve_parallel_finite_differences(braced_tower_optimizer, parallel):
+    """
+    An optimization lands in the same place whether its finite differences
+    run one after the other or all at once.
+    """
+    topology, optimizer = braced_tower_optimizer
+
+    # parallel evaluations do not warm start, neither does the reference
+    form = optimizer.solve(
+        topology.copy(), "SLSQP", grad="FD", iters=50, warm_start=False
+    )
+    penalty = optimizer.penalty
+
+    form_parallel = optimizer.solve(
+        topology.copy(),
+        "SLSQP",
+        grad="FD",
+        iters=50,
+        fd_parallel=parallel,
+        fd_workers=2,
+    )
+
+    assert np.allclose(optimizer.penalty, penalty, atol=1e-6)
+    for node in form.nodes():
+        xyz = form.node_coordinates(node)
+        assert np.allclose(form_parallel.node_coordinates(node), xyz, atol=1e-4)
+
+
+def test_solve_rejects_finite_difference_options(braced_tower_optimizer):
+    """
+    Unknown finite-difference schemes and parallel evaluations are refused.
+    """
+    topology, optimizer = braced_tower_optimizer
+
+    with pytest.raises(ValueError):
+        optimizer.solve(topology, grad="FD", fd_scheme="backward")
+    with pytest.raises(ValueError):
+        optimizer.solve(topology, grad="FD", fd_parallel="threads")
+
+
+# ==============================================================================
+# Tests - Multistart
+# ==============================================================================
+
+
+def test_solve_from_start_point(braced_tower_optimizer):
+    """
+    An optimization can start away from the topology, within the same bounds.
+    """
+    topology, optimizer = braced_tower_optimizer
+    x = optimizer.optimization_parameters(topology)
+    bounds = optimizer.optimization_bounds(topology)
+
+    optimizer.solve(topology.copy(), "SLSQP", iters=50, x0=x + 0.5)
+    assert np.all(optimizer.x_opt >= bounds[0])
+    assert np.all(optimizer.x_opt <= bounds[1])
+
+    with pytest.raises(ValueError):
+        optimizer.solve(topology.copy(), x0=x[:2])
+
+    x0 = x.copy()
+    x0[[1, 3]] = bounds[1][[1, 3]] + 0.1
+    with pytest.raises(ValueError, match="out of the bounds") as error:
+        optimizer.solve(topology.copy(), x0=x0)
+    assert "DeviationEdgeParameter (1, 4)" in str(error.value)
+    assert "OriginNodeXParameter 2" in str(error.value)
+    assert "TrailEdgeParameter" not in str(error.value)
+
+
+@pytest.mark.filterwarnings("ignore:os.fork")
+@pytest.mark.parametrize("sampler", ["uniform", "lhs"])
+def test_solve_multistart(braced_tower_optimizer, sampler):
+    """
+    The best of many starts is kept, and where the starts run does not matter.
+    """
+    topology, optimizer = braced_tower_optimizer
+    x = optimizer.optimization_parameters(topology)
+
+    optimizer.solve(topology.copy(), "SLSQP", iters=20)
+    penalty = optimizer.penalty
+
+    options = {"sampler": sampler, "seed": 0, "algorithm": "SLSQP", "iters": 20}
+    optimizer.solve_multistart(topology.copy(), 4, workers=1, **options)
+    starts_serial = optimizer.starts
+    form, summary = optimizer.solve_multistart(topology, 4, workers=2, **options)
+    starts = optimizer.starts
+
+    assert len(starts) == 4
+    for start, start_serial in zip(starts, starts_serial):
+        assert np.allclose(start["x0"], start_serial["x0"])
+        assert np.allclose(start["x_opt"], start_serial["x_opt"])
+    assert np.allclose(starts[0]["x0"], x)
+    assert starts[0]["penalty"] == pytest.approx(penalty)
+    assert optimizer.penalty == min(start["penalty"] for start in starts)
+    assert summary.count("\n") == 4
+    assert summary.count("*") == 1
+
+    # the topology holds the parameters of the best start, and so does the form
+    assert np.allclose(optimizer.optimization_parameters(topology), optimizer.x_opt)
+    form_solved = static_equilibrium(topology)
+    for node in form.nodes():
+        xyz = form_solved.node_coordinates(node)
+        assert np.allclose(form.node_coordinates(node), xyz, atol=1e-5)
+
+
+def test_solve_multistart_sampler(braced_tower_optimizer):
+    """
+    A custom sampler draws all the start points but the first.
+    """
+    topology, optimizer = braced_tower_optimizer
+    x = optimizer.optimization_parameters(topology)
+    calls = []
+
+    def sampler(num_samples, bounds_low, bounds_up, rng):
+        calls.append(num_samples)
+        return np.tile(x + 0.25, (num_samples, 1))
+
+    optimizer.solve_multistart(topology, 3, sampler=sampler, workers=1, iters=5)
+
+    assert calls == [2]
+    assert np.allclose(optimizer.starts[0]["x0"], x)
+    assert np.allclose(optimizer.starts[2]["x0"], x + 0.25)
+
+
+def test_solve_multistart_failures(braced_tower_optimizer):
+    """
+    Failed starts are recorded with their error, and bad options are refused.
+    """
+    topology, optimizer = braced_tower_optimizer
+
+    with pytest.raises(ValueError, match="All 2 optimizations failed"):
+        optimizer.solve_multistart(topology, 2, workers=1, grad="NONE")
+    assert all("error" in start for start in optimizer.starts)
+
+    with pytest.raises(ValueError):
+        optimizer.solve_multistart(topology, 0)
+    with pytest.raises(ValueError):
+        optimizer.solve_multistart(topology, 2, sampler="sobol")
+    with pytest.raises(ValueError):
+        optimizer.solve_multistart(topology, 2, x0=[0.0])
+
+
+def test_solve_multistart_without_cache(braced_tower_optimizer):
+    """
+    Starts that memoize nothing still record the state of their optimum.
+    """
+    topology, optimizer = braced_tower_optimizer
+    options = {"seed": 0, "algorithm": "SLSQP", "iters": 20}
+
+    optimizer.solve_multistart(topology.copy(), 2, workers=1, **options)
+    starts = optimizer.starts
+    optimizer.solve_multistart(topology, 2, workers=1, cache_size=0, **options)
+
+    for start, start_cached in zip(optimizer.starts, starts):
+        assert np.allclose(start["x_opt"], start_cached["x_opt"])
+        xyz = start_cached["state"]["xyz"]
+        assert np.allclose(start["state"]["xyz"], xyz, atol=1e-5)